@@ -105,6 +105,12 @@ else:
         },
     }
 
+# Отдельная БД для python manage.py bench_indexes (удаляет индексы на время
+# замера), например BENCH_DATABASE_URL=sqlite:////tmp/bench.sqlite3;
+# схема создаётся командой migrate --database bench
+if env.str('BENCH_DATABASE_URL', default=''):
+    DATABASES['bench'] = env.db_url('BENCH_DATABASE_URL')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -132,7 +138,8 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication + переиспользование токена, проверенного JWTAuthMiddleware
+        'test_app.authentication.CookieJWTAuthentication',
     ],
     # 'DEFAULT_PERMISSION_CLASSES': [
     #     'rest_framework.permissions.IsAuthenticated',
@@ -141,6 +148,66 @@ REST_FRAMEWORK = {
 }
 
 
+# Кэш приложения: поколения, статистика, кэш ответов, single-flight JWT.
+# По умолчанию — locmemcache:// (память процесса): годится для одного процесса.
+# При нескольких воркерах нужен общий кэш с атомарными add()/incr() —
+# CACHE_URL=pymemcache://host:11211 (локально без memcached — python manage.py
+# run_cache_standin). filecache:// для этого не подходит: add()/incr() в нём
+# не атомарны между процессами, а каждый set() перечисляет весь каталог.
+# Ключи приложения строятся через test_app.caching.make_key
+_cache = env.cache_url('CACHE_URL', default='locmemcache://')
+if _cache['BACKEND'].endswith(('LocMemCache', 'FileBasedCache')):
+    # Порог по умолчанию (300 записей со случайным вытеснением) выбивал бы
+    # ключи поколений; memcached этот параметр не принимает
+    _cache.setdefault('OPTIONS', {}).setdefault('MAX_ENTRIES', 100_000)
+CACHES = {
+    'default': {
+        **_cache,
+        'KEY_PREFIX': env.str('CACHE_KEY_PREFIX', default='task_manager'),
+    },
+}
+
+# Тесты работают с PyMemcacheCache через локальную замену memcached (test_app/cache_standin.py)
+TEST_RUNNER = 'test_app.cache_standin.StandInCacheTestRunner'
+
+# Сколько секунд пользователь, найденный по JWT, хранится в кэше
+# (test_app.authentication.CookieJWTAuthentication)
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Подсчёт строк для пагинации (test_app/counting.py): до порога — точный
+# COUNT(*), выше — оценка; оценки и размеры таблиц кэшируются на N секунд
+COUNT_EXACT_THRESHOLD = 10_000
+COUNT_CACHE_TIMEOUT = 60
+
+# Кэш анонимных списков задач (test_app/response_cache.py); инвалидация — по поколению
+TASK_LIST_CACHE_TIMEOUT = 300
+
+# Кэш сериализованных задач по версии updated_at (test_app/serializers/fragments.py)
+FRAGMENT_CACHE_TIMEOUT = 3600
+
+# True — списки задач и подзадач сериализуются из values() (test_app/serializers/fast.py)
+# вместо ModelSerializer; списки задач тогда не используют кэш фрагментов
+FAST_READ_SERIALIZERS = env.bool('FAST_READ_SERIALIZERS', default=False)
+
+# Поиск ?search= (test_app/search.py): 'database' — FTS5/FULLTEXT, 'memory' — индекс
+# в памяти процесса, 'like' — LIKE '%term%'; в выдачу попадают не больше
+# SEARCH_RESULTS_LIMIT лучших совпадений
+SEARCH_BACKEND = env.str('SEARCH_BACKEND', default='database')
+SEARCH_RESULTS_LIMIT = 1000
+# Файл-снимок индекса 'memory' (python manage.py build_search_index); пусто — строить из БД
+SEARCH_INDEX_SNAPSHOT = env.str('SEARCH_INDEX_SNAPSHOT', default='')
+
+# Максимум элементов в одном запросе массового создания (POST /api/v1/tasks/bulk/)
+TASKS_BULK_MAX_ITEMS = 1000
+
+# Не реже чем раз в столько секунд Bloom-фильтр чёрного списка JWT
+# догружает новые строки из БД (test_app/tokens.py)
+BLACKLIST_FILTER_MAX_AGE = 5
+# Сколько id ниже последнего загруженного перечитывается при догрузке
+# (строки фиксируются не по порядку id) и раз в сколько секунд фильтр строится заново
+BLACKLIST_FILTER_RESCAN_WINDOW = 1000
+BLACKLIST_FILTER_REBUILD_AGE = 3600
+
 #https://django-rest-framework-simplejwt.readthedocs.io/en/latest/settings.html
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
@@ -153,6 +220,8 @@ SIMPLE_JWT = {
    # 'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),    #  и так идёт по умолчанию
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Проверка чёрного списка через Bloom-фильтр (test_app/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'test_app.serializers.users.TokenRefreshSerializer',
    # 'TOKEN_TYPE_CLAIM': 'token_type'     # не обязательное
 }
 
@@ -233,3 +302,10 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Очередь уведомлений (test_app/notifications.py, manage.py send_notifications)
+NOTIFICATIONS_BATCH_SIZE = 100
+NOTIFICATIONS_MAX_ATTEMPTS = 5
+NOTIFICATIONS_RETRY_DELAY = 60      # секунд, удваивается с каждой попыткой
+NOTIFICATIONS_DIGEST_WINDOW = 30    # секунд: изменения за окно уходят одним письмом
+NOTIFICATIONS_CLAIM_TIMEOUT = 300   # секунд: после падения воркера забранные строки снова в очереди
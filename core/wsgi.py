@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Индекс поиска 'memory' строится в фоне при старте, а не на первом запросе
+from test_app.search import warm_up_search_index  # noqa: E402
+
+warm_up_search_index()
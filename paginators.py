@@ -1,5 +1,204 @@
-from rest_framework.pagination import CursorPagination
+import json
+from datetime import date, datetime
+from decimal import Decimal
 
-class OverrideCursorPaginator(CursorPagination):
-    ordering = 'id'
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+from test_app.counting import count_queryset
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по составному ключу (поле сортировки, id):
+    - Следующая страница выбирается условием по позиции курсора
+      (created_at <= x AND (created_at < x OR id < y)), а не OFFSET —
+      глубина страницы не влияет на стоимость запроса.
+    - Сортировка берётся из OrderingFilter представления (?ordering=),
+      к ней всегда добавляется id для однозначного порядка.
+    - NULL в полях сортировки идут первыми при возрастании и последними
+      при убывании (на любой БД), курсор на NULL тоже поддерживается.
+    - Общее число строк — только по запросу (?with_count=1); на больших
+      таблицах оно приблизительное (test_app/counting.py).
+    """
+
+    ordering = '-created_at'
     page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'with_count'
+    tiebreaker = 'id'
+
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.with_tiebreaker(self.get_ordering(request, queryset, view))
+        self.cursor = self.decode_cursor(request)
+        self.count = self.get_count(queryset) if self.count_requested(request) else None
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = tuple(self.invert(field) for field in self.ordering) if reverse else self.ordering
+
+        nullable = self.nullable_fields(queryset.model, ordering)
+        queryset = queryset.order_by(*(self.order_expression(field, nullable) for field in ordering))
+        position = self.cursor.position if self.cursor else None
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, self.parse_position(position), nullable))
+
+        # Лишняя строка показывает, есть ли что-то за пределами страницы
+        rows = list(queryset[:self.page_size + 1])
+        has_following = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if self.has_next or self.has_previous:
+            self.display_page_controls = True
+        return self.page
+
+
+    def with_tiebreaker(self, ordering):
+        fields = [field.lstrip('-') for field in ordering]
+        if self.tiebreaker in fields or 'pk' in fields:
+            return tuple(ordering)
+        direction = '-' if ordering[0].startswith('-') else ''
+        return (*ordering, direction + self.tiebreaker)
+
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+
+    @staticmethod
+    def nullable_fields(model, ordering):
+        nullable = set()
+        for field in ordering:
+            name = field.lstrip('-')
+            try:
+                if model._meta.get_field(name).null:
+                    nullable.add(name)
+            except FieldDoesNotExist:
+                pass  # аннотация или путь через связь
+        return nullable
+
+
+    @staticmethod
+    def order_expression(field, nullable):
+        name = field.lstrip('-')
+        if name not in nullable:
+            return field
+        if field.startswith('-'):
+            return F(name).desc(nulls_last=True)
+        return F(name).asc(nulls_first=True)
+
+
+    @staticmethod
+    def after(ordering, values, nullable=()):
+        """
+        Условие «строго после позиции» для составного ключа сортировки.
+        Строится в ограниченной форме a <= x AND (a < x OR id < y), а не
+        (a < x) OR (a = x AND id < y): первое поле задаёт диапазон индекса,
+        и БД читает его по порядку, без сортировки всех оставшихся строк.
+        """
+        condition = None
+        for field, value in reversed(tuple(zip(ordering, values))):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            if value is None:
+                # NULL — первые при возрастании, последние при убывании
+                following = Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+                bound = Q(**{f'{name}__isnull': True}) if descending else Q()
+            else:
+                following = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+                if descending and name in nullable:
+                    following |= Q(**{f'{name}__isnull': True})
+                    bound |= Q(**{f'{name}__isnull': True})
+            condition = following if condition is None else bound & (following | condition)
+        return condition if condition is not None else Q()
+
+
+    def count_requested(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+
+    def get_count(self, queryset):
+        return count_queryset(queryset)
+
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self.encode_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Пустая страница после курсора — назад ведём от самого курсора
+            return self.encode_cursor(self.cursor._replace(reverse=True))
+        position = self.encode_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+
+    def encode_position(self, row):
+        return json.dumps([self.position_value(row, field.lstrip('-')) for field in self.ordering])
+
+
+    def parse_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+
+    @staticmethod
+    def position_value(row, field):
+        if isinstance(row, dict):
+            value = row[field]
+        else:
+            value = row
+            for part in field.split('__'):
+                value = getattr(value, part)
+
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+
+class OverrideCursorPaginator(KeysetCursorPagination):
+    """Пагинатор по умолчанию: стандартный ответ DRF (next/previous/results)."""
+
+    ordering = 'id'
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        return Response(payload)
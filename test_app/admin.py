@@ -1,5 +1,7 @@
 from django.contrib import admin, messages
-from .models import Category, Task, SubTask
+from .bulk import bulk_change_status
+from .counting import EstimatedCountPaginator
+from .models import Category, Task, SubTask, NotificationOutbox
 
 
 @admin.register(Category)
@@ -57,6 +59,9 @@ class TaskAdmin(admin.ModelAdmin):
     filter_horizontal = ['categories']
     date_hierarchy = 'created_at'
     list_per_page = 20
+    # Без COUNT(*) по всей таблице на каждой странице списка
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['-created_at']
 
     fieldsets = (
@@ -74,6 +79,20 @@ class TaskAdmin(admin.ModelAdmin):
 
     readonly_fields = ['created_at']
 
+    actions = ['mark_selected_as_done']
+
+
+    @admin.action(description='Mark selected tasks as Done')
+    def mark_selected_as_done(self, request, queryset):
+        # Один UPDATE, счётчики и уведомления — как при save() (test_app/bulk.py)
+        updated = len(bulk_change_status(queryset, 'done'))
+
+        self.message_user(
+            request,
+            f'Successfully marked {updated} tasks as Done',
+            messages.SUCCESS
+        )
+
 
     @admin.display(description="Наименование задачи")
     def abb_title(self, obj: Task):
@@ -90,6 +109,9 @@ class SubTaskAdmin(admin.ModelAdmin):
     raw_id_fields = ['task']
     date_hierarchy = 'created_at'
     list_per_page = 20
+    # Без COUNT(*) по всей таблице на каждой странице списка
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['-created_at']
 
     fieldsets = (
@@ -110,8 +132,8 @@ class SubTaskAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected subtasks as Done')
     def mark_selected_as_done(self, request, queryset):
-        to_update = queryset.exclude(status='done')
-        updated = to_update.update(status='done')
+        # Тот же путь, что у POST /api/v1/tasks/bulk-status/
+        updated = len(bulk_change_status(queryset, 'done'))
 
         self.message_user(
             request,
@@ -120,8 +142,11 @@ class SubTaskAdmin(admin.ModelAdmin):
         )
 
 
-
-
-
-
-
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['recipient', 'task_title', 'old_status', 'new_status', 'status', 'attempts', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['recipient', 'task_title']
+    raw_id_fields = ['task']
+    list_per_page = 20
+    ordering = ['-created_at']
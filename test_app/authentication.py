@@ -0,0 +1,89 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .caching import make_key
+
+
+def user_cache_key(user_id) -> str:
+    return make_key('auth_user', user_id)
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Удаляет пользователя из кэша аутентификации (после сохранения/удаления)."""
+    cache.delete(user_cache_key(user_id))
+
+
+class CookieJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, который:
+    - переиспользует access-токен, уже проверенный JWTAuthMiddleware
+      (request.jwt_access_token), вместо повторного декодирования;
+    - берёт пользователя из кэша (AUTH_USER_CACHE_TIMEOUT секунд) вместо
+      SELECT по user_id на каждый запрос. Кэш сбрасывается сигналами
+      при сохранении/удалении пользователя.
+    """
+
+    def authenticate(self, request: Request) -> Optional[tuple]:
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_prevalidated_token(request, raw_token)
+        if validated_token is None:
+            validated_token = self.get_validated_token(raw_token)
+
+        return self.get_user(validated_token), validated_token
+
+
+    def get_prevalidated_token(self, request: Request, raw_token: bytes) -> Optional[Token]:
+        """Токен, проверенный middleware, если в заголовке именно он."""
+        prevalidated = getattr(request, 'jwt_access_token', None)
+        if prevalidated is None:
+            return None
+
+        raw_access, token = prevalidated
+        if raw_access.encode() != raw_token:
+            return None
+        return token
+
+
+    def get_user(self, validated_token: Token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            # Родитель выбросит InvalidToken с нужным сообщением
+            return super().get_user(validated_token)
+
+        cache_key = user_cache_key(user_id)
+        user = cache.get(cache_key)
+        if user is None:
+            # Промах: SELECT и проверки simplejwt, затем кладём в кэш
+            user = super().get_user(validated_token)
+            cache.set(cache_key, user, timeout=getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+            return user
+
+        # Попадание: те же проверки, что делает simplejwt после SELECT
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
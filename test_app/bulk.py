@@ -0,0 +1,153 @@
+"""
+Массовые операции с задачами и подзадачами.
+
+Логика:
+1. Данные проверяют сериализаторы с many=True (serializers/bulk.py):
+   уникальность title и связи — по одному запросу на всю пачку
+2. POST /api/v1/tasks/bulk/ — bulk_create задач и bulk_create строк
+   связи Task.categories.through в одной транзакции
+3. POST /api/v1/tasks/<task_id>/subtasks/bulk/ — bulk_create новых
+   и bulk_update изменённых подзадач в одной транзакции
+4. POST /api/v1/tasks/bulk-status/ (и действие админки) — смена статуса
+   одним UPDATE ... WHERE id IN и очередь уведомлений одним bulk_create
+5. Счётчики статусов, кэш статистики и поисковый индекс обновляют
+   bulk_create/update менеджеров (сигналы save не вызываются)
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import NotificationOutbox, SubTask, Task
+from .search import index_objects
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_create_tasks(items, owner, batch_size=500):
+    """
+    Создаёт задачи из проверенных данных сериализатора (validated_data).
+    Возвращает созданные задачи в порядке items.
+    """
+    tasks = []
+    categories = []
+    for attrs in items:
+        attrs = dict(attrs)
+        categories.append(attrs.pop('categories', []))
+        tasks.append(Task(owner=owner, **attrs))
+
+    through = Task.categories.through
+    with transaction.atomic(using=Task.objects.db):
+        Task.objects.bulk_create(tasks, batch_size=batch_size)
+        fetch_missing_ids(Task, tasks)
+
+        through.objects.bulk_create(
+            [
+                through(task_id=task.pk, category_id=category_id)
+                for task, task_categories in zip(tasks, categories)
+                for category_id in dict.fromkeys(category.pk for category in task_categories)
+            ],
+            batch_size=batch_size,
+        )
+    return tasks
+
+
+def bulk_save_subtasks(task, owner, creates, updates, batch_size=500):
+    """
+    Создаёт подзадачи задачи task из creates (validated_data) и применяет
+    updates — пары (подзадача, изменённые поля). Возвращает (созданные, изменённые).
+    """
+    subtasks = [SubTask(task=task, owner=owner, **attrs) for attrs in creates]
+
+    fields = set()
+    updated = []
+    now = timezone.now()
+    for subtask, attrs in updates:
+        for name, value in attrs.items():
+            setattr(subtask, name, value)
+        # bulk_update не заполняет auto_now — версия для ETag ставится явно
+        subtask.updated_at = now
+        fields.update(attrs)
+        updated.append(subtask)
+
+    with transaction.atomic(using=SubTask.objects.db):
+        SubTask.objects.bulk_create(subtasks, batch_size=batch_size)
+        fetch_missing_ids(SubTask, subtasks)
+        if updated and fields:
+            SubTask.objects.bulk_update(updated, sorted(fields | {'updated_at'}), batch_size=batch_size)
+    return subtasks, updated
+
+
+def fetch_missing_ids(model, objs):
+    """
+    MySQL не возвращает id из bulk_create — находим их по уникальному title
+    и добавляем объекты в поисковый индекс (bulk_create пропустил их без id).
+    """
+    if connections[model.objects.db].features.can_return_rows_from_bulk_insert or not objs:
+        return
+
+    ids = dict(
+        model.objects.filter(title__in=[obj.title for obj in objs])
+        .values_list('title', 'id')
+    )
+    for obj in objs:
+        obj.pk = ids[obj.title]
+    index_objects(model, objs)
+
+
+def bulk_change_status(queryset, new_status):
+    """
+    Меняет статус строк queryset (Task или SubTask) одним UPDATE.
+    Для задач — то же, что делают сигналы при save(): счётчики статусов
+    и кэш статистики (TaskQuerySet.update) и уведомления владельцам
+    (строки очереди одним bulk_create; письма уходят дайджестом на владельца).
+    Возвращает id строк, у которых статус изменился.
+    """
+    model = queryset.model
+    with transaction.atomic(using=queryset.db):
+        rows = list(
+            queryset.exclude(status=new_status)
+            .select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'status', 'title', 'owner_id', 'owner__email', 'owner__username')
+        )
+        ids = [row[0] for row in rows]
+        if not ids:
+            return []
+
+        model.objects.filter(pk__in=ids).update(status=new_status)
+
+        if model is Task:
+            enqueue_bulk_status_changes(rows, new_status)
+    return ids
+
+
+def enqueue_bulk_status_changes(rows, new_status):
+    """Ставит в очередь уведомления о смене статуса: одна строка на задачу, bulk_create."""
+    by_owner = defaultdict(list)
+    for pk, old_status, title, owner_id, email, username in rows:
+        by_owner[(owner_id, email, username)].append(
+            NotificationOutbox(
+                recipient=email or '',
+                owner_name=username or '',
+                task_id=pk,
+                task_title=title,
+                old_status=old_status or '',
+                new_status=new_status,
+            )
+        )
+
+    notifications = []
+    for (owner_id, email, username), owner_notifications in by_owner.items():
+        if not email:
+            logger.warning(
+                f"Cannot send notification: {len(owner_notifications)} tasks of owner {owner_id} "
+                f"have no owner or email"
+            )
+            continue
+        notifications.extend(owner_notifications)
+        logger.info(f"Notifications queued for {email}: {len(owner_notifications)} tasks -> {new_status}")
+
+    NotificationOutbox.objects.bulk_create(notifications)
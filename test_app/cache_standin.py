@@ -0,0 +1,247 @@
+"""
+Локальная замена memcached: сервер текстового протокола memcached
+в потоке текущего процесса.
+
+Нужен, чтобы тесты и локальная разработка шли через тот же бэкенд кэша,
+что и в продакшене (django.core.cache.backends.memcached.PyMemcacheCache),
+без установленного memcached:
+- тесты: TEST_RUNNER = 'test_app.cache_standin.StandInCacheTestRunner'
+  поднимает сервер на свободном порту и направляет на него CACHES
+- разработка: python manage.py run_cache_standin --port 11211
+  и CACHE_URL=pymemcache://127.0.0.1:11211
+
+Поддерживаются команды, которые использует pymemcache: get/gets, set/add/
+replace/append/prepend/cas, delete, incr/decr, touch, flush_all, version.
+Память не ограничена и не вытесняется — только для тестов и разработки.
+"""
+
+import logging
+import socketserver
+import threading
+import time
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+# exptime больше 30 дней memcached считает абсолютным unix-временем
+RELATIVE_EXPTIME_LIMIT = 60 * 60 * 24 * 30
+STORAGE_COMMANDS = {'set', 'add', 'replace', 'append', 'prepend', 'cas'}
+
+
+class CacheStore:
+    """Хранилище ключ -> (flags, данные, срок, cas) с одной блокировкой."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self._cas = 0
+
+
+    @staticmethod
+    def expires_at(exptime):
+        if exptime == 0:
+            return None
+        if exptime < 0:
+            return 0.0
+        if exptime > RELATIVE_EXPTIME_LIMIT:
+            return float(exptime)
+        return time.time() + exptime
+
+
+    def _get(self, key):
+        item = self._items.get(key)
+        if item is not None and item[2] is not None and item[2] <= time.time():
+            del self._items[key]
+            return None
+        return item
+
+
+    def _put(self, key, flags, data, expires):
+        self._cas += 1
+        self._items[key] = (flags, data, expires, self._cas)
+
+
+    def get(self, keys):
+        with self._lock:
+            return {key: item for key in keys if (item := self._get(key)) is not None}
+
+
+    def store(self, command, key, flags, exptime, data, cas=None):
+        expires = self.expires_at(exptime)
+        with self._lock:
+            item = self._get(key)
+            if command == 'add' and item is not None:
+                return 'NOT_STORED'
+            if command in ('replace', 'append', 'prepend') and item is None:
+                return 'NOT_STORED'
+            if command == 'cas':
+                if item is None:
+                    return 'NOT_FOUND'
+                if item[3] != cas:
+                    return 'EXISTS'
+            if command == 'append':
+                flags, data, expires = item[0], item[1] + data, item[2]
+            elif command == 'prepend':
+                flags, data, expires = item[0], data + item[1], item[2]
+            self._put(key, flags, data, expires)
+            return 'STORED'
+
+
+    def delete(self, key):
+        with self._lock:
+            if self._get(key) is None:
+                return 'NOT_FOUND'
+            del self._items[key]
+            return 'DELETED'
+
+
+    def incr(self, key, delta):
+        """Новое значение для incr (delta > 0) и decr (delta < 0)."""
+        with self._lock:
+            item = self._get(key)
+            if item is None:
+                return 'NOT_FOUND'
+            if not item[1].isdigit():
+                return 'CLIENT_ERROR cannot increment or decrement non-numeric value'
+            # Как в memcached: decr не опускается ниже нуля, incr переполняется по 64 битам
+            value = max(int(item[1]) + delta, 0) % 2 ** 64
+            self._put(key, item[0], str(value).encode(), item[2])
+            return str(value)
+
+
+    def touch(self, key, exptime):
+        with self._lock:
+            item = self._get(key)
+            if item is None:
+                return 'NOT_FOUND'
+            self._items[key] = (item[0], item[1], self.expires_at(exptime), item[3])
+            return 'TOUCHED'
+
+
+    def flush(self):
+        with self._lock:
+            self._items.clear()
+            return 'OK'
+
+
+class MemcachedProtocolHandler(socketserver.StreamRequestHandler):
+    """Разбор команд одного соединения."""
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode('utf-8', 'replace').split()
+            if not parts:
+                self.reply('ERROR')
+                continue
+
+            command, args = parts[0], parts[1:]
+            noreply = bool(args) and args[-1] == 'noreply'
+            if noreply:
+                args = args[:-1]
+
+            try:
+                if command in STORAGE_COMMANDS:
+                    key, flags, exptime, size = args[0], int(args[1]), int(args[2]), int(args[3])
+                    data = self.rfile.read(size + 2)[:size]
+                    cas = int(args[4]) if command == 'cas' else None
+                    result = store.store(command, key, flags, exptime, data, cas)
+                elif command in ('get', 'gets'):
+                    self.send_values(store.get(args), with_cas=command == 'gets')
+                    continue
+                elif command == 'delete':
+                    result = store.delete(args[0])
+                elif command in ('incr', 'decr'):
+                    delta = int(args[1])
+                    result = store.incr(args[0], delta if command == 'incr' else -delta)
+                elif command == 'touch':
+                    result = store.touch(args[0], int(args[1]))
+                elif command == 'flush_all':
+                    result = store.flush()
+                elif command == 'version':
+                    result = 'VERSION 1.6.0-standin'
+                elif command == 'quit':
+                    return
+                else:
+                    result = 'ERROR'
+            except (IndexError, ValueError):
+                result = 'CLIENT_ERROR bad command line format'
+
+            if not noreply:
+                self.reply(result)
+
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+
+    def send_values(self, items, with_cas):
+        chunks = []
+        for key, (flags, data, _, cas) in items.items():
+            header = f"VALUE {key} {flags} {len(data)}" + (f" {cas}" if with_cas else '')
+            chunks.extend([header.encode(), b'\r\n', data, b'\r\n'])
+        chunks.append(b'END\r\n')
+        self.wfile.write(b''.join(chunks))
+
+
+class MemcachedStandIn(socketserver.ThreadingTCPServer):
+    """Сервер протокола memcached в фоновом потоке."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), MemcachedProtocolHandler)
+        self.store = CacheStore()
+        self._thread = None
+
+
+    @property
+    def location(self):
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='memcached-standin', daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class StandInCacheTestRunner(DiscoverRunner):
+    """Тесты с кэшем PyMemcacheCache, подключённым к MemcachedStandIn."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_server = MemcachedStandIn().start()
+        self.cache_settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                'LOCATION': self.cache_server.location,
+                'KEY_PREFIX': 'test',
+            },
+        })
+        self.cache_settings.enable()
+        logger.debug("Cache stand-in listening on %s", self.cache_server.location)
+
+
+    def teardown_test_environment(self, **kwargs):
+        from django.core.cache import caches
+
+        caches.close_all()
+        self.cache_settings.disable()
+        self.cache_server.stop()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,76 @@
+"""
+Ключи кэша приложения и поколения (generation) для инвалидации.
+
+Ключи:
+Все ключи приложения строятся через make_key(namespace, ...): пространство
+имён из CACHE_NAMESPACES и его версия входят в ключ. Версию увеличивают при
+смене формата хранимого значения — воркеры со старым и новым кодом
+(постепенная выкладка) не читают записи друг друга. Ключи всегда допустимы
+для memcached (длина, пробелы, управляющие символы).
+
+Поколения:
+Вместо удаления множества ключей кэша увеличиваем номер поколения:
+ключи строятся с текущим номером, и старые записи просто перестают
+читаться (и истекают по таймауту). Инвалидация — O(1).
+Пропавший номер (вытеснен, кэш перезапущен) создаётся заново из
+time.time_ns(), а не с 1: иначе номера повторились бы и ожили записи,
+сохранённые под ними раньше.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+
+# Пространство имён -> версия формата значений
+CACHE_NAMESPACES = {
+    'auth_user': 1,      # пользователи JWT-аутентификации (authentication.py)
+    'conditional': 1,    # время последней записи для Last-Modified (conditional.py)
+    'count': 1,          # оценки числа строк (counting.py)
+    'fragment': 1,       # сериализованные строки (serializers/fragments.py)
+    'generation': 1,     # номера поколений (этот модуль)
+    'jwt_refresh': 1,    # single-flight обновления access-токена (jwt_middleware.py)
+    'response': 2,       # данные ответов списков (response_cache.py)
+    'statistics': 1,     # статистика задач (statistics.py)
+}
+
+# memcached допускает ключи до 250 байт; остаток — на KEY_PREFIX и VERSION из CACHES
+MAX_KEY_LENGTH = 200
+
+
+def make_key(namespace, *parts):
+    """
+    Ключ кэша "<namespace>:v<версия>:<part>:...". Слишком длинный ключ или ключ
+    с пробелами/управляющими символами заменяется на md5 от него.
+    """
+    prefix = f"{namespace}:v{CACHE_NAMESPACES[namespace]}"
+    key = ':'.join([prefix, *map(str, parts)])
+    if len(key.encode()) > MAX_KEY_LENGTH or not key.isprintable() or ' ' in key:
+        key = f"{prefix}:md5:{hashlib.md5(key.encode()).hexdigest()}"
+    return key
+
+
+def _generation_key(name):
+    return make_key('generation', name)
+
+
+def get_generation(name):
+    """Текущий номер поколения name (создаётся при первом обращении)."""
+    key = _generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        seed = time.time_ns()
+        cache.add(key, seed, timeout=None)
+        value = cache.get(key, seed)
+    return value
+
+
+def bump_generation(name):
+    """Увеличивает номер поколения name, делая старые ключи недействительными."""
+    key = _generation_key(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключа нет (кэш очищен/перезапущен) — начинаем с неповторяющегося значения
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.incr(key)
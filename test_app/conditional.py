@@ -0,0 +1,164 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для задач и подзадач.
+
+Логика:
+1. Версия объекта — поле updated_at (auto_now). Изменения, которые видны
+   в ответе по задаче, но хранятся в других таблицах, тоже сдвигают её
+   updated_at (signals.py, managers.py): подзадачи, связи с категориями,
+   переименование и удаление категории
+2. Версия коллекции — поколение таблицы в кэше (caching.py). Любая запись
+   в таблицу (сигналы save/delete, update() и bulk_create() менеджеров, touch())
+   сдвигает его до записи и ещё раз после COMMIT, поэтому версия меняется
+   в порядке коммитов. MAX(updated_at) для этого не годится: строка,
+   получившая updated_at раньше текущего максимума (долгая транзакция,
+   расхождение часов серверов), не сдвинула бы версию. Грубо — меняются все
+   списки по таблице, — но без запросов к БД и верно, когда строка выходит
+   из фильтра
+3. ETag — хэш версии, пути с параметрами, формата ответа и соли представления
+   (validator_salt: у списков по текущему пользователю — его pk);
+   Last-Modified — время версии (у коллекции — время последней записи
+   в таблицу по часам приложения; точная проверка — по ETag). Ответы
+   варьируются по Cookie и Authorization, чтобы кэш браузера не отдал ответ
+   одного пользователя другому
+4. If-None-Match / If-Modified-Since проверяются до загрузки объектов
+   и сериализации: при совпадении — 304 без тела
+Смена username владельца версию задач не меняет: owner_username в ответе
+может устареть до следующего изменения задачи.
+"""
+
+import hashlib
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .caching import bump_generation, get_generation, make_key
+
+# tag — строка для ETag, modified — datetime для Last-Modified
+Version = namedtuple('Version', 'tag modified')
+
+
+def _collection_generation(model):
+    return f"collection:{model._meta.label_lower}"
+
+
+def _changed_key(model):
+    return make_key('conditional', 'changed', model._meta.label_lower)
+
+
+def collection_changed(model, using=None):
+    """Сдвигает версию списков по таблице model."""
+    def bump():
+        bump_generation(_collection_generation(model))
+        cache.set(_changed_key(model), timezone.now(), timeout=None)
+
+    bump()
+    # Запрос между записью и COMMIT мог получить новую версию со старыми
+    # строками — после коммита сдвигаем её ещё раз
+    transaction.on_commit(bump, using=using)
+
+
+def touch(model, **filters):
+    """Сдвигает updated_at строк model одним UPDATE, без сигналов и побочных эффектов менеджера."""
+    collection_changed(model)
+    return model._base_manager.filter(**filters).update(updated_at=timezone.now())
+
+
+def collection_version(model):
+    """Версия всех списков по таблице model (без запросов к БД)."""
+    generation = get_generation(_collection_generation(model))
+    key = _changed_key(model)
+    now = timezone.now()
+    # После очистки кэша — время первого обращения
+    cache.add(key, now, timeout=None)
+    return Version(f"collection:{generation}", cache.get(key, now))
+
+
+def row_version(updated_at):
+    """Версия объекта по его updated_at."""
+    if updated_at is None:
+        return None
+    return Version(updated_at.isoformat(), updated_at)
+
+
+VARY_HEADERS = ('Cookie', 'Authorization')
+
+
+def make_etag(request, version, salt=''):
+    renderer = getattr(request, 'accepted_renderer', None)
+    raw = f"{salt}|{request.get_full_path()}|{getattr(renderer, 'format', '')}|{version.tag}"
+    return '"{}"'.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def not_modified(request, version, salt=''):
+    """Ответ 304 (или 412), если у клиента актуальная версия, иначе None."""
+    if version is None or request.method not in ('GET', 'HEAD'):
+        return None
+    etag = make_etag(request, version, salt)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(version.modified.timestamp())
+    )
+    if response is not None:
+        response['ETag'] = etag
+        patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def set_validators(request, response, version, salt=''):
+    if version is not None and response.status_code == 200:
+        response['ETag'] = make_etag(request, version, salt)
+        response['Last-Modified'] = http_date(version.modified.timestamp())
+        patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+class ValidatorSaltMixin:
+    """
+    Соль ETag представления. validators_per_user = True — для ответов,
+    зависящих от текущего пользователя (версия таблицы у всех одна).
+    """
+
+    validators_per_user = False
+
+
+    def get_validator_salt(self):
+        if self.validators_per_user:
+            return f"user:{self.request.user.pk}"
+        return ''
+
+
+class ConditionalListMixin(ValidatorSaltMixin):
+    """list() с ответом 304 без запроса строк, если таблица не менялась."""
+
+    def list(self, request, *args, **kwargs):
+        # Версия берётся до выборки: запись между ними даст лишний 200, но не устаревший 304
+        version = self.collection_version = collection_version(self.get_queryset().model)
+        salt = self.get_validator_salt()
+        response = not_modified(request, version, salt)
+        if response is not None:
+            return response
+        return set_validators(request, super().list(request, *args, **kwargs), version, salt)
+
+
+class ConditionalRetrieveMixin(ValidatorSaltMixin):
+    """
+    retrieve() с ответом 304 по updated_at объекта (один лёгкий запрос).
+    Рассчитан на представления, где чтение не ограничено правами на объект.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        version = row_version(
+            self.get_queryset().order_by().prefetch_related(None)
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list('updated_at', flat=True)
+            .first()
+        )
+        salt = self.get_validator_salt()
+        response = not_modified(request, version, salt)
+        if response is not None:
+            return response
+        return set_validators(request, super().retrieve(request, *args, **kwargs), version, salt)
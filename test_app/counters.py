@@ -0,0 +1,78 @@
+"""
+Счётчики задач по статусам (таблица TaskStatusCounter).
+
+Логика:
+1. Сигналы Task (создание, смена статуса, удаление) вызывают adjust_status_counters
+2. Массовые операции TaskQuerySet (update, bulk_create) делают то же самое
+3. rebuild_status_counters пересчитывает счётчики с нуля по таблице задач
+4. check_status_counters сравнивает счётчики с реальными данными
+"""
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Task, TaskStatusCounter
+
+
+def adjust_status_counters(deltas):
+    """Применяет изменения вида {status: delta} к счётчикам."""
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+
+        updated = (TaskStatusCounter.objects
+                   .filter(status=status)
+                   .update(count=F('count') + delta))
+        if not updated:
+            TaskStatusCounter.objects.get_or_create(status=status)
+            (TaskStatusCounter.objects
+             .filter(status=status)
+             .update(count=F('count') + delta))
+
+
+def get_status_counts():
+    """Возвращает {status: count} из таблицы счётчиков."""
+    return dict(TaskStatusCounter.objects.values_list('status', 'count'))
+
+
+def count_tasks_by_status():
+    """Реальное количество задач по статусам (полный проход по таблице)."""
+    counts = Counter({status: 0 for status, _ in Task.STATUS_CHOICES})
+    counts.update(dict(
+        Task.objects
+        .order_by()
+        .values_list('status')
+        .annotate(count=Count('id'))
+    ))
+    return dict(counts)
+
+
+@transaction.atomic
+def rebuild_status_counters():
+    """Пересчитывает счётчики с нуля. Возвращает новые значения."""
+    counts = count_tasks_by_status()
+
+    TaskStatusCounter.objects.exclude(status__in=counts).delete()
+    for status, count in counts.items():
+        TaskStatusCounter.objects.update_or_create(
+            status=status,
+            defaults={'count': count}
+        )
+    return counts
+
+
+def check_status_counters():
+    """
+    Сравнивает счётчики с реальными данными.
+    Возвращает расхождения {status: (stored, actual)}.
+    """
+    stored = get_status_counts()
+    actual = count_tasks_by_status()
+
+    return {
+        status: (stored.get(status, 0), actual.get(status, 0))
+        for status in set(stored) | set(actual)
+        if stored.get(status, 0) != actual.get(status, 0)
+    }
@@ -0,0 +1,82 @@
+"""
+Подсчёт строк для пагинации без COUNT(*) по большим таблицам.
+
+Логика:
+1. Размер таблицы: на MySQL — оценка из information_schema.TABLES,
+   на остальных БД — точный COUNT(*), закэшированный на COUNT_CACHE_TIMEOUT
+2. Маленькая таблица (до COUNT_EXACT_THRESHOLD строк) — всегда точный COUNT(*)
+3. Большая таблица без фильтров — возвращаем размер таблицы (оценку)
+4. Большая таблица с фильтрами — точный COUNT(*), закэшированный по тексту запроса
+Для больших таблиц результат приблизительный (устаревает до COUNT_CACHE_TIMEOUT).
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .caching import make_key
+
+
+def _exact_threshold():
+    return getattr(settings, 'COUNT_EXACT_THRESHOLD', 10_000)
+
+
+def _cache_timeout():
+    return getattr(settings, 'COUNT_CACHE_TIMEOUT', 60)
+
+
+def estimate_table_rows(model, using='default'):
+    """Оценка числа строк таблицы модели (дёшево на любом размере таблицы)."""
+    connection = connections[using]
+    table = model._meta.db_table
+
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+
+    cache_key = make_key('count', 'table', using, table)
+    rows = cache.get(cache_key)
+    if rows is None:
+        rows = model._base_manager.using(using).count()
+        cache.set(cache_key, rows, timeout=_cache_timeout())
+    return rows
+
+
+def count_queryset(queryset):
+    """Число строк queryset: точное для маленьких таблиц, иначе оценка."""
+    table_rows = estimate_table_rows(queryset.model, queryset.db)
+    if table_rows <= _exact_threshold():
+        return queryset.count()
+
+    if not queryset.query.where:
+        return table_rows
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+    cache_key = make_key('count', 'query', queryset.db, digest)
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout=_cache_timeout())
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator (в т.ч. для админки), считающий строки через count_queryset."""
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, 'query'):
+            return count_queryset(self.object_list)
+        return super().count
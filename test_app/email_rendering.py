@@ -0,0 +1,62 @@
+"""
+Рендеринг писем-уведомлений.
+
+Логика:
+1. HTML-шаблоны писем загружаются и компилируются один раз на процесс
+   и дальше берутся из памяти
+2. Текстовая версия — готовая строка формата (str.format_map), без
+   шаблонизатора
+3. Обе версии письма рендерятся из одного и того же контекста
+4. preload_templates() вызывается воркером при старте, чтобы первое
+   письмо не платило за поиск и разбор шаблонов
+"""
+
+from functools import lru_cache
+
+from django.template.loader import get_template
+
+STATUS_CHANGE_TEXT = """
+    Здравствуйте, {owner_name}!
+
+    Статус вашей задачи "{task_title}" был изменён.
+
+    Старый статус: {old_status}
+    Новый статус: {new_status}
+
+    {closing_line}
+
+    Ссылка на задачу: {task_url}
+    """
+
+STATUS_DIGEST_TEXT = """
+    Здравствуйте, {owner_name}!
+
+    Статусы ваших задач были изменены:
+
+{changes_text}
+
+    Список задач: {tasks_url}
+    """
+
+EMAIL_TEMPLATES = {
+    'status_change': (STATUS_CHANGE_TEXT, 'emails/task_status_change.html'),
+    'status_digest': (STATUS_DIGEST_TEXT, 'emails/task_status_digest.html'),
+}
+
+
+@lru_cache(maxsize=None)
+def get_html_template(name):
+    """Скомпилированный HTML-шаблон письма name."""
+    return get_template(EMAIL_TEMPLATES[name][1])
+
+
+def preload_templates():
+    """Загружает и компилирует все шаблоны писем заранее."""
+    for name in EMAIL_TEMPLATES:
+        get_html_template(name)
+
+
+def render_email(name, context):
+    """Рендерит (текст, HTML) письма name из одного контекста."""
+    text_format = EMAIL_TEMPLATES[name][0]
+    return text_format.format_map(context), get_html_template(name).render(context)
@@ -0,0 +1,390 @@
+"""
+Инвертированный индекс в памяти процесса (бэкенд поиска 'memory').
+
+Логика:
+1. Текст (title, description) разбивается на слова в нижнем регистре
+2. Для каждого слова хранится отсортированный список id — array('I')
+   (4 байта на вхождение вместо ~28 у int в list)
+3. Слова запроса ищутся как префиксы: диапазон слов находится бинарным
+   поиском по отсортированному словарю, списки id объединяются;
+   результаты для разных слов запроса пересекаются (И)
+4. Ранжирование: больше точных совпадений слов — выше, при равенстве — новее
+5. Индекс загружается в фоновом потоке при старте процесса (core/wsgi.py,
+   core/asgi.py): из файла-снимка SEARCH_INDEX_SNAPSHOT (python manage.py
+   build_search_index) или из БД; затем обновляется сигналами после коммита
+   транзакции. Пока индекс загружается, поиск идёт без него (SearchFilter). Снимок хранит MAX(updated_at) на
+   момент построения: при загрузке переиндексируются строки, созданные
+   или изменённые после него; удаления (число строк не сходится) —
+   полная перестройка
+Индекс у каждого процесса свой и видит только записи этого процесса и
+снимка — бэкенд рассчитан на однопроцессный запуск (SQLite по умолчанию).
+"""
+
+import bisect
+import heapq
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max, Q
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+SNAPSHOT_VERSION = 2
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре."""
+    return TOKEN_RE.findall(text.casefold()) if text else []
+
+
+class InvertedIndex:
+    """Инвертированный индекс одной модели: слово -> отсортированные id."""
+
+    def __init__(self):
+        self.postings = {}
+        self.terms = []      # отсортированный словарь для поиска по префиксу
+        self.doc_terms = {}  # id -> слова документа (для обновления и удаления)
+        self.max_id = 0
+        self.changed_at = None  # MAX(updated_at) строк модели на момент построения
+
+
+    def add(self, doc_id, text):
+        self.remove(doc_id)
+        for term in self._link(doc_id, text):
+            bisect.insort(self.terms, term)
+
+
+    def add_many(self, docs):
+        """
+        Добавляет пачку документов (doc_id, text) при построении индекса:
+        словарь сортируется один раз в конце, а не вставкой каждого слова.
+        """
+        for doc_id, text in docs:
+            self._unlink(doc_id)
+            self._link(doc_id, text)
+        self.terms = sorted(self.postings)
+
+
+    def remove(self, doc_id):
+        for term in self._unlink(doc_id):
+            del self.terms[bisect.bisect_left(self.terms, term)]
+
+
+    def _link(self, doc_id, text):
+        """Добавляет документ в списки id; возвращает слова, новые для словаря."""
+        new_terms = []
+        terms = tuple(sorted(set(tokenize(text))))
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = array('I')
+                new_terms.append(term)
+            if not posting or posting[-1] < doc_id:
+                posting.append(doc_id)  # новые id обычно больше всех прежних
+            else:
+                bisect.insort(posting, doc_id)
+        self.doc_terms[doc_id] = terms
+        self.max_id = max(self.max_id, doc_id)
+        return new_terms
+
+
+    def _unlink(self, doc_id):
+        """Убирает документ из списков id; возвращает слова, выпавшие из словаря."""
+        dropped = []
+        for term in self.doc_terms.pop(doc_id, ()):
+            posting = self.postings[term]
+            position = bisect.bisect_left(posting, doc_id)
+            if position < len(posting) and posting[position] == doc_id:
+                del posting[position]
+            if not posting:
+                del self.postings[term]
+                dropped.append(term)
+        return dropped
+
+
+    def prefix_matches(self, prefix):
+        """Множество id документов со словами, начинающимися на prefix."""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '\U0010ffff', start)
+        if end - start == 1:
+            return set(self.postings[self.terms[start]])
+        matches = set()
+        for term in self.terms[start:end]:
+            matches.update(self.postings[term])
+        return matches
+
+
+    def search(self, words, limit):
+        """id лучших совпадений со всеми словами (как префиксами)."""
+        if not words:
+            return []
+
+        candidates = None
+        for word in sorted(set(words), key=len, reverse=True):
+            matches = self.prefix_matches(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        # Счёт документа — число слов запроса, совпавших целиком (не префиксом)
+        hits = Counter()
+        for word in set(words):
+            posting = self.postings.get(word)
+            if posting:
+                hits.update(candidates.intersection(posting))
+
+        buckets = {}
+        for doc_id in candidates:
+            buckets.setdefault(hits[doc_id], []).append(doc_id)
+
+        ranked = []
+        for score in sorted(buckets, reverse=True):
+            ranked.extend(heapq.nlargest(limit - len(ranked), buckets[score]))
+            if len(ranked) >= limit:
+                break
+        return ranked
+
+
+    def rebuild_doc_terms(self):
+        """Восстанавливает doc_terms по спискам id (после загрузки снимка)."""
+        doc_terms = {}
+        for term in self.terms:
+            for doc_id in self.postings[term]:
+                doc_terms.setdefault(doc_id, []).append(term)
+        self.doc_terms = {doc_id: tuple(terms) for doc_id, terms in doc_terms.items()}
+
+
+class InvertedIndexRegistry:
+    """
+    Индексы всех поисковых моделей процесса. Загружаются в фоновом потоке
+    при старте (start_loading) или синхронно (load); пока индексов нет,
+    search() возвращает None — запрос обслуживает стандартный поиск.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._indexes = None
+        self._pending = None  # изменения, закоммиченные во время загрузки
+        self._loader = None
+
+
+    def reset(self):
+        with self._lock:
+            self._indexes = None
+
+
+    def get(self, model):
+        """Индекс модели или None, пока индексы не загружены."""
+        with self._lock:
+            if self._indexes is None:
+                return None
+            return self._indexes[model._meta.label_lower]
+
+
+    def load(self):
+        """
+        Загружает индексы из снимка или БД, не держа блокировку поиска:
+        готовые индексы подменяются целиком, затем к ним применяются
+        изменения, закоммиченные за время загрузки.
+        """
+        with self._load_lock:
+            with self._lock:
+                if self._indexes is not None:
+                    return self._indexes
+                self._pending = []
+            try:
+                indexes = self._load()
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                for model, docs, remove in self._pending:
+                    self._apply_docs(indexes[model._meta.label_lower], docs, remove)
+                self._pending = None
+                self._indexes = indexes
+            return indexes
+
+
+    def start_loading(self):
+        """Запускает load() в фоновом потоке, если индексы не загружены и не загружаются."""
+        with self._lock:
+            if self._indexes is not None or (self._loader is not None and self._loader.is_alive()):
+                return
+            self._loader = threading.Thread(
+                target=self._load_in_background, name='search-index-loader', daemon=True
+            )
+            self._loader.start()
+
+
+    def _load_in_background(self):
+        start = time.perf_counter()
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Cannot load search index")
+        else:
+            logger.info("Search index loaded in %.1f s", time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+
+    def search(self, model, terms, limit):
+        """id лучших совпадений или None, пока индексы загружаются."""
+        words = [word for term in terms for word in tokenize(term)]
+        with self._lock:
+            if self._indexes is None:
+                # Процесс мог не загрузить индекс при старте (fork после старта потока, reset())
+                self.start_loading()
+                return None
+            return self._indexes[model._meta.label_lower].search(words, limit)
+
+
+    def index(self, model, objs):
+        docs = [(obj.pk, self._text(model, obj)) for obj in objs if obj.pk is not None]
+        if docs:
+            transaction.on_commit(lambda: self._apply(model, docs, remove=False), using=model.objects.db)
+
+
+    def remove(self, model, ids):
+        docs = [(pk, None) for pk in ids if pk is not None]
+        if docs:
+            transaction.on_commit(lambda: self._apply(model, docs, remove=True), using=model.objects.db)
+
+
+    def _apply(self, model, docs, remove):
+        with self._lock:
+            if self._indexes is None:
+                # Загрузка идёт — применим после неё; не начата — строки прочтутся из БД
+                if self._pending is not None:
+                    self._pending.append((model, docs, remove))
+                return
+            self._apply_docs(self._indexes[model._meta.label_lower], docs, remove)
+
+
+    @staticmethod
+    def _apply_docs(index, docs, remove):
+        for doc_id, text in docs:
+            if remove:
+                index.remove(doc_id)
+            else:
+                index.add(doc_id, text)
+
+
+    @staticmethod
+    def _text(model, obj):
+        from .search import get_search_fields
+        return ' '.join(getattr(obj, field) or '' for field in get_search_fields(model))
+
+
+    @staticmethod
+    def _models():
+        from .models import SubTask, Task
+        return (Task, SubTask)
+
+
+    def build(self, model):
+        """Строит индекс модели по БД."""
+        from .search import get_search_fields
+
+        index = InvertedIndex()
+        # До чтения строк: изменения во время построения попадут в догрузку снимка
+        index.changed_at = model._base_manager.aggregate(latest=Max('updated_at'))['latest']
+        rows = (model._base_manager.order_by('pk')
+                .values_list('pk', *get_search_fields(model))
+                .iterator(chunk_size=5000))
+        index.add_many((pk, ' '.join(text or '' for text in texts)) for pk, *texts in rows)
+        return index
+
+
+    def _load(self):
+        indexes = self._read_snapshot() or {}
+        for model in self._models():
+            label = model._meta.label_lower
+            index = indexes.get(label)
+            if index is None or not self._catch_up(model, index):
+                index = self.build(model)
+            indexes[label] = index
+        return indexes
+
+
+    def _catch_up(self, model, index):
+        """
+        Дополняет индекс из снимка строками, созданными или изменёнными после снимка.
+        False — снимок не сходится с БД (были удаления), нужна перестройка.
+        """
+        from .search import get_search_fields
+
+        changed = Q(pk__gt=index.max_id)
+        if index.changed_at is not None:
+            changed |= Q(updated_at__gte=index.changed_at)
+        rows = (model._base_manager.filter(changed)
+                .values_list('pk', *get_search_fields(model)))
+        index.add_many((pk, ' '.join(text or '' for text in texts)) for pk, *texts in rows)
+
+        return model._base_manager.count() == len(index.doc_terms)
+
+
+    def _read_snapshot(self):
+        path = getattr(settings, 'SEARCH_INDEX_SNAPSHOT', None)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as snapshot:
+                data = pickle.load(snapshot)
+        except (OSError, pickle.UnpicklingError, EOFError) as exc:
+            logger.warning("Cannot read search index snapshot %s: %s", path, exc)
+            return None
+        if data.get('version') != SNAPSHOT_VERSION:
+            return None
+
+        indexes = {}
+        for label, (postings, max_id, changed_at, empty_ids) in data['indexes'].items():
+            index = InvertedIndex()
+            index.postings = postings
+            index.terms = sorted(postings)
+            index.max_id = max_id
+            index.changed_at = changed_at
+            index.rebuild_doc_terms()
+            index.doc_terms.update(dict.fromkeys(empty_ids, ()))
+            indexes[label] = index
+        return indexes
+
+
+    def write_snapshot(self, path):
+        """Строит индексы по БД и сохраняет снимок в файл path."""
+        indexes = {model._meta.label_lower: self.build(model) for model in self._models()}
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'indexes': {
+                label: (
+                    index.postings,
+                    index.max_id,
+                    index.changed_at,
+                    # Документы без слов в списках id не видны
+                    array('I', (doc_id for doc_id, terms in index.doc_terms.items() if not terms)),
+                )
+                for label, index in indexes.items()
+            },
+        }
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as snapshot:
+            pickle.dump(data, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+        with self._lock:
+            self._indexes = indexes
+        return indexes
+
+
+inverted_indexes = InvertedIndexRegistry()
@@ -2,11 +2,16 @@ import time
 from datetime import datetime, timezone
 from typing import Callable, Optional
 from django.conf import settings
+from django.core.cache import cache
 
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from test_app.caching import make_key
+from test_app.tokens import RefreshToken
 
 
 class JWTAuthMiddleware:
@@ -15,10 +20,20 @@ class JWTAuthMiddleware:
     - Добавляет Authorization: Bearer <access> из cookie.
     - При отсутствии/скором истечении access — пытается выпустить новый по refresh.
     - Ставит новый access в cookie на ответе, если он выпускался.
+    - Проверяет access не больше одного раза за запрос и кладёт результат
+      в request.jwt_access_token — CookieJWTAuthentication его переиспользует.
+    - Выпуск access по refresh — single-flight: параллельные запросы с одним
+      refresh (одним jti) получают один и тот же новый access через кэш
+      (с проверкой подписи — кэш не доверенный).
     """
 
     # За сколько секунд до истечения access выпускать новый (защитный буфер)
     refresh_window_seconds = 60
+    # Сколько секунд выпущенный access переиспользуется для того же refresh
+    refresh_reuse_seconds = 30
+    # Сколько ждать access, который выпускает параллельный запрос
+    refresh_wait_seconds = 1.0
+    refresh_poll_interval = 0.05
 
     def __init__(self, get_response: Callable):
         self.get_response = get_response
@@ -35,31 +50,30 @@ class JWTAuthMiddleware:
         if access_cookie:
             request.META["HTTP_AUTHORIZATION"] = f"Bearer {access_cookie}"
 
+            # Единственная проверка подписи access за весь запрос
+            access_token = self._validate_access(access_cookie)
+            if access_token is not None:
+                request.jwt_access_token = (access_cookie, access_token)
+
             # 2) Если access скоро истечет — попробуем заранее обновить
-            if self._is_access_expiring(access_cookie) and refresh_cookie:
-                new_access = self.refresh_access_token(refresh_cookie)
-                if new_access:
+            if self._is_access_expiring(access_token) and refresh_cookie:
+                minted = self.refresh_access_token(refresh_cookie)
+                if minted:
                     # Подменим Authorization «на лету», чтобы текущий запрос прошёл уже с новым access
-                    request.META["HTTP_AUTHORIZATION"] = f"Bearer {new_access}"
-                    minted_access = new_access
-                    # Рассчитываем expires для cookie из нового access
-                    try:
-                        exp_ts = AccessToken(new_access).get("exp")
-                        access_expiry_dt = datetime.fromtimestamp(exp_ts, timezone.utc)
-                    except Exception:
-                        access_expiry_dt = None
+                    minted_access, new_access = minted
+                    request.META["HTTP_AUTHORIZATION"] = f"Bearer {minted_access}"
+                    request.jwt_access_token = minted
+                    # expires для cookie берём из уже имеющегося payload, без повторного декодирования
+                    access_expiry_dt = datetime.fromtimestamp(new_access["exp"], timezone.utc)
 
         # 3) Если access отсутствует, но есть refresh — попробуем выпустить новый access
         elif refresh_cookie:
-            new_access = self.refresh_access_token(refresh_cookie)
-            if new_access:
-                request.META["HTTP_AUTHORIZATION"] = f"Bearer {new_access}"
-                minted_access = new_access
-                try:
-                    exp_ts = AccessToken(new_access).get("exp")
-                    access_expiry_dt = datetime.fromtimestamp(exp_ts, timezone.utc)
-                except Exception:
-                    access_expiry_dt = None
+            minted = self.refresh_access_token(refresh_cookie)
+            if minted:
+                minted_access, new_access = minted
+                request.META["HTTP_AUTHORIZATION"] = f"Bearer {minted_access}"
+                request.jwt_access_token = minted
+                access_expiry_dt = datetime.fromtimestamp(new_access["exp"], timezone.utc)
 
         # Передаём управление дальше по цепочке
         response = self.get_response(request)
@@ -80,29 +94,90 @@ class JWTAuthMiddleware:
 
         return response
 
-    def refresh_access_token(self, refresh_token: Optional[str]) -> Optional[str]:
+    def refresh_access_token(self, refresh_token: Optional[str]) -> Optional[tuple[str, AccessToken]]:
         """
         Пытаемся выпустить новый access из refresh.
-        Возвращаем строку access или None при неуспехе.
+        Возвращаем (строка access, объект access) или None при неуспехе.
+
+        Single-flight по jti refresh-токена: первый запрос берёт блокировку
+        в кэше и выпускает access, остальные в течение refresh_reuse_seconds
+        получают тот же access из кэша.
         """
         if not refresh_token:
             return None
         try:
             refresh = RefreshToken(refresh_token)
-            return str(refresh.access_token)
         except TokenError:
             return None
 
-    def _is_access_expiring(self, access_token_str: str) -> bool:
+        jti = refresh[api_settings.JTI_CLAIM]
+        result_key = make_key('jwt_refresh', 'access', jti)
+        lock_key = make_key('jwt_refresh', 'lock', jti)
+
+        reused = self._get_reused_access(result_key, refresh)
+        if reused:
+            return reused
+
+        if cache.add(lock_key, True, timeout=self.refresh_reuse_seconds):
+            try:
+                return self._mint_access(refresh, result_key)
+            finally:
+                cache.delete(lock_key)
+
+        # Access уже выпускает параллельный запрос — немного подождём его
+        deadline = time.monotonic() + self.refresh_wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(self.refresh_poll_interval)
+            reused = self._get_reused_access(result_key, refresh)
+            if reused:
+                return reused
+
+        return self._mint_access(refresh, result_key)
+
+    def _mint_access(self, refresh: RefreshToken, result_key: str) -> tuple[str, AccessToken]:
+        access = refresh.access_token
+        raw_access = str(access)
+        cache.set(result_key, raw_access, timeout=self.refresh_reuse_seconds)
+        return raw_access, access
+
+    def _get_reused_access(self, result_key: str, refresh: RefreshToken) -> Optional[tuple[str, AccessToken]]:
+        """
+        Access, недавно выпущенный для этого refresh другим запросом.
+        Кэш не считается доверенным (memcached без авторизации, каталог
+        filecache): подпись проверяется, а пользователь должен совпадать
+        с пользователем refresh — иначе подложенный токен игнорируется.
+        """
+        raw_access = cache.get(result_key)
+        if raw_access is None:
+            return None
+        access = self._validate_access(raw_access)
+        user_claim = api_settings.USER_ID_CLAIM
+        if access is None or access.get(user_claim) != refresh.get(user_claim):
+            return None
+        return raw_access, access
+
+    def _validate_access(self, access_token_str: str) -> Optional[AccessToken]:
+        """
+        Декодирует и проверяет access (подпись, срок, тип).
+        Возвращает токен или None, если он недействителен.
+        """
+        try:
+            return AccessToken(access_token_str)
+        except TokenError:
+            return None
+
+    def _is_access_expiring(self, token: Optional[AccessToken]) -> bool:
         """
         Проверяем, истекает ли access в ближайшее время (заданное refresh_window_seconds).
-        Считываем 'exp' из тела токена.
+        Считываем 'exp' из уже проверенного payload.
         """
+        if token is None:
+            # Недействительный токен — считаем, что истекает
+            return True
         try:
-            token = AccessToken(access_token_str)
             exp_ts = int(token.get("exp"))
             now_ts = int(time.time())
             return exp_ts <= now_ts + self.refresh_window_seconds
-        except Exception:
+        except (TypeError, ValueError):
             # Если не удалось прочитать exp — считаем, что истекает/недействителен
-            return True
\ No newline at end of file
+            return True
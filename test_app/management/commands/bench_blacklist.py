@@ -0,0 +1,88 @@
+"""
+Бенчмарк проверки чёрного списка refresh-токенов.
+
+Сравнивает стандартную проверку simplejwt (запрос в БД на каждый
+refresh) с проверкой через Bloom-фильтр (test_app/tokens.py).
+
+Пример (10 млн выданных токенов, 1% в чёрном списке):
+    python manage.py bench_blacklist --seed 10000000 --blacklisted-share 0.01
+"""
+
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as SimpleRefreshToken
+
+from test_app.tokens import RefreshToken, blacklist_filter
+
+
+class Command(BaseCommand):
+    help = "Замеряет задержку проверки чёрного списка refresh-токенов"
+
+    batch_size = 10_000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Сколько выданных токенов создать перед замером")
+        parser.add_argument('--blacklisted-share', type=float, default=0.01,
+                            help="Доля созданных токенов в чёрном списке")
+        parser.add_argument('--checks', type=int, default=2000)
+
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'], options['blacklisted_share'])
+
+        self.stdout.write(
+            f"Выдано токенов: {OutstandingToken.objects.count()}, "
+            f"в чёрном списке: {BlacklistedToken.objects.count()}"
+        )
+
+        jtis = [uuid.uuid4().hex for _ in range(options['checks'])]
+        blacklist_filter.sync()
+
+        for label, token_class in (
+            ('simplejwt (БД)', SimpleRefreshToken),
+            ('Bloom-фильтр', RefreshToken),
+        ):
+            token = token_class.__new__(token_class)
+            timings = []
+            for jti in jtis:
+                token.payload = {'jti': jti}
+                start = time.perf_counter()
+                token.check_blacklist()
+                timings.append((time.perf_counter() - start) * 1_000_000)
+
+            timings.sort()
+            self.stdout.write(
+                f"{label:<16} p50 {statistics.median(timings):>9.1f} мкс, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:>9.1f} мкс"
+            )
+
+
+    def seed(self, count, blacklisted_share):
+        expires_at = timezone.now() + timedelta(days=1)
+        blacklist_every = max(int(1 / blacklisted_share), 1) if blacklisted_share else 0
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            with transaction.atomic():
+                tokens = OutstandingToken.objects.bulk_create([
+                    OutstandingToken(jti=uuid.uuid4().hex, token='', expires_at=expires_at)
+                    for _ in range(size)
+                ])
+                if blacklist_every:
+                    if tokens[0].pk is None:
+                        jtis = [token.jti for token in tokens]
+                        tokens = list(OutstandingToken.objects.filter(jti__in=jtis))
+                    BlacklistedToken.objects.bulk_create([
+                        BlacklistedToken(token=token)
+                        for token in tokens[::blacklist_every]
+                    ])
+            self.stdout.write(f"Создано {start + size} из {count}")
@@ -0,0 +1,69 @@
+"""
+Микробенчмарк рендеринга писем-уведомлений.
+
+Сравнивает прежний путь (render_to_string на каждое письмо + f-строка
+для текстовой версии) с предзагруженными шаблонами email_rendering.
+
+Пример:
+    python manage.py bench_email_rendering --iterations 20000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from test_app.email_rendering import preload_templates, render_email
+
+
+class Command(BaseCommand):
+    help = "Замеряет скорость рендеринга писем о смене статуса"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10_000)
+
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        context = {
+            'task_title': "Prepare presentation",
+            'old_status': 'in_progress',
+            'new_status': 'done',
+            'owner_name': 'svitlana',
+            'task_url': "http://localhost:8000/api/v1/tasks/1/",
+            'is_closing': True,
+            'closing_line': "Задача закрыта!",
+        }
+
+        def render_to_string_path():
+            message = f"""
+    Здравствуйте, {context['owner_name']}!
+
+    Статус вашей задачи "{context['task_title']}" был изменён.
+
+    Старый статус: {context['old_status']}
+    Новый статус: {context['new_status']}
+
+    {"Задача закрыта!" if context['is_closing'] else "Продолжайте работу!"}
+
+    Ссылка на задачу: {context['task_url']}
+    """
+            return message, render_to_string('emails/task_status_change.html', context)
+
+        def precompiled_path():
+            return render_email('status_change', context)
+
+        preload_templates()
+        for label, render in (
+            ('render_to_string', render_to_string_path),
+            ('precompiled', precompiled_path),
+        ):
+            render()  # прогрев
+            start = time.perf_counter()
+            for _ in range(iterations):
+                render()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label:<18} {iterations / elapsed:>12.0f} писем/сек "
+                f"({elapsed * 1_000_000 / iterations:.1f} мкс на письмо)"
+            )
@@ -0,0 +1,182 @@
+"""
+Бенчмарк индексов Task/SubTask/Category.
+
+Показывает планы (EXPLAIN) и время горячих запросов списков и статистики
+с индексами из миграции 0005 и без них (индексы временно удаляются и
+затем восстанавливаются). Работает только с отдельной БД (--database,
+не default): удаление индексов на рабочей БД замедлило бы все запросы,
+а сбой между удалением и восстановлением оставил бы её без индексов.
+Тестовые данные создаются без побочных эффектов менеджеров (счётчики,
+поисковый индекс, кэши относятся к основной БД).
+
+Пример:
+    BENCH_DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py migrate --database bench
+    BENCH_DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py bench_indexes --database bench --seed 1000000
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from test_app.models import Category, Task, SubTask
+
+
+class Command(BaseCommand):
+    help = "Сравнивает планы и время горячих запросов с индексами и без них"
+
+    batch_size = 10_000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            help="Псевдоним отдельной БД для бенчмарка из DATABASES (не default)",
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help="Сколько задач (и столько же подзадач) создать перед замером",
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help="Сколько раз выполнить каждый запрос при замере времени",
+        )
+
+
+    def handle(self, *args, **options):
+        self.database = self.check_database(options['database'])
+        if options['seed']:
+            self.seed(options['seed'])
+
+        queries = self.hot_queries()
+        if not queries:
+            self.stdout.write(self.style.WARNING("Нет данных: запустите с --seed N"))
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING("=== С индексами ==="))
+        with_indexes = self.report(queries, options['repeat'])
+
+        indexes = [
+            (model, index)
+            for model in (Category, Task, SubTask)
+            for index in model._meta.indexes
+        ]
+        connection = connections[self.database]
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+
+        try:
+            self.stdout.write(self.style.MIGRATE_HEADING("=== Без индексов ==="))
+            without_indexes = self.report(queries, options['repeat'])
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("=== Итог (мс на запрос) ==="))
+        for label in with_indexes:
+            self.stdout.write(
+                f"{label:<28} {without_indexes[label]:>10.3f} -> {with_indexes[label]:>10.3f}"
+            )
+
+
+    @staticmethod
+    def check_database(alias):
+        """Псевдоним БД для бенчмарка; рабочую БД команда не трогает."""
+        if not alias:
+            raise CommandError(
+                "Команда удаляет индексы на время замера: укажите --database "
+                "с отдельной БД (например, bench из BENCH_DATABASE_URL)"
+            )
+        if alias not in connections.databases:
+            raise CommandError(f"БД {alias!r} не описана в DATABASES")
+
+        settings_dict = connections[alias].settings_dict
+        default = connections[DEFAULT_DB_ALIAS].settings_dict
+        same = all(settings_dict.get(key) == default.get(key) for key in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+        if alias == DEFAULT_DB_ALIAS or same:
+            raise CommandError(f"БД {alias!r} — рабочая БД (default), нужна отдельная")
+        return alias
+
+
+    def hot_queries(self):
+        """Запросы, которые выполняют представления списков и статистики."""
+        tasks = Task.objects.using(self.database)
+        task = tasks.filter(owner__isnull=False).first()
+        if task is None:
+            return {}
+
+        subtasks = SubTask.objects.using(self.database)
+        categories = Category.objects.using(self.database)
+        now = timezone.now()
+        return {
+            'task_list': lambda: tasks.order_by('-created_at')[:6],
+            'my_tasks': lambda: tasks.filter(owner_id=task.owner_id).order_by('-created_at')[:6],
+            'tasks_by_status': lambda: tasks.filter(status='blocked').order_by('deadline')[:6],
+            'overdue_tasks': lambda: tasks.filter(deadline__lt=now).exclude(status='done').order_by().values('id'),
+            'task_subtasks': lambda: subtasks.filter(task_id=task.id).order_by('-created_at')[:5],
+            'active_categories': lambda: categories.order_by('name')[:6],
+        }
+
+
+    def report(self, queries, repeat):
+        timings = {}
+        for label, make_queryset in queries.items():
+            self.stdout.write(self.style.SUCCESS(label))
+            self.stdout.write(make_queryset().explain())
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(make_queryset())
+            timings[label] = (time.perf_counter() - start) * 1000 / repeat
+        return timings
+
+
+    def seed(self, count):
+        """Создаёт count задач и count подзадач пачками по batch_size."""
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        users = [
+            User.objects.db_manager(self.database).get_or_create(username=f"bench_user_{i}")[0]
+            for i in range(100)
+        ]
+        # Базовые менеджеры: без счётчиков, поискового индекса и кэшей основной БД
+        tasks = Task._base_manager.db_manager(self.database)
+        subtasks = SubTask._base_manager.db_manager(self.database)
+        now = timezone.now()
+        offset = tasks.count()
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            with transaction.atomic(using=self.database):
+                created = tasks.bulk_create([
+                    Task(
+                        title=f"bench-task-{offset + start + i}",
+                        owner=random.choice(users),
+                        status=random.choice(statuses),
+                        deadline=now + timedelta(days=random.randint(-365, 365)),
+                    )
+                    for i in range(size)
+                ])
+                if created[0].pk is None:
+                    titles = [task.title for task in created]
+                    created = list(tasks.filter(title__in=titles).only('id', 'owner_id'))
+
+                subtasks.bulk_create([
+                    SubTask(
+                        title=f"bench-subtask-{offset + start + i}",
+                        task=task,
+                        owner_id=task.owner_id,
+                        status=random.choice(statuses),
+                        deadline=now + timedelta(days=random.randint(-365, 365)),
+                    )
+                    for i, task in enumerate(created)
+                ])
+            self.stdout.write(f"Создано {start + size} из {count}")
@@ -0,0 +1,101 @@
+"""
+Бенчмарк аутентификации по JWT из cookies.
+
+Прогоняет запрос с access-cookie через JWTAuthMiddleware и DRF-аутентификацию
+и сравнивает прежнюю схему (middleware и JWTAuthentication декодируют токен
+каждый сам) с текущей (CookieJWTAuthentication переиспользует токен,
+проверенный middleware).
+
+Пример:
+    python manage.py bench_jwt --username admin --iterations 5000
+"""
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from test_app.authentication import CookieJWTAuthentication
+from test_app.jwt_middleware import JWTAuthMiddleware
+
+
+class LegacyJWTAuthMiddleware(JWTAuthMiddleware):
+    """Прежнее поведение: токен только проверяется, результат не передаётся в DRF."""
+
+    def __call__(self, request):
+        access_cookie = request.COOKIES.get("access_token")
+        request.META["HTTP_AUTHORIZATION"] = f"Bearer {access_cookie}"
+        self._is_access_expiring(self._validate_access(access_cookie))
+        return self.get_response(request)
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость JWT-аутентификации по cookie (запросов/сек)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help="Пользователь, для которого выпускается токен")
+        parser.add_argument('--iterations', type=int, default=5000)
+
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError("Нет подходящего активного пользователя")
+
+        access = str(RefreshToken.for_user(user).access_token)
+        factory = RequestFactory()
+        iterations = options['iterations']
+
+        for label, middleware_class, authentication_class in (
+            ('decode x2 (прежняя схема)', LegacyJWTAuthMiddleware, JWTAuthentication),
+            ('decode x1', JWTAuthMiddleware, CookieJWTAuthentication),
+        ):
+            def view(request, authentication_class=authentication_class):
+                drf_request = Request(request, authenticators=[authentication_class()])
+                assert drf_request.user.pk == user.pk
+                return None
+
+            middleware = middleware_class(view)
+            decodes = self.count_decodes(lambda: middleware(self.make_request(factory, access)))
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                middleware(self.make_request(factory, access))
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{label:<28} {iterations / elapsed:>10.0f} запросов/сек, "
+                f"декодирований токена на запрос: {decodes}"
+            )
+
+
+    def make_request(self, factory, access):
+        request = factory.get('/api/v1/tasks/my_tasks/')
+        request.COOKIES['access_token'] = access
+        return request
+
+
+    def count_decodes(self, run):
+        """Сколько раз за запрос декодируется (и проверяется) access-токен."""
+        backend = token_backend
+        original_decode = backend.decode
+        calls = []
+
+        def counting_decode(*args, **kwargs):
+            calls.append(1)
+            return original_decode(*args, **kwargs)
+
+        backend.decode = counting_decode
+        try:
+            run()
+        finally:
+            backend.decode = original_decode
+        return len(calls)
@@ -0,0 +1,110 @@
+"""
+Бенчмарк поиска ?search=: LIKE '%term%' (SearchFilter) против
+полнотекстового индекса БД и инвертированного индекса в памяти
+(FullTextSearchFilter, test_app/search.py).
+
+Замеряется первая страница выдачи (20 строк) для частых слов (LIKE
+находит 20 строк почти сразу, FTS ранжирует все совпадения), редкого
+слова и отсутствующего (LIKE просматривает всю таблицу).
+Пример:
+    python manage.py bench_search --seed 1000000
+"""
+
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from test_app.models import Task
+from test_app.inverted_index import inverted_indexes
+from test_app.search import DatabaseSearchBackend, MemorySearchBackend, SEARCH_RANK
+
+WORDS = [
+    'report', 'meeting', 'invoice', 'release', 'deploy', 'review', 'budget',
+    'backup', 'migration', 'design', 'client', 'contract', 'sprint', 'bug',
+]
+
+
+class Command(BaseCommand):
+    help = "Сравнивает время поиска LIKE и по полнотекстовому индексу"
+
+    batch_size = 10_000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Сколько задач создать перед замером")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--terms', nargs='*', default=['report', 'deploy budget', 'migr', '1999', 'zebra'])
+
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        self.stdout.write(f"Задач: {Task.objects.count()}")
+        backend = DatabaseSearchBackend()
+        memory = MemorySearchBackend()
+
+        start = time.perf_counter()
+        inverted_indexes.load()
+        self.stdout.write(f"Индекс в памяти построен за {time.perf_counter() - start:.1f} с")
+
+        for term in options['terms']:
+            words = term.split()
+            like = Task.objects.all()
+            for word in words:
+                like = like.filter(Q(title__icontains=word) | Q(description__icontains=word))
+            like = like.order_by('-created_at', '-id')
+
+            if backend.search(Task, words, 1) is None:
+                self.stdout.write(self.style.WARNING("Полнотекстовый индекс для этой БД не поддерживается"))
+                return
+
+            def run_like():
+                return list(like.values_list('id', flat=True)[:20])
+
+            def run_fulltext():
+                # Запрос к индексу выполняется в filter() — он входит в замер
+                fulltext = backend.filter(Task.objects.all(), words)
+                return list(fulltext.order_by(SEARCH_RANK, 'id').values_list('id', flat=True)[:20])
+
+            def run_memory():
+                ranked = memory.filter(Task.objects.all(), words)
+                return list(ranked.order_by(SEARCH_RANK, 'id').values_list('id', flat=True)[:20])
+
+            def run_memory_lookup():
+                return inverted_indexes.search(Task, words, 1000)
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"search={term!r}"))
+            for label, run in (
+                ('LIKE', run_like),
+                ('полнотекстовый', run_fulltext),
+                ('в памяти', run_memory),
+                ('  из них поиск', run_memory_lookup),
+            ):
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    run()
+                    timings.append((time.perf_counter() - start) * 1000)
+                self.stdout.write(f"  {label:<16} {min(timings):>9.2f} мс")
+
+
+    def seed(self, count):
+        owner, _ = User.objects.get_or_create(username='bench_search')
+        offset = Task.objects.count()
+        rng = random.Random(42)
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            Task.objects.bulk_create([
+                Task(
+                    title=f"Bench task {offset + start + i}",
+                    description=' '.join(rng.choices(WORDS, k=12)),
+                    owner=owner,
+                )
+                for i in range(size)
+            ])
+            self.stdout.write(f"Создано {start + size} из {count}")
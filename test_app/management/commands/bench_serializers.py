@@ -0,0 +1,112 @@
+"""
+Бенчмарк чтения страницы списка: ModelSerializer против кэша фрагментов
+(serializers/fragments.py) и быстрых сериализаторов по values()
+(serializers/fast.py).
+
+Замеряется страница из --page-size строк: выборка из БД и сериализация
+(без рендеринга JSON — он одинаков для всех вариантов).
+Пример:
+    python manage.py bench_serializers --seed 1000 --page-size 100
+"""
+
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from test_app.models import Category, SubTask, Task
+from test_app.serializers import SubTaskSerializer, TaskListSerializer
+from test_app.serializers.fast import FastSubTaskSerializer, FastTaskListSerializer
+
+
+class Command(BaseCommand):
+    help = "Сравнивает скорость сериализаторов списков задач и подзадач"
+
+    batch_size = 5_000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Сколько задач (и столько же подзадач) создать перед замером")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        size = options['page_size']
+        self.stdout.write(f"Задач: {Task.objects.count()}, подзадач: {SubTask.objects.count()}, страница: {size}")
+
+        tasks = Task.objects.for_list().order_by('-created_at', '-id')
+        subtasks = SubTask.objects.for_list().order_by('-created_at', '-id')
+        fast_tasks = FastTaskListSerializer()
+        fast_subtasks = FastSubTaskSerializer()
+
+        def model_tasks():
+            return TaskListSerializer(list(tasks[:size]), many=True).data
+
+        def fragment_tasks():
+            # Кэш прогрет первым прогоном — замеряются попадания
+            return TaskListSerializer(list(tasks[:size]), many=True).data
+
+        def values_tasks():
+            return fast_tasks.serialize(fast_tasks.get_rows(tasks)[:size])
+
+        def model_subtasks():
+            return SubTaskSerializer(list(subtasks[:size]), many=True).data
+
+        def values_subtasks():
+            return fast_subtasks.serialize(fast_subtasks.get_rows(subtasks)[:size])
+
+        cache.clear()
+        self.stdout.write(self.style.MIGRATE_HEADING("Задачи"))
+        self.report('ModelSerializer', model_tasks, size, options['repeat'], clear_cache=True)
+        self.report('кэш фрагментов', fragment_tasks, size, options['repeat'])
+        self.report('values()', values_tasks, size, options['repeat'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Подзадачи"))
+        self.report('ModelSerializer', model_subtasks, size, options['repeat'])
+        self.report('values()', values_subtasks, size, options['repeat'])
+
+
+    def report(self, label, run, size, repeat, clear_cache=False):
+        run()  # прогрев
+        timings = []
+        for _ in range(repeat):
+            if clear_cache:
+                cache.clear()
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        self.stdout.write(f"  {label:<16} {best * 1000:>8.2f} мс  {size / best:>10.0f} строк/с")
+
+
+    def seed(self, count):
+        owner, _ = User.objects.get_or_create(username='bench_serializers')
+        categories = [Category.objects.get_or_create(name=f"Bench category {i}")[0] for i in range(5)]
+        offset = Task.objects.count()
+        rng = random.Random(42)
+        through = Task.categories.through
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            tasks = Task.objects.bulk_create([
+                Task(title=f"Bench serializer task {offset + start + i}",
+                     description="Lorem ipsum " * 5, owner=owner)
+                for i in range(size)
+            ])
+            through.objects.bulk_create([
+                through(task_id=task.pk, category_id=category.pk)
+                for task in tasks
+                for category in rng.sample(categories, 2)
+            ])
+            SubTask.objects.bulk_create([
+                SubTask(title=f"Bench serializer subtask {offset + start + i}",
+                        task=task, owner=owner)
+                for i, task in enumerate(tasks)
+            ])
+            self.stdout.write(f"Создано {start + size} из {count}")
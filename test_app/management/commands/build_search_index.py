@@ -0,0 +1,39 @@
+"""
+Строит инвертированный индекс поиска (SEARCH_BACKEND = 'memory') по БД
+и сохраняет снимок, с которого процессы загружаются без полного чтения таблиц.
+
+Пример:
+    python manage.py build_search_index
+    python manage.py build_search_index --path /var/lib/app/search_index.snapshot
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from test_app.inverted_index import inverted_indexes
+
+
+class Command(BaseCommand):
+    help = "Строит снимок инвертированного индекса поиска"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None,
+                            help="Файл снимка (по умолчанию SEARCH_INDEX_SNAPSHOT)")
+
+
+    def handle(self, *args, **options):
+        path = options['path'] or getattr(settings, 'SEARCH_INDEX_SNAPSHOT', '')
+        if not path:
+            raise CommandError("Укажите --path или настройку SEARCH_INDEX_SNAPSHOT")
+
+        start = time.perf_counter()
+        indexes = inverted_indexes.write_snapshot(path)
+        elapsed = time.perf_counter() - start
+
+        for label, index in indexes.items():
+            self.stdout.write(
+                f"{label}: документов {len(index.doc_terms)}, слов {len(index.terms)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Снимок сохранён в {path} за {elapsed:.1f} с"))
@@ -0,0 +1,54 @@
+"""
+Удаляет истёкшие refresh-токены из таблиц token_blacklist пачками.
+
+В отличие от flushexpiredtokens из simplejwt, не загружает все строки
+в память для каскадного удаления. Рассчитана на запуск по расписанию:
+    0 * * * *  python manage.py prune_tokens
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from test_app.tokens import blacklist_pruned
+
+
+class Command(BaseCommand):
+    help = "Пачками удаляет истёкшие токены из OutstandingToken/BlacklistedToken"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+
+        # Сначала чёрный список, чтобы каскад при удалении OutstandingToken был пустым
+        blacklisted = self.delete_in_batches(
+            BlacklistedToken.objects.filter(token__expires_at__lte=now),
+            batch_size,
+        )
+        outstanding = self.delete_in_batches(
+            OutstandingToken.objects.filter(expires_at__lte=now),
+            batch_size,
+        )
+
+        if blacklisted:
+            blacklist_pruned()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено: из чёрного списка {blacklisted}, выданных токенов {outstanding}"
+        ))
+
+
+    def delete_in_batches(self, queryset, batch_size):
+        deleted = 0
+        while True:
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                queryset.model.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
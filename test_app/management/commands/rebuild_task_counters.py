@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from test_app.counters import check_status_counters, rebuild_status_counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики задач по статусам (TaskStatusCounter) с нуля"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Только проверить согласованность счётчиков, ничего не меняя",
+        )
+
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = check_status_counters()
+            if mismatches:
+                for status, (stored, actual) in sorted(mismatches.items()):
+                    self.stderr.write(f"{status}: в счётчике {stored}, в задачах {actual}")
+                raise CommandError("Счётчики задач не согласованы, запустите rebuild_task_counters")
+
+            self.stdout.write(self.style.SUCCESS("Счётчики задач согласованы"))
+            return
+
+        counts = rebuild_status_counters()
+        for status, count in counts.items():
+            self.stdout.write(f"{status}: {count}")
+        self.stdout.write(self.style.SUCCESS("Счётчики задач пересчитаны"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from test_app.cache_standin import MemcachedStandIn
+
+
+class Command(BaseCommand):
+    help = "Запускает локальную замену memcached (для разработки без memcached)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help="Адрес (по умолчанию 127.0.0.1)")
+        parser.add_argument('--port', type=int, default=11211, help="Порт (по умолчанию 11211)")
+
+
+    def handle(self, *args, **options):
+        server = MemcachedStandIn(options['host'], options['port'])
+        self.stdout.write(
+            f"Cache stand-in: CACHE_URL=pymemcache://{server.location} (Ctrl+C — остановить)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
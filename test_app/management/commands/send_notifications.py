@@ -0,0 +1,61 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from test_app.email_rendering import preload_templates
+from test_app.notifications import deliver_pending_notifications
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Отправляет уведомления из очереди NotificationOutbox пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Размер пачки (по умолчанию NOTIFICATIONS_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Работать постоянно, опрашивая очередь",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help="Пауза между опросами очереди в режиме --loop (сек)",
+        )
+
+
+    def handle(self, *args, **options):
+        preload_templates()
+
+        while True:
+            total_sent = total_failed = 0
+
+            # Разбираем очередь, пока в ней есть готовые к отправке письма
+            while True:
+                try:
+                    sent, failed = deliver_pending_notifications(options['batch_size'])
+                except Exception:
+                    # В режиме --loop воркер не должен падать (например, при сбое БД)
+                    if not options['loop']:
+                        raise
+                    logger.exception("Notification delivery failed, retrying after pause")
+                    break
+                total_sent += sent
+                total_failed += failed
+                if not sent and not failed:
+                    break
+
+            if total_sent or total_failed:
+                self.stdout.write(f"Отправлено: {total_sent}, с ошибкой: {total_failed}")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
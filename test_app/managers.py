@@ -1,4 +1,8 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 
 
 class CategoryManager(models.Manager):
@@ -24,4 +28,208 @@ class CategoryManager(models.Manager):
 
     def hard_delete(self):
         """Полное удаление категорий из базы данных"""
-        return super().get_queryset().delete()
\ No newline at end of file
+        return super().get_queryset().delete()
+
+def update_with_search_index(queryset, update, kwargs):
+    """
+    Выполняет update(**kwargs) и переиндексирует затронутые строки,
+    если менялись поля поискового индекса.
+    """
+    from .search import get_search_fields, reindex_queryset
+
+    fields = get_search_fields(queryset.model) or ()
+    if not set(kwargs) & set(fields):
+        return update(**kwargs)
+
+    with transaction.atomic(using=queryset.db):
+        ids = list(queryset.values_list('pk', flat=True))
+        rows = update(**kwargs)
+        reindex_queryset(queryset.model._base_manager.using(queryset.db).filter(pk__in=ids))
+    return rows
+
+
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet для модели Task с заготовками "жадной" загрузки.
+    Убирает N+1 запросов при сериализации списков и деталей задач.
+    """
+
+
+    def for_list(self):
+        """
+        Выборка для TaskListSerializer:
+        владелец через JOIN, неудалённые категории одним запросом,
+        только нужные колонки.
+        """
+        from .models import Category
+
+        return (
+            self.select_related('owner')
+            .prefetch_related(
+                models.Prefetch('categories', queryset=Category.objects.all())
+            )
+            .only(
+                'id',
+                'title',
+                'description',
+                'status',
+                'deadline',
+                'created_at',
+                'updated_at',
+                'owner__username',
+            )
+        )
+
+
+    def for_detail(self, subtasks_limit=None):
+        """
+        Выборка для TaskDetailSerializer: задача, категории и подзадачи
+        (с владельцами через JOIN) — фиксированное число запросов.
+        subtasks_limit ограничивает количество подзадач на задачу.
+        """
+        from .models import Category, SubTask
+
+        subtasks = SubTask.objects.for_list()
+        if subtasks_limit:
+            # Срез через оконную функцию: первые N подзадач каждой задачи
+            subtasks = subtasks.annotate(
+                row_number=models.Window(
+                    RowNumber(),
+                    partition_by=models.F('task_id'),
+                    order_by=models.F('created_at').desc(),
+                )
+            ).filter(row_number__lte=subtasks_limit)
+
+        return (
+            self.select_related('owner')
+            .prefetch_related(
+                models.Prefetch('categories', queryset=Category.objects.all()),
+                models.Prefetch('subtasks', queryset=subtasks),
+            )
+        )
+
+
+    def update(self, **kwargs):
+        """
+        Массовое обновление. При смене статуса поддерживает счётчики
+        TaskStatusCounter, сбрасывает кэш статистики и списков, обновляет
+        поисковый индекс, updated_at и версию коллекции (сигналы save
+        при update() не вызываются).
+        """
+        from .conditional import collection_changed
+        from .counters import adjust_status_counters, rebuild_status_counters
+        from .response_cache import invalidate_task_lists
+        from .statistics import invalidate_task_statistics
+
+        invalidate_task_lists()
+        collection_changed(self.model, using=self.db)
+        # auto_now при update() не срабатывает
+        kwargs.setdefault('updated_at', timezone.now())
+        if 'status' not in kwargs:
+            rows = update_with_search_index(self, super().update, kwargs)
+            invalidate_task_statistics(bulk=True)
+            return rows
+
+        new_status = kwargs['status']
+        with transaction.atomic(using=self.db):
+            before = (self.order_by()
+                      .values_list('status')
+                      .annotate(count=models.Count('pk')))
+            before = list(before) if isinstance(new_status, str) else None
+
+            rows = update_with_search_index(self, super().update, kwargs)
+
+            if before is None:
+                # Статус задан выражением — пересчитываем счётчики целиком
+                rebuild_status_counters()
+            else:
+                deltas = Counter()
+                for status, count in before:
+                    deltas[status] -= count
+                    deltas[new_status] += count
+                adjust_status_counters(deltas)
+        invalidate_task_statistics(bulk=True)
+        return rows
+
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Массовое создание с обновлением счётчиков, кэшей статистики и списков, поиска, версии коллекции."""
+        from .conditional import collection_changed
+        from .counters import adjust_status_counters, rebuild_status_counters
+        from .response_cache import invalidate_task_lists
+        from .search import index_objects
+        from .statistics import invalidate_task_statistics
+
+        collection_changed(self.model, using=self.db)
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            index_objects(self.model, objs)
+
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Неизвестно, какие строки реально вставлены
+                rebuild_status_counters()
+            else:
+                adjust_status_counters(Counter(obj.status for obj in objs))
+        invalidate_task_statistics(owner_ids=[obj.owner_id for obj in objs])
+        invalidate_task_lists()
+        return objs
+
+
+class SubTaskQuerySet(models.QuerySet):
+    """QuerySet для модели SubTask с заготовками "жадной" загрузки."""
+
+
+    def for_list(self):
+        """Выборка для SubTaskSerializer: владелец через JOIN и только нужные колонки."""
+        return (
+            self.select_related('owner')
+            .only(
+                'id',
+                'title',
+                'description',
+                'status',
+                'deadline',
+                'created_at',
+                'updated_at',  # save() из представления обновляет только загруженные поля
+                'task_id',
+                'owner__username',
+            )
+        )
+
+
+    def update(self, **kwargs):
+        """
+        Массовое обновление с обновлением поискового индекса, updated_at
+        и версии коллекции подзадач и версии их задач.
+        """
+        from .conditional import collection_changed, touch
+        from .models import Task
+
+        kwargs.setdefault('updated_at', timezone.now())
+        collection_changed(self.model, using=self.db)
+        with transaction.atomic(using=self.db):
+            touch(Task, pk__in=self.values('task_id'))
+            rows = update_with_search_index(self, super().update, kwargs)
+            if 'task' in kwargs or 'task_id' in kwargs:
+                touch(Task, pk__in=self.values('task_id'))
+        return rows
+
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Массовое создание с добавлением подзадач в поисковый индекс и сдвигом версий подзадач и задач."""
+        from .conditional import collection_changed, touch
+        from .models import Task
+        from .search import index_objects
+
+        collection_changed(self.model, using=self.db)
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            index_objects(self.model, objs)
+            task_ids = {obj.task_id for obj in objs}
+            if task_ids:
+                touch(Task, pk__in=task_ids)
+        return objs
+
+
+TaskManager = models.Manager.from_queryset(TaskQuerySet)
+SubTaskManager = models.Manager.from_queryset(SubTaskQuerySet)
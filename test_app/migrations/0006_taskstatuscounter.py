@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUSES = ['new', 'in_progress', 'pending', 'blocked', 'done']
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счётчики по уже существующим задачам."""
+    Task = apps.get_model('test_app', 'Task')
+    TaskStatusCounter = apps.get_model('test_app', 'TaskStatusCounter')
+    db_alias = schema_editor.connection.alias
+
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(
+        Task.objects.using(db_alias).order_by().values_list('status').annotate(count=Count('id'))
+    )
+    TaskStatusCounter.objects.using(db_alias).bulk_create([
+        TaskStatusCounter(status=status, count=count)
+        for status, count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0005_category_category_active_name_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('new', 'New'), ('in_progress', 'In Progress'), ('pending', 'Pending'), ('blocked', 'Blocked'), ('done', 'Done')], max_length=20, unique=True, verbose_name='Статус задачи')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество задач')),
+            ],
+            options={
+                'verbose_name': 'Task status counter',
+                'verbose_name_plural': 'Task status counters',
+                'db_table': 'task_manager_task_status_counter',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
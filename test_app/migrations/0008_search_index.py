@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+# Таблица модели -> имя FULLTEXT-индекса на MySQL
+SEARCH_TABLES = {
+    'task_manager_task': 'task_fulltext_idx',
+    'task_manager_subtask': 'subtask_fulltext_idx',
+}
+
+
+def create_search_index(apps, schema_editor):
+    """
+    FTS5-таблицы на SQLite (с заполнением и префиксными индексами
+    для запросов «слово*»), FULLTEXT-индексы на MySQL.
+    """
+    vendor = schema_editor.connection.vendor
+    for table, index_name in SEARCH_TABLES.items():
+        if vendor == 'sqlite':
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5(title, description, prefix='2 3')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (rowid, title, description) "
+                f"SELECT id, title, description FROM {table}"
+            )
+        elif vendor == 'mysql':
+            schema_editor.execute(
+                f"ALTER TABLE `{table}` ADD FULLTEXT INDEX `{index_name}` (`title`, `description`)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, index_name in SEARCH_TABLES.items():
+        if vendor == 'sqlite':
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif vendor == 'mysql':
+            schema_editor.execute(f"ALTER TABLE `{table}` DROP INDEX `{index_name}`")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0007_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0009_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='subtask',
+            name='subtask_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subtask',
+            name='subtask_task_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='subtask',
+            name='subtask_owner_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_owner_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['created_at'], name='subtask_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['task', 'created_at'], name='subtask_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['owner', 'created_at'], name='subtask_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'created_at'], name='task_owner_created_idx'),
+        ),
+    ]
@@ -1,7 +1,60 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
-from .managers import CategoryManager
+from .managers import CategoryManager, TaskManager, SubTaskManager
+
+
+class TrackedFieldsMixin:
+    """
+    Запоминает значения полей tracked_fields в момент загрузки из БД
+    (и после каждого сохранения), чтобы знать прежнее значение
+    без дополнительного SELECT перед save().
+    """
+
+    tracked_fields = ()
+
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+
+    def _snapshot_tracked_fields(self, fields=None):
+        # Отложенные (deferred) поля в __dict__ отсутствуют — их не запоминаем
+        snapshot = getattr(self, '_loaded_values', {})
+        if fields:
+            # update_fields=['owner'] сохраняет и owner_id
+            fields = [self._meta.get_field(name).attname for name in fields]
+        for name in fields or self.tracked_fields:
+            if name in self.tracked_fields and name in self.__dict__:
+                snapshot[name] = self.__dict__[name]
+        self._loaded_values = snapshot
+
+
+    def get_loaded_value(self, name):
+        """Значение поля на момент загрузки/последнего сохранения (или None)."""
+        return getattr(self, '_loaded_values', {}).get(name)
+
+
+    def tracked_field_changed(self, name, update_fields=None):
+        """Изменилось ли поле относительно загруженного значения."""
+        if update_fields is not None and name not in update_fields:
+            return False
+        loaded = getattr(self, '_loaded_values', {})
+        return name in loaded and loaded[name] != getattr(self, name)
+
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save уже отработал со старым снимком — обновляем его
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('fields'))
 
 
 class Category(models.Model):
@@ -10,6 +63,7 @@ class Category(models.Model):
     # Поля для мягкого удаления
     is_deleted = models.BooleanField(default=False, verbose_name="Удалено")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата удаления")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
 
 
     objects = CategoryManager()  # Кастомный менеджер По умолчанию показывает только неудалённые
@@ -23,7 +77,7 @@ class Category(models.Model):
         """Метод мягкого удаления"""
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
 
         # import logging
         # logger = logging.getLogger(__name__)
@@ -34,7 +88,7 @@ class Category(models.Model):
         """Восстановление из удалённых"""
         self.is_deleted = False
         self.deleted_at = None
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
 
         # import logging
         # logger = logging.getLogger(__name__)
@@ -57,9 +111,17 @@ class Category(models.Model):
         db_table = 'task_manager_category'
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
+        indexes = [
+            # Частичный индекс: менеджер по умолчанию читает только неудалённые
+            models.Index(
+                fields=['name'],
+                condition=models.Q(is_deleted=False),
+                name='category_active_name_idx',
+            ),
+        ]
 
 
-class Task(models.Model):
+class Task(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('new', 'New'),
         ('in_progress', 'In Progress'),
@@ -89,18 +151,44 @@ class Task(models.Model):
     )
     deadline = models.DateTimeField(null=True, blank=True, verbose_name="Дедлайн")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    # Версия задачи для ETag/Last-Modified (test_app/conditional.py): сдвигается
+    # и при изменении подзадач и категорий задачи
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    objects = TaskManager()
+
+    # Прежние статус и текст нужны сигналам (счётчики, уведомления, поиск),
+    # прежняя версия — для удаления устаревших фрагментов кэша,
+    # прежний владелец — для сброса его статистики
+    tracked_fields = ('status', 'title', 'description', 'updated_at', 'owner_id')
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Сигналы post_save (очередь уведомлений, счётчики статусов) пишут в той же
+        # транзакции, что и задача: без ATOMIC_REQUESTS UPDATE иначе фиксируется раньше
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'task_manager_task'
         ordering = ['-created_at']
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
-
-
-class SubTask(models.Model):
+        # Индексы по created_at — по возрастанию: id (rowid) в индексе тоже
+        # по возрастанию, и обратный проход даёт порядок (-created_at, -id)
+        # keyset-пагинации без досортировки
+        indexes = [
+            models.Index(fields=['created_at'], name='task_created_idx'),
+            models.Index(fields=['owner', 'created_at'], name='task_owner_created_idx'),
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            models.Index(fields=['updated_at'], name='task_updated_idx'),
+        ]
+
+
+class SubTask(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('new', 'New'),
         ('in_progress', 'In Progress'),
@@ -135,6 +223,11 @@ class SubTask(models.Model):
     )
     deadline = models.DateTimeField(null=True, blank=True, verbose_name="Дедлайн")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    objects = SubTaskManager()
+
+    tracked_fields = ('status', 'title', 'description')
 
     def __str__(self):
         return self.title
@@ -143,4 +236,88 @@ class SubTask(models.Model):
         db_table = 'task_manager_subtask'
         ordering = ['-created_at']
         verbose_name = 'SubTask'
-        verbose_name_plural = 'SubTasks'
\ No newline at end of file
+        verbose_name_plural = 'SubTasks'
+        indexes = [
+            # По возрастанию — см. Task.Meta.indexes
+            models.Index(fields=['created_at'], name='subtask_created_idx'),
+            models.Index(fields=['task', 'created_at'], name='subtask_task_created_idx'),
+            models.Index(fields=['owner', 'created_at'], name='subtask_owner_created_idx'),
+            models.Index(fields=['status', 'deadline'], name='subtask_status_deadline_idx'),
+            models.Index(fields=['updated_at'], name='subtask_updated_idx'),
+        ]
+
+class TaskStatusCounter(models.Model):
+    """
+    Агрегированное количество задач по статусам.
+    Поддерживается сигналами и массовыми операциями TaskQuerySet,
+    чтобы статистика читалась за O(1) без COUNT(*) по всей таблице.
+    """
+
+    status = models.CharField(
+        max_length=20,
+        choices=Task.STATUS_CHOICES,
+        unique=True,
+        verbose_name="Статус задачи"
+    )
+    count = models.IntegerField(default=0, verbose_name="Количество задач")
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+    class Meta:
+        db_table = 'task_manager_task_status_counter'
+        verbose_name = 'Task status counter'
+        verbose_name_plural = 'Task status counters'
+
+
+class NotificationOutbox(models.Model):
+    """
+    Очередь исходящих уведомлений о смене статуса задачи.
+    Строка пишется в той же транзакции, что и изменение задачи,
+    а отправку выполняет отдельный воркер (manage.py send_notifications).
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    recipient = models.EmailField(verbose_name="Получатель")
+    owner_name = models.CharField(max_length=150, verbose_name="Имя владельца")
+
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.SET_NULL,
+        related_name='notifications',
+        null=True,
+        blank=True,
+        verbose_name="Задача"
+    )
+    task_title = models.CharField(max_length=200, verbose_name="Название задачи")
+    old_status = models.CharField(max_length=20, blank=True, verbose_name="Старый статус")
+    new_status = models.CharField(max_length=20, verbose_name="Новый статус")
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name="Статус отправки"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток отправки")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+
+    def __str__(self):
+        return f"{self.recipient}: {self.task_title} ({self.old_status} -> {self.new_status})"
+
+    class Meta:
+        db_table = 'task_manager_notification_outbox'
+        ordering = ['id']
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notification outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
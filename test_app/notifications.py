@@ -0,0 +1,242 @@
+"""
+Очередь email-уведомлений (outbox).
+
+Логика:
+1. Сигнал смены статуса вызывает enqueue_status_change — в той же
+   транзакции, что и сохранение задачи, пишется строка NotificationOutbox
+2. Воркер (manage.py send_notifications) вызывает deliver_pending_notifications:
+   забирает пачку получателей, у которых самое старое изменение ждёт дольше
+   NOTIFICATIONS_DIGEST_WINDOW, и отправляет каждому одно письмо-дайджест
+   со всеми изменениями через одно SMTP-соединение
+3. Несколько смен статуса одной задачи сворачиваются в одну строку дайджеста
+4. Строки пачки забираются короткой транзакцией (аренда на
+   NOTIFICATIONS_CLAIM_TIMEOUT), письма отправляются вне транзакции,
+   и строки каждого получателя помечаются сразу после его письма
+5. При ошибке (в т.ч. недоступном SMTP) строки остаются в очереди с
+   экспоненциальной задержкой, после NOTIFICATIONS_MAX_ATTEMPTS попыток
+   помечаются как failed
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .email_rendering import render_email
+from .models import NotificationOutbox
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_status_change(task, old_status, new_status):
+    """Ставит уведомление о смене статуса задачи в очередь."""
+    return NotificationOutbox.objects.create(
+        recipient=task.owner.email,
+        owner_name=task.owner.username,
+        task=task,
+        task_title=task.title,
+        old_status=old_status or '',
+        new_status=new_status,
+    )
+
+
+def build_email(recipient, subject, template_name, context):
+    """Собирает письмо с текстовой и HTML-версией из одного контекста."""
+    message, html_message = render_email(template_name, context)
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL or 'noreply@taskmanager.com',
+        to=[recipient],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def build_status_change_email(notification):
+    """Формирует письмо о смене статуса по строке очереди."""
+
+    is_closing = (notification.new_status == 'done')
+
+    subject = "Статус задачи изменён" if not is_closing else "Задача закрыта!"
+
+    context = {
+        'task_title': notification.task_title,
+        'old_status': notification.old_status,
+        'new_status': notification.new_status,
+        'owner_name': notification.owner_name,
+        'task_url': f"http://localhost:8000/api/v1/tasks/{notification.task_id}/",
+        'is_closing': is_closing,
+        'closing_line': "Задача закрыта!" if is_closing else "Продолжайте работу!",
+    }
+
+    return build_email(notification.recipient, subject, 'status_change', context)
+
+
+def collapse_changes(notifications):
+    """
+    Сворачивает изменения по задачам: первый старый статус -> последний новый.
+    Задачи, статус которых в итоге не изменился, отбрасываются.
+    """
+    changes = {}
+    for notification in sorted(notifications, key=lambda n: (n.created_at, n.pk)):
+        key = notification.task_id or notification.task_title
+        if key in changes:
+            changes[key]['new_status'] = notification.new_status
+            changes[key]['task_title'] = notification.task_title
+        else:
+            changes[key] = {
+                'task_id': notification.task_id,
+                'task_title': notification.task_title,
+                'old_status': notification.old_status,
+                'new_status': notification.new_status,
+            }
+
+    return [
+        change for change in changes.values()
+        if change['old_status'] != change['new_status']
+    ]
+
+
+def build_digest_email(notifications):
+    """
+    Формирует одно письмо по всем изменениям получателя.
+    Для единственного изменения — обычное письмо о смене статуса.
+    Возвращает None, если в итоге ничего не изменилось.
+    """
+    changes = collapse_changes(notifications)
+    if not changes:
+        return None
+
+    if len(changes) == 1:
+        last = max(notifications, key=lambda n: (n.created_at, n.pk))
+        single = NotificationOutbox(
+            recipient=last.recipient,
+            owner_name=last.owner_name,
+            **changes[0],
+        )
+        return build_status_change_email(single)
+
+    subject = f"Изменены статусы задач: {len(changes)}"
+
+    context = {
+        'owner_name': notifications[0].owner_name,
+        'changes': changes,
+        'changes_text': "\n".join(
+            f'    - "{change["task_title"]}": {change["old_status"]} -> {change["new_status"]}'
+            for change in changes
+        ),
+        'tasks_url': "http://localhost:8000/api/v1/tasks/my_tasks/",
+    }
+
+    return build_email(notifications[0].recipient, subject, 'status_digest', context)
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной отправкой (не больше часа)."""
+    base_delay = getattr(settings, 'NOTIFICATIONS_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base_delay * 2 ** (attempts - 1), 3600))
+
+
+def _claim_batch(batch_size, now):
+    """
+    Забирает пачку получателей: строки блокируются только на время выборки,
+    им сразу увеличивается attempts и next_attempt_at сдвигается на время
+    аренды — другой воркер их не возьмёт, а после падения воркера они снова
+    станут готовыми к отправке.
+    """
+    window = timedelta(seconds=getattr(settings, 'NOTIFICATIONS_DIGEST_WINDOW', 30))
+    lease = timedelta(seconds=getattr(settings, 'NOTIFICATIONS_CLAIM_TIMEOUT', 300))
+    due = NotificationOutbox.objects.filter(status='pending', next_attempt_at__lte=now)
+
+    with transaction.atomic():
+        # Получатели, чьё окно дайджеста истекло
+        recipients = list(
+            due.filter(created_at__lte=now - window)
+            .order_by()
+            .values_list('recipient', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not recipients:
+            return {}
+
+        # skip_locked: несколько воркеров не возьмут одни и те же строки
+        groups = defaultdict(list)
+        for notification in due.select_for_update(skip_locked=True).filter(recipient__in=recipients):
+            notification.attempts += 1
+            notification.next_attempt_at = now + lease
+            groups[notification.recipient].append(notification)
+
+        NotificationOutbox.objects.bulk_update(
+            [notification for group in groups.values() for notification in group],
+            ['attempts', 'next_attempt_at'],
+        )
+    return groups
+
+
+def _mark_sent(notifications):
+    NotificationOutbox.objects.filter(pk__in=[n.pk for n in notifications]).update(
+        status='sent', sent_at=timezone.now(), last_error='',
+    )
+
+
+def _mark_failed(notifications, error, now):
+    """Откладывает строки с экспоненциальной задержкой или помечает их failed."""
+    max_attempts = getattr(settings, 'NOTIFICATIONS_MAX_ATTEMPTS', 5)
+    for notification in notifications:
+        notification.last_error = error
+        if notification.attempts >= max_attempts:
+            notification.status = 'failed'
+        else:
+            notification.next_attempt_at = now + get_retry_delay(notification.attempts)
+    NotificationOutbox.objects.bulk_update(notifications, ['status', 'last_error', 'next_attempt_at'])
+
+
+def deliver_pending_notifications(batch_size=None):
+    """
+    Отправляет дайджесты для одной пачки получателей через одно соединение.
+    Письма уходят вне транзакции; строки получателя помечаются сразу после
+    его письма, поэтому сбой на следующем получателе не отправит письмо повторно.
+    Возвращает (отправлено писем, писем с ошибкой).
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 100)
+    now = timezone.now()
+    sent = failed = 0
+
+    groups = _claim_batch(batch_size, now)
+    if not groups:
+        return sent, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # SMTP недоступен — вся пачка откладывается, как при ошибке отправки
+        _mark_failed([n for group in groups.values() for n in group], str(exc), now)
+        logger.error(f"Cannot connect to mail server, {len(groups)} recipients postponed: {exc}")
+        return sent, len(groups)
+
+    try:
+        for recipient, notifications in groups.items():
+            try:
+                email = build_digest_email(notifications)
+                if email is not None:
+                    email.connection = connection
+                    connection.send_messages([email])
+            except Exception as exc:
+                failed += 1
+                _mark_failed(notifications, str(exc), now)
+                logger.error(f"Failed to send notifications to {recipient}: {exc}")
+            else:
+                sent += email is not None
+                _mark_sent(notifications)
+                logger.info(f"Digest with {len(notifications)} changes sent to {recipient}")
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -11,7 +11,10 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        if hasattr(obj, 'owner'):
+        # Сравниваем по id, чтобы не подгружать владельца отдельным запросом
+        if hasattr(obj, 'owner_id'):
+            return obj.owner_id is not None and obj.owner_id == request.user.pk
+        elif hasattr(obj, 'owner'):
             return obj.owner == request.user
         elif hasattr(obj, 'user'):
             return obj.user == request.user
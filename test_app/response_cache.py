@@ -0,0 +1,91 @@
+"""
+Кэш ответов списка задач для анонимных запросов.
+
+Логика:
+1. Анонимный GET /api/v1/tasks/ одинаков для всех, поэтому данные ответа
+   (до рендеринга) кэшируются целиком
+2. Ключ — поколение списков задач и нормализованные параметры запроса
+   (фильтры, поиск, сортировка, курсор, размер страницы); запрос с другими
+   параметрами не кэшируется, чтобы мусорные параметры не плодили ключи
+3. Запись задачи, её категорий или самой категории увеличивает поколение
+   (signals.py, managers.py) — инвалидация O(1), попадание не обращается к БД
+4. Вместе с данными хранится версия коллекции — ETag/304 работают и на попаданиях
+Подзадачи в список задач не входят и поколение не меняют.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .caching import bump_generation, get_generation, make_key
+from .conditional import not_modified, set_validators
+
+TASK_LISTS_GENERATION = 'task_lists'
+
+
+def invalidate_task_lists():
+    """Делает недействительными закэшированные списки задач."""
+    bump_generation(TASK_LISTS_GENERATION)
+    # Запрос между записью и COMMIT мог закэшировать старые данные под новым
+    # поколением — после коммита сдвигаем поколение ещё раз
+    transaction.on_commit(lambda: bump_generation(TASK_LISTS_GENERATION))
+
+
+class CachedAnonymousListMixin:
+    """list() с кэшем данных ответа для анонимных пользователей."""
+
+    cache_generation = TASK_LISTS_GENERATION
+    cache_query_params = (
+        'status', 'deadline', 'search', 'ordering', 'week_day',
+        'cursor', 'page_size', 'with_count', 'format',
+    )
+
+
+    def get_list_cache_key(self, request):
+        """Ключ кэша или None, если запрос не кэшируется."""
+        params = []
+        for name, values in sorted(request.query_params.lists()):
+            if name not in self.cache_query_params:
+                return None
+            values = [' '.join(value.split()) for value in values]
+            if name == 'week_day':
+                values = [value.lower() for value in values]
+            values = [value for value in values if value]
+            if values:
+                params.append((name, values))
+
+        digest = hashlib.md5(
+            f"{request.get_host()}|{request.scheme}|{params!r}".encode()
+        ).hexdigest()
+        generation = get_generation(self.cache_generation)
+        return make_key('response', self.cache_generation, generation, digest)
+
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        cache_key = self.get_list_cache_key(request)
+        if cache_key is None:
+            return super().list(request, *args, **kwargs)
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            data, version = cached
+            salt = self.get_validator_salt()
+            response = not_modified(request, version, salt)
+            if response is not None:
+                return response
+            return set_validators(request, Response(data), version, salt)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                cache_key,
+                (response.data, getattr(self, 'collection_version', None)),
+                timeout=getattr(settings, 'TASK_LIST_CACHE_TIMEOUT', 300),
+            )
+        return response
@@ -0,0 +1,270 @@
+"""
+Полнотекстовый поиск (?search=) по задачам и подзадачам.
+
+Логика:
+1. Бэкенд выбирается настройкой SEARCH_BACKEND:
+   - 'database' — индекс в самой БД: FTS5-таблица <db_table>_fts на SQLite,
+     FULLTEXT-индекс (title, description) на MySQL (миграция 0008)
+   - 'memory' — инвертированный индекс в памяти процесса (inverted_index.py),
+     загружается в фоне при старте; до загрузки — поиск как у 'like'
+   - 'like' — стандартный SearchFilter DRF (LIKE '%term%')
+2. Индекс обновляется при сохранении/удалении моделей (signals.py)
+   и при массовых update()/bulk_create() (managers.py)
+3. Бэкенд одним запросом к индексу возвращает id SEARCH_RESULTS_LIMIT лучших
+   совпадений; FullTextSearchFilter оставляет в выборке только их
+   и добавляет аннотацию search_rank — место в выдаче (меньше — лучше).
+   Фильтры представления (владелец, задача, статус) бэкенд 'database'
+   применяет в том же запросе к индексу (rowid IN (подзапрос)); бэкенд
+   'memory' их не видит — если его выдача упёрлась в лимит, а выборка
+   отфильтрована, поиск идёт без ранжирования (SearchFilter), иначе
+   совпадения за пределами лимита молча потерялись бы
+4. SearchRankOrderingFilter сортирует по search_rank, если ?ordering= не задан
+Каждое слово запроса ищется как префикс: «отч» найдёт «отчёт».
+"""
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import CharField, IntegerField, Value
+from django.db.models.functions import Cast, Concat, StrIndex
+from rest_framework import filters
+
+from .inverted_index import inverted_indexes
+
+SEARCH_RANK = 'search_rank'
+
+# Модели с поисковым индексом и индексируемые поля
+SEARCH_FIELDS = {
+    'task': ('title', 'description'),
+    'subtask': ('title', 'description'),
+}
+
+
+def get_search_fields(model):
+    if model._meta.app_label != 'test_app':
+        return None
+    return SEARCH_FIELDS.get(model._meta.model_name)
+
+
+def _results_limit():
+    return getattr(settings, 'SEARCH_RESULTS_LIMIT', 1000)
+
+
+class SearchBackend:
+    """Интерфейс бэкенда поиска."""
+
+    def index(self, model, objs):
+        """Добавляет/обновляет объекты в индексе."""
+
+    def remove(self, model, ids):
+        """Удаляет объекты из индекса."""
+
+    # search() учитывает within — ищет только среди строк выборки
+    supports_within = False
+
+    def search(self, model, terms, limit, within=None):
+        """
+        id лучших совпадений (не больше limit), от лучшего к худшему,
+        или None — тогда применяется стандартный поиск SearchFilter.
+        within — отфильтрованный queryset, которым ограничен поиск
+        (если supports_within).
+        """
+        return None
+
+    def filter(self, queryset, terms):
+        """Оставляет в queryset лучшие совпадения и аннотирует их search_rank."""
+        limit = _results_limit()
+        filtered = bool(queryset.query.where)
+        ids = self.search(queryset.model, terms, limit, within=queryset if filtered else None)
+        if ids is None:
+            return None
+        if filtered and not self.supports_within and len(ids) >= limit:
+            # Лучшие по всей таблице могли не попасть в выборку — без ранжирования
+            return None
+        if not ids:
+            return queryset.none().annotate(**{SEARCH_RANK: Value(0, output_field=IntegerField())})
+
+        # Место в выдаче — позиция ",id," в строке ",id1,id2,...,": одно выражение
+        # вместо CASE на SEARCH_RESULTS_LIMIT веток (id — целые числа)
+        ranked_ids = Value(',{},'.format(','.join(map(str, ids))))
+        rank = StrIndex(ranked_ids, Concat(Value(','), Cast('pk', CharField()), Value(',')))
+        return queryset.filter(pk__in=ids).annotate(**{SEARCH_RANK: rank})
+
+
+class LikeSearchBackend(SearchBackend):
+    """Без индекса: поиск LIKE '%term%' средствами SearchFilter."""
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Полнотекстовый индекс БД: FTS5 на SQLite, FULLTEXT на MySQL."""
+
+    supports_within = True
+
+    @staticmethod
+    def fts_table(model):
+        return f"{model._meta.db_table}_fts"
+
+
+    def index(self, model, objs):
+        fields = get_search_fields(model)
+        objs = [obj for obj in objs if obj.pk is not None]
+        connection = connections[model.objects.db]
+        # MySQL обновляет FULLTEXT-индекс сам
+        if not fields or not objs or connection.vendor != 'sqlite':
+            return
+
+        table = self.fts_table(model)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE rowid = %s",
+                [(obj.pk,) for obj in objs],
+            )
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, {', '.join(fields)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(fields))})",
+                [(obj.pk, *(getattr(obj, field) for field in fields)) for obj in objs],
+            )
+
+
+    def remove(self, model, ids):
+        ids = [pk for pk in ids if pk is not None]
+        connection = connections[model.objects.db]
+        if not get_search_fields(model) or not ids or connection.vendor != 'sqlite':
+            return
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.fts_table(model)} WHERE rowid = %s",
+                [(pk,) for pk in ids],
+            )
+
+
+    def search(self, model, terms, limit, within=None):
+        fields = get_search_fields(model)
+        connection = connections[model.objects.db]
+        if not fields or connection.vendor not in ('sqlite', 'mysql'):
+            return None
+
+        # Фильтры выборки — подзапросом по pk в том же запросе к индексу
+        subquery, within_params = '', ()
+        if within is not None:
+            subquery, within_params = within.order_by().values('pk').query.sql_with_params()
+
+        def within_sql(column):
+            return f" AND {column} IN ({subquery})" if subquery else ''
+
+        if connection.vendor == 'sqlite':
+            query = self.fts5_query(terms)
+            fts = self.fts_table(model)
+            # rank в FTS5 — bm25 со знаком минус: по возрастанию — от лучшего
+            sql = (f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s{within_sql('rowid')} "
+                   f"ORDER BY rank LIMIT %s")
+            params = (query, *within_params, limit)
+        else:
+            query = self.boolean_mode_query(terms)
+            table = model._meta.db_table
+            pk_column = f"`{table}`.`{model._meta.pk.column}`"
+            columns = ', '.join(f"`{field}`" for field in fields)
+            match = f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+            sql = (f"SELECT {pk_column} FROM `{table}` "
+                   f"WHERE {match}{within_sql(pk_column)} ORDER BY {match} DESC LIMIT %s")
+            params = (query, *within_params, query, limit)
+
+        if not query:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+    @staticmethod
+    def fts5_query(terms):
+        """Слова запроса как префиксные фразы FTS5: "слово"* "другое"*"""
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms if term)
+
+
+    @staticmethod
+    def boolean_mode_query(terms):
+        """Слова запроса для MATCH ... IN BOOLEAN MODE: +слово* +другое*"""
+        operators = str.maketrans('', '', '+-<>()~*"@')
+        words = (term.translate(operators).strip() for term in terms)
+        return ' '.join(f"+{word}*" for word in words if word)
+
+
+class MemorySearchBackend(SearchBackend):
+    """Инвертированный индекс в памяти процесса: поиск слов без запросов к БД."""
+
+    def index(self, model, objs):
+        inverted_indexes.index(model, objs)
+
+    def remove(self, model, ids):
+        inverted_indexes.remove(model, ids)
+
+    def search(self, model, terms, limit, within=None):
+        if not get_search_fields(model):
+            return None
+        return inverted_indexes.search(model, terms, limit)
+
+
+SEARCH_BACKENDS = {
+    'like': LikeSearchBackend,
+    'database': DatabaseSearchBackend,
+    'memory': MemorySearchBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend():
+    name = getattr(settings, 'SEARCH_BACKEND', 'database')
+    if name not in _backends:
+        _backends[name] = SEARCH_BACKENDS[name]()
+    return _backends[name]
+
+
+def index_objects(model, objs):
+    """Обновляет объекты в поисковом индексе (если модель индексируется)."""
+    if get_search_fields(model):
+        get_search_backend().index(model, list(objs))
+
+
+def remove_objects(model, ids):
+    """Удаляет объекты из поискового индекса."""
+    if get_search_fields(model):
+        get_search_backend().remove(model, list(ids))
+
+
+def warm_up_search_index():
+    """Начинает загрузку индекса бэкенда 'memory' при старте процесса (core/wsgi.py, core/asgi.py)."""
+    if getattr(settings, 'SEARCH_BACKEND', 'database') == 'memory':
+        inverted_indexes.start_loading()
+
+
+def reindex_queryset(queryset):
+    """Переиндексирует строки queryset (после массового update())."""
+    fields = get_search_fields(queryset.model)
+    if fields:
+        index_objects(queryset.model, queryset.only('pk', *fields).iterator(chunk_size=2000))
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """SearchFilter, использующий полнотекстовый индекс из SEARCH_BACKEND."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        filtered = get_search_backend().filter(queryset, terms)
+        if filtered is None:
+            return super().filter_queryset(request, queryset, view)
+        return filtered
+
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter: при поиске без ?ordering= — сначала лучшие совпадения."""
+
+    def get_ordering(self, request, queryset, view):
+        if (not request.query_params.get(self.ordering_param)
+                and SEARCH_RANK in queryset.query.annotations):
+            return [SEARCH_RANK]
+        return super().get_ordering(request, queryset, view)
@@ -2,6 +2,7 @@ __all__ = [
     'TaskCreateSerializer',
     'TaskListSerializer',
     'TaskDetailSerializer',
+    'TaskBulkStatusSerializer',
     'CategorySerializer',
     'CategoryCreateSerializer',
     'SubTaskSerializer',
@@ -12,6 +13,7 @@ from .tasks import (
     TaskCreateSerializer,
     TaskListSerializer,
     TaskDetailSerializer,
+    TaskBulkStatusSerializer,
 )
 
 from .categories import (
@@ -0,0 +1,183 @@
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, ищущий объекты в заранее загруженном словаре pk -> объект."""
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except Exception:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in self.objects:
+            self.fail('does_not_exist', pk_value=data)
+        return self.objects[pk]
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    many=True для массового создания без запросов на каждый элемент:
+    - уникальные поля (UniqueValidator) проверяются одним запросом field__in
+      на всю пачку, повторы внутри пачки тоже считаются ошибкой
+    - связи many-to-many по pk загружаются одним запросом pk__in на поле
+    - ошибки собираются по элементам (errors — список в порядке элементов),
+      корректные элементы доступны в valid_items как (индекс, данные)
+    """
+
+    duplicate_message = "Значение повторяется в элементе {index}"
+    exists_message = "Объект с таким значением поля {field} уже существует"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.valid_items = []
+
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list'
+            )
+        if not self.allow_empty and not data:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages['empty']]}, code='empty'
+            )
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages['max_length'].format(max_length=self.max_length)
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='max_length'
+            )
+
+        unique_fields = self.prepare_child(self.child, data)
+
+        errors = [{} for _ in data]
+        validated = {}
+        for index, item in enumerate(data):
+            try:
+                validated[index] = self.validate_item(index, item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+
+        for name, queryset in unique_fields.items():
+            self.check_unique(name, queryset, validated, errors)
+
+        self.valid_items = [
+            (index, attrs) for index, attrs in validated.items() if not errors[index]
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [attrs for _, attrs in self.valid_items]
+
+
+    def validate_item(self, index, item):
+        return self.child.run_validation(item)
+
+
+    def get_item_pk(self, index):
+        """pk объекта, который изменяет элемент index (None — элемент создаёт объект)."""
+        return None
+
+
+    @staticmethod
+    def prepare_child(child, data):
+        """
+        Готовит поля дочернего сериализатора к пачке: снимает UniqueValidator
+        (возвращает {поле: queryset} для общей проверки) и подменяет связи
+        many-to-many на поиск по загруженному словарю.
+        """
+        unique_fields = {}
+        for name, field in list(child.fields.items()):
+            if field.read_only:
+                continue
+
+            for validator in list(field.validators):
+                if isinstance(validator, UniqueValidator):
+                    unique_fields[field.source] = validator.queryset
+                    field.validators.remove(validator)
+
+            if (isinstance(field, serializers.ManyRelatedField)
+                    and type(field.child_relation) is serializers.PrimaryKeyRelatedField):
+                queryset = field.child_relation.get_queryset()
+                pks = set()
+                for item in data:
+                    values = item.get(name) if isinstance(item, dict) else None
+                    if isinstance(values, list):
+                        for value in values:
+                            try:
+                                pks.add(queryset.model._meta.pk.to_python(value))
+                            except Exception:
+                                pass
+                child.fields[name] = serializers.ManyRelatedField(
+                    child_relation=PrefetchedPrimaryKeyRelatedField(
+                        queryset.in_bulk(pks), queryset=queryset,
+                    ),
+                    required=field.required,
+                    allow_empty=field.allow_empty,
+                )
+        return unique_fields
+
+
+    def check_unique(self, name, queryset, validated, errors):
+        """Один запрос name__in на пачку и поиск повторов внутри неё."""
+        values = {attrs[name] for attrs in validated.values() if attrs.get(name) is not None}
+        existing = dict(
+            queryset.filter(**{f'{name}__in': values}).values_list(name, 'pk')
+        ) if values else {}
+
+        seen = {}
+        for index, attrs in validated.items():
+            value = attrs.get(name)
+            if value is None:
+                continue
+            if value in existing and existing[value] != self.get_item_pk(index):
+                errors[index] = {**errors[index], name: [self.exists_message.format(field=name)]}
+            elif value in seen:
+                errors[index] = {**errors[index], name: [self.duplicate_message.format(index=seen[value])]}
+            else:
+                seen[value] = index
+
+
+class BulkSaveListSerializer(BulkCreateListSerializer):
+    """
+    many=True для массового создания и обновления: элемент с "id" частично
+    обновляет объект из context['instances'] (словарь pk -> объект, загруженный
+    одним запросом), остальные элементы создают новые объекты.
+    Обновляемые объекты по индексам элементов — в item_instances.
+    """
+
+    not_found_message = "Объект с id {pk} не найден"
+
+    def to_internal_value(self, data):
+        self.item_instances = {}
+        self.update_child = type(self.child)(partial=True, context=self.context)
+        self.prepare_child(self.update_child, data if isinstance(data, list) else [])
+        return super().to_internal_value(data)
+
+
+    def validate_item(self, index, item):
+        if not isinstance(item, dict) or 'id' not in item:
+            return super().validate_item(index, item)
+
+        instances = self.context.get('instances', {})
+        try:
+            instance = instances.get(self.child.Meta.model._meta.pk.to_python(item['id']))
+        except Exception:
+            instance = None
+        if instance is None:
+            raise serializers.ValidationError({'id': [self.not_found_message.format(pk=item['id'])]})
+
+        self.item_instances[index] = instance
+        return self.update_child.run_validation(item)
+
+
+    def get_item_pk(self, index):
+        instance = self.item_instances.get(index)
+        return instance.pk if instance is not None else None
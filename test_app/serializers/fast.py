@@ -0,0 +1,178 @@
+"""
+Быстрые сериализаторы для чтения списков.
+
+Логика:
+1. Строки берутся из queryset.values() — без создания экземпляров моделей
+2. Словарь ответа собирается вручную в том же порядке и формате полей,
+   что и у ModelSerializer (даты — тем же DateTimeField DRF), поэтому JSON
+   совпадает байт в байт (тест на соответствие — в tests.py)
+3. Категории задач страницы загружаются одним запросом по таблице связи
+4. Представление выбирает сериализатор атрибутом fast_serializer_class
+   (FastListMixin); включаются настройкой FAST_READ_SERIALIZERS = True
+Быстрый путь заменяет ModelSerializer целиком, поэтому при нём списки задач
+не читают кэш фрагментов (fragments.py); деталь задачи — по-прежнему через него.
+При изменении полей обычного сериализатора нужно поменять и быстрый.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from test_app.models import Task
+
+_datetime = serializers.DateTimeField().to_representation
+
+
+def _format_datetime(value):
+    return None if value is None else _datetime(value)
+
+
+class FastSerializer:
+    """
+    Сериализатор строк values(): fields — пары (ключ ответа, поле values()),
+    datetime_fields — ключи, форматируемые как DateTimeField DRF,
+    omit_if_null — ключи, которых нет в ответе при значении None.
+    """
+
+    fields = ()
+    datetime_fields = ()
+    omit_if_null = ()
+
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+
+    def get_rows(self, queryset, extra_fields=()):
+        """queryset строк values(): поля сериализатора и extra_fields (для курсора пагинации)."""
+        names = dict.fromkeys([source for _, source in self.fields])
+        names.update(dict.fromkeys(extra_fields))
+        return queryset.prefetch_related(None).values(*names)
+
+
+    def to_representation(self, row):
+        data = {key: row[source] for key, source in self.fields}
+        for key in self.datetime_fields:
+            data[key] = _format_datetime(data[key])
+        for key in self.omit_if_null:
+            if data[key] is None:
+                del data[key]
+        return data
+
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class FastCategorySerializer(FastSerializer):
+    """Как CategorySerializer."""
+
+    fields = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('is_deleted', 'is_deleted'),
+        ('deleted_at', 'deleted_at'),
+        ('updated_at', 'updated_at'),
+    )
+    datetime_fields = ('deleted_at', 'updated_at')
+
+
+class FastSubTaskSerializer(FastSerializer):
+    """Как SubTaskSerializer."""
+
+    fields = (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('status', 'status'),
+        ('deadline', 'deadline'),
+        ('owner_username', 'owner__username'),
+        ('task', 'task_id'),
+    )
+    datetime_fields = ('deadline',)
+    # CharField(source='owner.username') без владельца DRF пропускает (SkipField)
+    omit_if_null = ('owner_username',)
+
+
+class FastTaskListSerializer(FastSerializer):
+    """Как TaskListSerializer: категории страницы — одним запросом."""
+
+    fields = (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('status', 'status'),
+        ('deadline', 'deadline'),
+        ('owner_username', 'owner__username'),
+    )
+    datetime_fields = ('deadline',)
+    omit_if_null = ('owner_username',)
+    category_serializer = FastCategorySerializer()
+
+
+    def serialize(self, rows):
+        rows = list(rows)
+        categories = self.get_categories([row['id'] for row in rows])
+        result = []
+        for row in rows:
+            data = self.to_representation(row)
+            # Порядок ключей — как в TaskListSerializer.Meta.fields
+            owner_username = data.pop('owner_username', None)
+            data['categories'] = categories.get(row['id'], [])
+            if owner_username is not None:
+                data['owner_username'] = owner_username
+            result.append(data)
+        return result
+
+
+    def get_categories(self, task_ids):
+        """task_id -> категории (неудалённые, как Prefetch в for_list())."""
+        if not task_ids:
+            return {}
+        fields = [f"category__{source}" for _, source in self.category_serializer.fields]
+        rows = (
+            Task.categories.through.objects
+            .filter(task_id__in=task_ids, category__is_deleted=False)
+            .order_by('category_id')
+            .values_list('task_id', *fields)
+        )
+        categories = defaultdict(list)
+        for task_id, *values in rows:
+            categories[task_id].append(self.category_serializer.to_representation(
+                dict(zip((source for _, source in self.category_serializer.fields), values))
+            ))
+        return categories
+
+
+class FastListMixin:
+    """
+    list() через быстрый сериализатор (fast_serializer_class): фильтры,
+    поиск, сортировка и пагинация — как обычно, но по строкам values().
+    """
+
+    fast_serializer_class = None
+
+
+    def use_fast_serializer(self):
+        return (self.fast_serializer_class is not None
+                and getattr(settings, 'FAST_READ_SERIALIZERS', False))
+
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.fast_serializer_class(context=self.get_serializer_context())
+
+        # Курсору пагинации нужны значения полей сортировки
+        extra_fields = ['id', *getattr(self, 'ordering_fields', ())]
+        extra_fields += [name for name in queryset.query.annotations]
+        rows = serializer.get_rows(queryset, extra_fields)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
@@ -0,0 +1,109 @@
+"""
+Кэш сериализованных строк (фрагментов).
+
+Логика:
+1. Сериализатор с FragmentCacheMixin кэширует результат to_representation
+   для каждого объекта по ключу: класс сериализатора, pk, updated_at
+   и вариант ответа (context['fragment_variant'], например subtasks_limit)
+2. updated_at задачи сдвигается при любом изменении, видимом в ответе
+   (в т.ч. подзадач и категорий, см. conditional.py) — новая версия
+   получает новый ключ, устаревший фрагмент не читается
+3. Список собирается из фрагментов: один get_many на страницу, сериализуются
+   только отсутствующие в кэше строки, они же сохраняются одним set_many
+4. Сигналы save/delete и m2m_changed задачи сразу удаляют фрагменты
+   прежней версии (варианта по умолчанию), не дожидаясь таймаута
+Объекты без загруженного updated_at (only()/defer()) не кэшируются.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+
+from test_app.caching import make_key
+
+# Модель -> сериализаторы с кэшем фрагментов (для удаления по сигналам)
+FRAGMENT_SERIALIZERS = defaultdict(list)
+
+
+def _timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600)
+
+
+def fragment_key(serializer_class, pk, version, variant=''):
+    return make_key('fragment', serializer_class.__name__, pk, version.isoformat(), variant)
+
+
+def invalidate_fragments(model, objs):
+    """Удаляет фрагменты объектов objs — пары (pk, updated_at)."""
+    keys = [
+        fragment_key(serializer_class, pk, version)
+        for serializer_class in FRAGMENT_SERIALIZERS.get(model, ())
+        for pk, version in objs
+        if pk is not None and version is not None
+    ]
+    if keys:
+        cache.delete_many(keys)
+
+
+class FragmentCacheListSerializer(serializers.ListSerializer):
+    """many=True: фрагменты страницы читаются и пишутся пачкой."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        keys = [self.child.get_fragment_key(item) for item in items]
+        cached = cache.get_many([key for key in keys if key])
+
+        result = []
+        missing = {}
+        for item, key in zip(items, keys):
+            fragment = cached.get(key) if key else None
+            if fragment is None:
+                fragment = self.child.render_fragment(item)
+                if key:
+                    missing[key] = fragment
+            result.append(fragment)
+
+        if missing:
+            cache.set_many(missing, timeout=_timeout())
+        return result
+
+
+class FragmentCacheMixin:
+    """
+    Кэш to_representation по версии объекта (поле updated_at).
+    Для пакетного чтения списков — Meta.list_serializer_class = FragmentCacheListSerializer.
+    """
+
+    fragment_version_field = 'updated_at'
+
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        FRAGMENT_SERIALIZERS[cls.Meta.model].append(cls)
+
+
+    def get_fragment_key(self, instance):
+        # Поле не загружено (отложено) — обращение к нему стоило бы запроса
+        version = instance.__dict__.get(self.fragment_version_field)
+        if version is None or instance.pk is None:
+            return None
+        return fragment_key(type(self), instance.pk, version, self.context.get('fragment_variant', ''))
+
+
+    def render_fragment(self, instance):
+        return super().to_representation(instance)
+
+
+    def to_representation(self, instance):
+        key = self.get_fragment_key(instance)
+        if key is None:
+            return self.render_fragment(instance)
+
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = self.render_fragment(instance)
+            cache.set(key, fragment, timeout=_timeout())
+        return fragment
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from test_app.models import SubTask
+from test_app.serializers.bulk import BulkSaveListSerializer
 
 
 class SubTaskCreateSerializer(serializers.ModelSerializer):
@@ -15,6 +16,8 @@ class SubTaskCreateSerializer(serializers.ModelSerializer):
             'deadline',
             'created_at',
         ]
+        # many=True: создание и обновление пачкой, title проверяется одним запросом (bulk/)
+        list_serializer_class = BulkSaveListSerializer
 
 
 class SubTaskSerializer(serializers.ModelSerializer):
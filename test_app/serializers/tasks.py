@@ -4,6 +4,8 @@ from rest_framework import serializers
 from test_app.models import Task
 from test_app.serializers.subtasks import SubTaskSerializer
 from test_app.serializers.categories import CategorySerializer
+from test_app.serializers.bulk import BulkCreateListSerializer
+from test_app.serializers.fragments import FragmentCacheListSerializer, FragmentCacheMixin
 
 
 
@@ -17,6 +19,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             'deadline',
             'categories',
         ]
+        # many=True: проверка title и категорий одним запросом на пачку (bulk/)
+        list_serializer_class = BulkCreateListSerializer
 
     def validate_deadline(self, value: str) -> str:
         if value < timezone.now():
@@ -26,7 +30,7 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class TaskListSerializer(serializers.ModelSerializer):
+class TaskListSerializer(FragmentCacheMixin, serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
 
     # Владелец виден при чтении
@@ -43,8 +47,10 @@ class TaskListSerializer(serializers.ModelSerializer):
             'categories',
             'owner_username'
         ]
+        # Строки страницы — из кэша фрагментов (serializers/fragments.py)
+        list_serializer_class = FragmentCacheListSerializer
 
-class TaskDetailSerializer(serializers.ModelSerializer):
+class TaskDetailSerializer(FragmentCacheMixin, serializers.ModelSerializer):
     subtasks = SubTaskSerializer(many=True, read_only=True)
     categories = CategorySerializer(many=True, read_only=True)
 
@@ -52,3 +58,19 @@ class TaskDetailSerializer(serializers.ModelSerializer):
         model = Task
         fields = '__all__'
 
+
+
+class TaskBulkStatusSerializer(serializers.Serializer):
+    """Тело POST /api/v1/tasks/bulk-status/."""
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+    task_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=1000
+    )
+    subtask_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=1000
+    )
+
+    def validate(self, attrs):
+        if not attrs['task_ids'] and not attrs['subtask_ids']:
+            raise serializers.ValidationError("Укажите task_ids и/или subtask_ids")
+        return attrs
@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+
+from test_app.tokens import RefreshToken
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(
@@ -33,4 +36,9 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             password=validated_data['password']
         )
-        return user
\ No newline at end of file
+        return user
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Обновление токенов с проверкой чёрного списка через Bloom-фильтр."""
+    token_class = RefreshToken
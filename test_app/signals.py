@@ -2,120 +2,188 @@
 Сигналы для уведомлений об изменении статуса задач.
 
 Логика:
-1. Отслеживает изменения поля 'status' модели Task
-2. При изменении отправляет email владельцу задачи
-3. Имеет защиту от спама: не отправляет при частых изменениях (30 сек)
+1. Отслеживает изменения поля 'status' модели Task (снимок при загрузке из БД)
+2. При изменении ставит email владельцу задачи в очередь (NotificationOutbox)
+3. Защита от спама: изменения копятся и уходят одним письмом-дайджестом
+   на владельца за окно NOTIFICATIONS_DIGEST_WINDOW (см. notifications.py)
 4. Для статуса 'done' отправляет специальное уведомление о закрытии
+5. Поддерживает счётчики задач по статусам (TaskStatusCounter)
+6. Сбрасывает закэшированную статистику задач при любой записи
+7. Сбрасывает кэш пользователей JWT-аутентификации при изменении пользователя
+8. Сообщает Bloom-фильтрам процессов о новых токенах в чёрном списке JWT
+9. Обновляет поисковый индекс задач и подзадач (search.py)
+10. Сдвигает версию (updated_at) задачи при изменении её подзадач и категорий
+    и версию коллекций задач и подзадач — для ETag/Last-Modified (conditional.py)
+11. Сбрасывает кэш анонимных списков задач (response_cache.py)
+12. Удаляет закэшированные фрагменты прежней версии задачи (serializers/fragments.py)
 
 Настройки:
 - EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-- Письма выводятся в консоль Django
+- Письма отправляет воркер: python manage.py send_notifications --loop
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
-from django.core.cache import cache
-from .models import Task
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .models import Category, Task, SubTask
+from .counters import adjust_status_counters
+from .statistics import invalidate_task_statistics
+from .notifications import enqueue_status_change
+from .authentication import invalidate_cached_user
+from .tokens import blacklist_changed
+from .search import get_search_fields, index_objects, remove_objects
+from .conditional import collection_changed, touch
+from .response_cache import invalidate_task_lists
+from .serializers.fragments import invalidate_fragments
 import logging
 
 logger = logging.getLogger(__name__)
 
-_previous_status_cache = {}
-
-
-@receiver(pre_save, sender=Task)
-def save_previous_status(sender, instance, **kwargs):
-    """Сохраняет старый статус задачи перед сохранением."""
-    try:
-        if instance.pk:
-            old_task = Task.objects.get(pk=instance.pk)
-            _previous_status_cache[instance.pk] = old_task.status
-            logger.debug(f"Saved previous status for task {instance.pk}: {old_task.status}")
-        else:
-            _previous_status_cache[instance.pk] = None
-    except Task.DoesNotExist:
-        _previous_status_cache[instance.pk] = None
-
 
 @receiver(post_save, sender=Task)
-def notify_on_status_change(sender, instance, created, **kwargs):
-    """Отправляет email при изменении статуса задачи."""
-
+def update_status_counters(sender, instance, created, update_fields=None, **kwargs):
+    """Обновляет счётчики задач по статусам после сохранения."""
     if created:
+        adjust_status_counters({instance.status: 1})
         return
 
-    old_status = _previous_status_cache.get(instance.pk)
-    new_status = instance.status
+    if instance.tracked_field_changed('status', update_fields):
+        adjust_status_counters({
+            instance.get_loaded_value('status'): -1,
+            instance.status: 1,
+        })
 
-    if old_status == new_status:
-        return
 
-    cache_key = f"task_notification_cooldown_{instance.pk}"
+@receiver(post_delete, sender=Task)
+def decrement_status_counter(sender, instance, **kwargs):
+    """Уменьшает счётчик статуса удалённой задачи."""
+    adjust_status_counters({instance.status: -1})
 
-    if cache.get(cache_key):
-        logger.info(f"Skipping notification for task {instance.pk} (cooldown active)")
-        print(f"Notification skipped for task {instance.pk} - too frequent changes")
-        return
 
-    cache.set(cache_key, True, timeout=30)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def reset_task_statistics(sender, instance, **kwargs):
+    """Сбрасывает кэш статистики (глобальной, владельца задачи и прежнего владельца)."""
+    owner_ids = [instance.owner_id]
+    if instance.tracked_field_changed('owner_id'):
+        owner_ids.append(instance.get_loaded_value('owner_id'))
+    invalidate_task_statistics(owner_ids=owner_ids)
 
-    if instance.pk in _previous_status_cache:
-        del _previous_status_cache[instance.pk]
 
-    if not instance.owner or not instance.owner.email:
-        logger.warning(f"Cannot send notification: task {instance.pk} has no owner or email")
-        return
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SubTask)
+def update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """Переиндексирует сохранённую задачу/подзадачу, если менялся её текст."""
+    loaded = getattr(instance, '_loaded_values', {})
+    for name in get_search_fields(sender):
+        if update_fields is not None and name not in update_fields:
+            continue
+        # Поля нет в снимке (объект не загружался из БД) — считаем изменённым
+        if created or name not in loaded or instance.tracked_field_changed(name):
+            index_objects(sender, [instance])
+            return
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Удаляет задачу/подзадачу из поискового индекса."""
+    remove_objects(sender, [instance.pk])
+
+
+@receiver(post_save, sender=SubTask)
+@receiver(post_delete, sender=SubTask)
+def touch_parent_task(sender, instance, **kwargs):
+    """Подзадачи входят в ответ по задаче — сдвигаем её версию."""
+    touch(Task, pk=instance.task_id)
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def touch_tasks_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Сдвигает версию задач при изменении связей с категориями."""
+    if action in ('post_add', 'post_remove') and pk_set:
+        if reverse:  # instance — категория, pk_set — задачи
+            touch(Task, pk__in=pk_set)
+        else:
+            touch(Task, pk=instance.pk)
+    elif action == 'pre_clear':
+        # После очистки связей задачи категории уже не найти
+        if reverse:
+            touch(Task, categories=instance)
+        else:
+            touch(Task, pk=instance.pk)
 
-    send_status_change_email(instance, old_status, new_status)
 
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_tasks(sender, instance, created=False, **kwargs):
+    """Переименование/удаление категории меняет ответы по её задачам."""
+    if not created:
+        touch(Task, categories=instance)
 
-def send_status_change_email(task, old_status, new_status):
-    """Формирует и отправляет email о изменении статуса."""
 
-    is_closing = (new_status == 'done')
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(m2m_changed, sender=Task.categories.through)
+def reset_task_lists(sender, **kwargs):
+    """Задачи и их категории входят в списки задач — сбрасываем их кэш."""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_task_lists()
+
 
-    subject = "Статус задачи изменён" if not is_closing else "Задача закрыта!"
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(m2m_changed, sender=Task.categories.through)
+def drop_task_fragments(sender, instance, reverse=False, action='post_', **kwargs):
+    """Удаляет фрагменты версии задачи, загруженной из БД (новая версия получит новый ключ)."""
+    if reverse or not action.startswith('post_'):
+        return
+    invalidate_fragments(Task, [(instance.pk, instance.get_loaded_value('updated_at'))])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=SubTask)
+@receiver(post_delete, sender=SubTask)
+def bump_collection_version(sender, instance, using=None, **kwargs):
+    """Любая запись в таблицу меняет версию всех списков по ней."""
+    collection_changed(sender, using=using)
 
-    context = {
-        'task_title': task.title,
-        'old_status': old_status,
-        'new_status': new_status,
-        'owner_name': task.owner.username,
-        'task_url': f"http://localhost:8000/api/tasks/{task.id}/",
-        'is_closing': is_closing,
-    }
 
-    message = f"""
-    Здравствуйте, {task.owner.username}!
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_cached_user(sender, instance, **kwargs):
+    """Сбрасывает кэш аутентификации (деактивация, смена пароля, удаление)."""
+    invalidate_cached_user(instance.pk)
 
-    Статус вашей задачи "{task.title}" был изменён.
 
-    Старый статус: {old_status}
-    Новый статус: {new_status}
+@receiver(post_save, sender=BlacklistedToken)
+def announce_blacklisted_token(sender, instance, created, **kwargs):
+    """После коммита увеличивает поколение чёрного списка в кэше."""
+    if created:
+        transaction.on_commit(blacklist_changed)
 
-    {"Задача закрыта!" if is_closing else "Продолжайте работу!"}
 
-    Ссылка на задачу: http://localhost:8000/api/v1/tasks/{task.id}/
-    """
+@receiver(post_save, sender=Task)
+def notify_on_status_change(sender, instance, created, update_fields=None, **kwargs):
+    """Ставит email в очередь при изменении статуса задачи."""
 
-    html_message = render_to_string('emails/task_status_change.html', context)
+    if created or not instance.tracked_field_changed('status', update_fields):
+        return
 
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL or 'noreply@taskmanager.com',
-            recipient_list=[task.owner.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+    # Прежний статус — из снимка, сделанного при загрузке задачи из БД
+    old_status = instance.get_loaded_value('status')
+    new_status = instance.status
 
-        logger.info(f"Email sent to {task.owner.email} for task {task.pk}")
-        print(f"Email sent to {task.owner.email} | Task: {task.title} | Status: {old_status} -> {new_status}")
+    if not instance.owner or not instance.owner.email:
+        logger.warning(f"Cannot send notification: task {instance.pk} has no owner or email")
+        return
 
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
-        print(f"Email error: {e}")
\ No newline at end of file
+    # Письмо не отправляется здесь: строка очереди пишется в той же транзакции,
+    # что и задача, а отправкой занимается воркер send_notifications
+    enqueue_status_change(instance, old_status, new_status)
+    print(f"Notification queued for {instance.owner.email} | Task: {instance.title} | Status: {old_status} -> {new_status}")
@@ -0,0 +1,91 @@
+"""
+Статистика задач с кэшированием.
+
+Логика:
+1. Глобальная статистика берёт количество по статусам из TaskStatusCounter
+2. Статистика пользователя (scope=mine) считается по его задачам (индекс owner)
+3. Результат кэшируется по ключу: область + поколение (epoch) + текущий день
+4. Запись задачи увеличивает поколение — кэш инвалидируется за O(1)
+5. Просроченные задачи считаются относительно начала текущего дня,
+   поэтому со сменой дня ключ меняется сам по себе
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .caching import bump_generation, get_generation, make_key
+from .counters import get_status_counts
+from .models import Task
+
+GLOBAL_EPOCH = 'task_statistics'
+BULK_EPOCH = 'task_statistics:bulk'
+
+
+def _owner_epoch(owner_id):
+    return f"task_statistics:user:{owner_id}"
+
+
+def invalidate_task_statistics(owner_ids=(), bulk=False):
+    """
+    Делает недействительной закэшированную статистику.
+    Глобальная сбрасывается всегда, пользовательская — для owner_ids;
+    bulk=True сбрасывает статистику всех пользователей (массовые update()).
+    """
+    bump_generation(GLOBAL_EPOCH)
+    if bulk:
+        bump_generation(BULK_EPOCH)
+    for owner_id in set(owner_ids):
+        if owner_id is not None:
+            bump_generation(_owner_epoch(owner_id))
+
+
+def get_task_statistics(owner=None):
+    """Статистика задач: глобальная или только по задачам owner."""
+    start_of_day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if owner is None:
+        epoch = get_generation(GLOBAL_EPOCH)
+        cache_key = make_key('statistics', 'all', epoch, start_of_day.date())
+    else:
+        epoch = get_generation(_owner_epoch(owner.pk))
+        bulk_epoch = get_generation(BULK_EPOCH)
+        cache_key = make_key('statistics', 'user', owner.pk, epoch, bulk_epoch, start_of_day.date())
+
+    statistics = cache.get(cache_key)
+    if statistics is None:
+        statistics = compute_task_statistics(owner, start_of_day)
+        cache.set(
+            cache_key,
+            statistics,
+            timeout=getattr(settings, 'TASK_STATISTICS_CACHE_TIMEOUT', 300)
+        )
+    return statistics
+
+
+def compute_task_statistics(owner, start_of_day):
+    """Считает статистику по БД (без кэша)."""
+    tasks = Task.objects.order_by()
+
+    if owner is None:
+        status_counts = get_status_counts()
+    else:
+        tasks = tasks.filter(owner=owner)
+        status_counts = dict(
+            tasks.values_list('status').annotate(count=Count('id'))
+        )
+
+    overdue_tasks = tasks.filter(
+        deadline__lt=start_of_day
+    ).exclude(status='done').count()
+
+    return {
+        'total_tasks': sum(status_counts.values()),
+        'tasks_by_status': [
+            {'status': status, 'count': count}
+            for status, count in status_counts.items()
+            if count > 0
+        ],
+        'overdue_tasks': overdue_tasks,
+    }
@@ -1,3 +1,1469 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest.mock import patch
 
-# Create your tests here.
+import jwt as pyjwt
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from paginators import KeysetCursorPagination
+from test_app.caching import bump_generation, get_generation, make_key
+from test_app.jwt_middleware import JWTAuthMiddleware
+from test_app.counters import check_status_counters, get_status_counts
+from test_app.counting import count_queryset
+from test_app.inverted_index import InvertedIndex, inverted_indexes
+from test_app.models import Category, Task, SubTask, TaskStatusCounter, NotificationOutbox
+from test_app.notifications import deliver_pending_notifications
+from test_app.serializers import TaskDetailSerializer, TaskListSerializer
+from test_app.serializers.fragments import fragment_key
+from test_app.statistics import get_task_statistics
+from test_app.tokens import BlacklistFilter, blacklist_changed, blacklist_filter, blacklist_pruned
+
+
+class BaseAPITestCase(APITestCase):
+    """Базовый класс: каждый тест начинается с пустого кэша."""
+
+    def setUp(self):
+        cache.clear()
+
+
+class TaskQueryCountTests(BaseAPITestCase):
+    """Количество запросов к БД не должно зависеть от размера страницы."""
+
+    def setUp(self):
+        super().setUp()
+        self.categories = [
+            Category.objects.create(name=f"Category {i}") for i in range(3)
+        ]
+
+    def create_tasks(self, count):
+        for i in range(count):
+            owner = User.objects.create_user(username=f"user_{Task.objects.count()}")
+            task = Task.objects.create(title=f"Task {Task.objects.count()}", owner=owner)
+            task.categories.set(self.categories)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_task_list_constant_queries(self):
+        self.create_tasks(1)
+        small_page = self.count_queries('/api/v1/tasks/')
+
+        self.create_tasks(4)
+        full_page = self.count_queries('/api/v1/tasks/')
+
+        self.assertEqual(small_page, full_page)
+
+    def test_task_list_skips_deleted_categories(self):
+        self.create_tasks(1)
+        self.categories[0].soft_delete()
+
+        response = self.client.get('/api/v1/tasks/')
+
+        names = [c['name'] for c in response.data['results'][0]['categories']]
+        self.assertNotIn(self.categories[0].name, names)
+
+    def test_my_tasks_and_subtasks_constant_queries(self):
+        user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(user)
+        task = Task.objects.create(title='Parent', owner=user)
+        task.categories.set(self.categories)
+
+        SubTask.objects.create(title='Sub 0', task=task, owner=user)
+        my_tasks_small = self.count_queries('/api/v1/tasks/my_tasks/')
+        subtasks_small = self.count_queries(f'/api/v1/tasks/{task.id}/subtasks/')
+
+        for i in range(1, 5):
+            other = User.objects.create_user(username=f"sub_owner_{i}")
+            SubTask.objects.create(title=f"Sub {i}", task=task, owner=other)
+            Task.objects.create(title=f"Mine {i}", owner=user).categories.set(self.categories)
+
+        self.assertEqual(my_tasks_small, self.count_queries('/api/v1/tasks/my_tasks/'))
+        self.assertEqual(subtasks_small, self.count_queries(f'/api/v1/tasks/{task.id}/subtasks/'))
+
+
+class TaskDetailQueryCountTests(BaseAPITestCase):
+    """Детальная задача загружается фиксированным числом запросов."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Parent', owner=self.user)
+        self.task.categories.set([Category.objects.create(name='Work')])
+        self.url = f'/api/v1/tasks/{self.task.id}/'
+
+    def add_subtasks(self, count):
+        start = self.task.subtasks.count()
+        for i in range(start, start + count):
+            owner = User.objects.create_user(username=f"sub_owner_{i}")
+            SubTask.objects.create(title=f"Sub {i}", task=self.task, owner=owner)
+
+    def test_detail_constant_queries(self):
+        self.add_subtasks(1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+
+        self.add_subtasks(10)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+        self.assertEqual(len(response.data['subtasks']), 11)
+        self.assertEqual(response.data['subtasks'][0]['owner_username'], 'sub_owner_10')
+
+    def test_subtasks_limit(self):
+        self.add_subtasks(5)
+
+        response = self.client.get(self.url, {'subtasks_limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [s['title'] for s in response.data['subtasks']],
+            ['Sub 4', 'Sub 3'],
+        )
+
+    def test_patch_does_not_prefetch_detail(self):
+        self.add_subtasks(3)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {'title': 'Renamed'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        # Ответ PATCH не содержит подзадач — их выборка была бы лишней
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in selects if 'task_manager_subtask' in sql], selects)
+
+
+class BenchIndexesCommandTests(BaseAPITestCase):
+    """bench_indexes удаляет индексы — на рабочей БД не запускается."""
+
+    def index_names(self):
+        with connection.cursor() as cursor:
+            return {index for index in connection.introspection.get_constraints(cursor, Task._meta.db_table)}
+
+    def test_refuses_default_database(self):
+        Task.objects.create(title='Task', owner=User.objects.create_user(username='owner'))
+        before = self.index_names()
+
+        for options in ({}, {'database': 'default'}):
+            with self.assertRaises(CommandError):
+                call_command('bench_indexes', stdout=StringIO(), **options)
+
+        self.assertEqual(self.index_names(), before)
+
+
+class TaskStatusCounterTests(BaseAPITestCase):
+    """Счётчики TaskStatusCounter совпадают с реальными данными."""
+
+    def test_counters_follow_task_changes(self):
+        task = Task.objects.create(title='First')
+        Task.objects.create(title='Second', status='pending')
+        task.status = 'done'
+        task.save()
+
+        self.assertEqual(get_status_counts()['done'], 1)
+        self.assertEqual(get_status_counts()['pending'], 1)
+        self.assertEqual(get_status_counts()['new'], 0)
+
+        task.delete()
+        Task.objects.filter(status='pending').update(status='blocked')
+        Task.objects.bulk_create([Task(title='Third'), Task(title='Fourth', status='done')])
+
+        self.assertEqual(check_status_counters(), {})
+        self.assertEqual(
+            get_status_counts(),
+            {'new': 1, 'in_progress': 0, 'pending': 0, 'blocked': 1, 'done': 1},
+        )
+
+    def test_rebuild_and_check_command(self):
+        Task.objects.create(title='First')
+        TaskStatusCounter.objects.filter(status='new').update(count=10)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_counters', check=True, stdout=StringIO(), stderr=StringIO())
+
+        call_command('rebuild_task_counters', stdout=StringIO())
+        self.assertEqual(check_status_counters(), {})
+
+    def test_statistics_uses_counters(self):
+        user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(user)
+        Task.objects.create(title='First', status='done')
+        Task.objects.create(title='Second')
+
+        response = self.client.get('/api/v1/tasks/statistics/')
+
+        self.assertEqual(response.data['total_tasks'], 2)
+        self.assertCountEqual(
+            response.data['tasks_by_status'],
+            [{'status': 'new', 'count': 1}, {'status': 'done', 'count': 1}],
+        )
+
+
+class TaskStatisticsTests(BaseAPITestCase):
+    """Статистика: область mine и кэш с инвалидацией при записи задач."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        other = User.objects.create_user(username='other')
+
+        Task.objects.create(title='Mine overdue', owner=self.user,
+                            deadline=timezone.now() - timedelta(days=2))
+        Task.objects.create(title='Mine done', owner=self.user, status='done',
+                            deadline=timezone.now() - timedelta(days=2))
+        Task.objects.create(title='Other', owner=other)
+
+    def test_scope_mine(self):
+        response = self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+
+        self.assertEqual(response.data['total_tasks'], 2)
+        self.assertEqual(response.data['overdue_tasks'], 1)
+
+        response = self.client.get('/api/v1/tasks/statistics/')
+        self.assertEqual(response.data['total_tasks'], 3)
+
+    def test_invalid_scope(self):
+        response = self.client.get('/api/v1/tasks/statistics/', {'scope': 'team'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_task_write(self):
+        self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+        with self.assertNumQueries(0):
+            self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+
+        Task.objects.create(title='Mine new', owner=self.user)
+        response = self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+        self.assertEqual(response.data['total_tasks'], 3)
+
+        Task.objects.filter(owner=self.user).update(status='done')
+        response = self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+        self.assertEqual(response.data['overdue_tasks'], 0)
+
+    def test_reassigned_task_resets_previous_owner(self):
+        self.assertEqual(self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'}).data['total_tasks'], 2)
+
+        task = Task.objects.get(title='Mine done')
+        task.owner = User.objects.get(username='other')
+        task.save(update_fields=['owner'])
+
+        response = self.client.get('/api/v1/tasks/statistics/', {'scope': 'mine'})
+        self.assertEqual(response.data['total_tasks'], 1)
+        self.assertFalse(task.tracked_field_changed('owner_id'))
+
+
+class StatusTrackingTests(BaseAPITestCase):
+    """Прежний статус берётся из снимка при загрузке, без лишних SELECT."""
+
+    def test_save_without_extra_select(self):
+        Task.objects.create(title='Task')
+        task = Task.objects.get(title='Task')
+        task.title = 'Renamed'
+
+        # UPDATE задачи и переиндексация (DELETE + INSERT); SAVEPOINT/RELEASE —
+        # atomic() в Task.save() внутри транзакции теста
+        with self.assertNumQueries(5):
+            task.save()
+
+    def test_status_change_detected(self):
+        Task.objects.create(title='Task')
+        task = Task.objects.get(title='Task')
+        task.status = 'done'
+
+        self.assertTrue(task.tracked_field_changed('status'))
+        self.assertFalse(task.tracked_field_changed('status', update_fields=['title']))
+        self.assertEqual(task.get_loaded_value('status'), 'new')
+
+        task.save()
+
+        self.assertFalse(task.tracked_field_changed('status'))
+        self.assertEqual(get_status_counts()['done'], 1)
+        self.assertEqual(get_status_counts()['new'], 0)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Почтовый backend, который всегда падает (для проверки повторов)."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException("SMTP server unavailable")
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    """Почтовый backend, к серверу которого нельзя подключиться."""
+
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+    def send_messages(self, email_messages):
+        raise AssertionError("send_messages() без соединения")
+
+
+class WorkerCrash(BaseException):
+    """Падение воркера посреди пачки (не перехватывается как ошибка отправки)."""
+
+
+class CrashingEmailBackend(BaseEmailBackend):
+    """Отправляет первое письмо и «падает» на втором."""
+
+    def send_messages(self, email_messages):
+        if mail.outbox:
+            raise WorkerCrash()
+        mail.outbox.extend(email_messages)
+        return len(email_messages)
+
+
+@override_settings(NOTIFICATIONS_DIGEST_WINDOW=0)
+class NotificationOutboxTests(BaseAPITestCase):
+    """Уведомления пишутся в очередь и отправляются воркером."""
+
+    def setUp(self):
+        super().setUp()
+        owner = User.objects.create_user(username='owner', email='owner@example.com')
+        self.task = Task.objects.create(title='Task', owner=owner)
+
+    def change_status(self):
+        self.task.status = 'done'
+        self.task.save()
+
+    def test_status_change_is_queued_not_sent(self):
+        self.change_status()
+
+        self.assertEqual(len(mail.outbox), 0)
+        notification = NotificationOutbox.objects.get()
+        self.assertEqual(notification.status, 'pending')
+        self.assertEqual((notification.old_status, notification.new_status), ('new', 'done'))
+
+    def test_worker_sends_pending(self):
+        self.change_status()
+
+        call_command('send_notifications', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['owner@example.com'])
+        self.assertEqual(mail.outbox[0].subject, "Задача закрыта!")
+        self.assertEqual(NotificationOutbox.objects.get().status, 'sent')
+
+    @override_settings(
+        EMAIL_BACKEND='test_app.tests.FailingEmailBackend',
+        NOTIFICATIONS_MAX_ATTEMPTS=2,
+    )
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.change_status()
+
+        self.assertEqual(deliver_pending_notifications(), (0, 1))
+        notification = NotificationOutbox.objects.get()
+        self.assertEqual(notification.status, 'pending')
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        deliver_pending_notifications()
+        self.assertEqual(NotificationOutbox.objects.get().status, 'failed')
+
+    @override_settings(EMAIL_BACKEND='test_app.tests.UnreachableEmailBackend')
+    def test_unreachable_smtp_postpones_batch(self):
+        self.change_status()
+
+        self.assertEqual(deliver_pending_notifications(), (0, 1))
+
+        notification = NotificationOutbox.objects.get()
+        self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+        self.assertIn('Connection refused', notification.last_error)
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+
+    @override_settings(EMAIL_BACKEND='test_app.tests.CrashingEmailBackend')
+    def test_sent_rows_marked_before_next_recipient(self):
+        other = User.objects.create_user(username='other', email='other@example.com')
+        Task.objects.create(title='Other task', owner=other)
+        for task in Task.objects.all():
+            task.status = 'done'
+            task.save()
+
+        with self.assertRaises(WorkerCrash):
+            deliver_pending_notifications()
+
+        # Первое письмо ушло и отмечено; второе повторится после аренды строк
+        sent = NotificationOutbox.objects.get(status='sent')
+        self.assertEqual(mail.outbox[0].to, [sent.recipient])
+        self.assertEqual(NotificationOutbox.objects.filter(status='pending').count(), 1)
+
+    def test_outbox_row_written_with_task_change(self):
+        with patch('test_app.signals.enqueue_status_change', side_effect=RuntimeError("outbox down")):
+            with self.assertRaises(RuntimeError):
+                self.change_status()
+
+        # Без строки очереди не сохраняется и смена статуса
+        self.assertEqual(Task.objects.get(pk=self.task.pk).status, 'new')
+
+
+@override_settings(NOTIFICATIONS_DIGEST_WINDOW=30)
+class NotificationDigestTests(BaseAPITestCase):
+    """Изменения копятся и отправляются одним письмом на владельца за окно."""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com')
+        self.tasks = [
+            Task.objects.create(title=f"Task {i}", owner=self.owner) for i in range(3)
+        ]
+
+    def set_status(self, task, new_status):
+        task.status = new_status
+        task.save()
+
+    def expire_window(self):
+        NotificationOutbox.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+    def test_changes_wait_for_window(self):
+        self.set_status(self.tasks[0], 'done')
+
+        self.assertEqual(deliver_pending_notifications(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_one_digest_per_owner(self):
+        self.set_status(self.tasks[0], 'in_progress')
+        self.set_status(self.tasks[0], 'done')
+        self.set_status(self.tasks[1], 'blocked')
+        self.set_status(self.tasks[2], 'pending')
+        self.set_status(self.tasks[2], 'new')
+        self.expire_window()
+
+        self.assertEqual(deliver_pending_notifications(), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        body = mail.outbox[0].body
+        self.assertIn('"Task 0": new -> done', body)
+        self.assertIn('"Task 1": new -> blocked', body)
+        self.assertNotIn('Task 2', body)
+        self.assertFalse(NotificationOutbox.objects.filter(status='pending').exists())
+
+
+class JWTCookieAuthenticationTests(BaseAPITestCase):
+    """Access-токен из cookie проверяется один раз за запрос."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def test_access_cookie_decoded_once(self):
+        self.client.cookies['access_token'] = str(self.refresh.access_token)
+
+        with patch.object(token_backend, 'decode', wraps=token_backend.decode) as decode:
+            response = self.client.get('/api/v1/tasks/my_tasks/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_access_minted_from_refresh_not_decoded_again(self):
+        self.client.cookies['refresh_token'] = str(self.refresh)
+
+        with patch.object(token_backend, 'decode', wraps=token_backend.decode) as decode:
+            response = self.client.get('/api/v1/tasks/my_tasks/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.cookies)
+        # Декодируется только refresh; новый access в DRF не проверяется повторно
+        self.assertEqual(decode.call_count, 1)
+
+    def test_invalid_access_cookie_rejected(self):
+        self.client.cookies['access_token'] = 'not-a-token'
+
+        response = self.client.get('/api/v1/tasks/my_tasks/')
+
+        self.assertEqual(response.status_code, 401)
+
+
+class CachedUserAuthenticationTests(BaseAPITestCase):
+    """Пользователь JWT берётся из кэша и сбрасывается при изменении."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.cookies['access_token'] = str(RefreshToken.for_user(self.user).access_token)
+
+    def user_lookups(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/tasks/statistics/')
+        lookups = [q for q in context.captured_queries if q['sql'].startswith('SELECT "auth_user"')]
+        return response, len(lookups)
+
+    def test_second_request_skips_user_query(self):
+        self.assertEqual(self.user_lookups()[1], 1)
+        response, lookups = self.user_lookups()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, 0)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user_lookups()
+        self.user.is_active = False
+        self.user.save()
+
+        response, _ = self.user_lookups()
+
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshSingleFlightTests(BaseAPITestCase):
+    """Запросы с одним refresh переиспользуют один выпущенный access."""
+
+    def test_concurrent_refreshes_reuse_one_access(self):
+        user = User.objects.create_user(username='owner')
+        self.client.cookies['refresh_token'] = str(RefreshToken.for_user(user))
+
+        first = self.client.get('/api/v1/tasks/my_tasks/')
+        del self.client.cookies['access_token']
+        second = self.client.get('/api/v1/tasks/my_tasks/')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(
+            first.cookies['access_token'].value,
+            second.cookies['access_token'].value,
+        )
+
+    def test_waits_for_access_minted_by_other_request(self):
+        user = User.objects.create_user(username='owner')
+        refresh = RefreshToken.for_user(user)
+        middleware = JWTAuthMiddleware(lambda request: None)
+        jti = refresh['jti']
+        other_access = str(refresh.access_token)
+
+        # Блокировку держит "другой" запрос; он выпускает access, пока мы ждём
+        cache.add(make_key('jwt_refresh', 'lock', jti), True)
+        with patch('test_app.jwt_middleware.time.sleep',
+                   side_effect=lambda seconds: cache.set(make_key('jwt_refresh', 'access', jti), other_access)):
+            raw_access, _ = middleware.refresh_access_token(str(refresh))
+
+        self.assertEqual(raw_access, other_access)
+
+    def test_planted_access_in_cache_is_ignored(self):
+        user = User.objects.create_user(username='owner')
+        admin = User.objects.create_user(username='admin')
+        refresh = RefreshToken.for_user(user)
+        middleware = JWTAuthMiddleware(lambda request: None)
+        result_key = make_key('jwt_refresh', 'access', refresh['jti'])
+        admin_access = RefreshToken.for_user(admin).access_token
+
+        forged = pyjwt.encode(dict(admin_access.payload), 'not-the-secret-key', algorithm='HS256')
+        for planted in (forged, str(admin_access)):
+            with self.subTest(planted=planted[:20]):
+                cache.set(result_key, planted)
+
+                raw_access, access = middleware.refresh_access_token(str(refresh))
+
+                self.assertNotEqual(raw_access, planted)
+                self.assertEqual(access['user_id'], str(user.id))
+
+
+class BlacklistFilterTests(BaseAPITestCase):
+    """Проверка чёрного списка идёт в БД только при срабатывании Bloom-фильтра."""
+
+    def setUp(self):
+        super().setUp()
+        blacklist_filter.reset()
+        self.user = User.objects.create_user(username='owner')
+
+    def test_clean_token_is_checked_without_queries(self):
+        refresh = RefreshToken.for_user(self.user)
+        blacklist_filter.sync()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist_filter.might_be_blacklisted(refresh['jti']))
+
+    def test_row_committed_below_last_loaded_id(self):
+        late, early = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        early_token = OutstandingToken.objects.get(jti=early['jti'])
+        late_token = OutstandingToken.objects.get(jti=late['jti'])
+        # Строка с id 10 зафиксирована раньше строки с id 5
+        BlacklistedToken.objects.create(id=10, token=early_token)
+        blacklist_filter.sync()
+
+        BlacklistedToken.objects.create(id=5, token=late_token)
+        blacklist_changed()
+
+        self.assertTrue(blacklist_filter.might_be_blacklisted(late['jti']))
+
+    def test_rebuild_keeps_serving_old_filter(self):
+        refresh = RefreshToken.for_user(self.user)
+        refresh.blacklist()
+        blacklist_filter.sync()
+        blacklist_pruned()
+
+        seen = []
+        load_rows = BlacklistFilter._load_rows
+
+        def check_during_rebuild(bloom, last_id, window_ids):
+            # Перестройка идёт без блокировки: параллельная проверка не ждёт
+            # и видит старый заполненный фильтр, а не пустой новый
+            if not seen:
+                seen.append(blacklist_filter.might_be_blacklisted(refresh['jti']))
+            return load_rows(bloom, last_id, window_ids)
+
+        with patch.object(BlacklistFilter, '_load_rows', side_effect=check_during_rebuild):
+            blacklist_filter.sync()
+
+        self.assertEqual(seen, [True])
+        self.assertTrue(blacklist_filter.might_be_blacklisted(refresh['jti']))
+
+    def test_logged_out_refresh_is_rejected(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        blacklist_filter.sync()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.cookies['refresh_token'] = refresh
+            self.client.post('/api/v1/logout/')
+
+        response = self.client.post('/api/v1/jwt-refresh/', {'refresh': refresh})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_refresh_is_rejected(self):
+        refresh = str(RefreshToken.for_user(self.user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.post('/api/v1/jwt-refresh/', {'refresh': refresh})
+        second = self.client.post('/api/v1/jwt-refresh/', {'refresh': refresh})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 401)
+
+
+class SubTaskKeysetPaginationTests(BaseAPITestCase):
+    """Курсорная пагинация подзадач по (created_at, id) без COUNT(*)."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Parent', owner=self.user)
+        # Одинаковый created_at у части строк — порядок решает id
+        now = timezone.now()
+        for i in range(12):
+            subtask = SubTask.objects.create(title=f"Sub {i}", task=self.task, owner=self.user)
+            SubTask.objects.filter(pk=subtask.pk).update(created_at=now - timedelta(minutes=i // 3))
+        self.url = f'/api/v1/tasks/{self.task.id}/subtasks/'
+
+    def collect_ids(self, url):
+        ids = []
+        while url:
+            body = self.client.get(url).json()
+            ids += [row['id'] for row in body['data']]
+            url = body['pagination']['next']
+        return ids
+
+    def test_walks_all_pages_in_requested_order(self):
+        expected = list(SubTask.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        self.assertEqual(self.collect_ids(self.url), expected)
+        self.assertEqual(self.collect_ids(self.url + '?ordering=created_at'), expected[::-1])
+
+    def test_following_page_reads_index_in_order(self):
+        # Запрос второй страницы — как в paginate_queryset, с параметрами (не литералами)
+        ordering = ('-created_at', '-id')
+        last = SubTask.objects.order_by(*ordering)[4]
+        queryset = (SubTask.objects.for_list().filter(task_id=self.task.id)
+                    .filter(KeysetCursorPagination.after(ordering, (last.created_at, last.id)))
+                    .order_by(*ordering)[:6])
+        sql, params = queryset.query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+        # Диапазон по индексу (created_at<?), без сортировки оставшихся строк
+        self.assertIn('subtask_task_created_idx (task_id=? AND created_at<?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_count_is_opt_in(self):
+        with CaptureQueriesContext(connection) as context:
+            body = self.client.get(self.url).json()
+        self.assertIsNone(body['pagination']['total_count'])
+        self.assertFalse(any('COUNT(' in q['sql'] for q in context.captured_queries))
+
+        body = self.client.get(self.url + '?with_count=1').json()
+        self.assertEqual(body['pagination']['total_count'], 12)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url).json()
+        second = self.client.get(first['pagination']['next']).json()
+        back = self.client.get(second['pagination']['previous']).json()
+
+        self.assertTrue(second['pagination']['has_previous'])
+        self.assertEqual(back['data'], first['data'])
+
+
+class NullableOrderingPaginationTests(BaseAPITestCase):
+    """Курсор по полю с NULL (deadline): NULL первыми при возрастании, последними при убывании."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        # Половина задач без срока: курсор попадает и на NULL, и на значения
+        now = timezone.now()
+        self.tasks = [
+            Task.objects.create(title=f"Task {i}", owner=self.user,
+                                deadline=now + timedelta(days=i % 4) if i % 2 else None)
+            for i in range(12)
+        ]
+        self.url = '/api/v1/tasks/my_tasks/?page_size=5&ordering='
+
+    def collect_ids(self, url, direction='next'):
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([row['id'] for row in body['results']])
+            url = body[direction]
+        if direction == 'previous':
+            pages.reverse()
+        return [pk for page in pages for pk in page]
+
+    def expected(self, descending=False):
+        def key(task):
+            timestamp = task.deadline.timestamp() if task.deadline else 0
+            if descending:
+                return task.deadline is None, -timestamp, -task.id
+            return task.deadline is not None, timestamp, task.id
+        return [task.id for task in sorted(self.tasks, key=key)]
+
+    def test_walks_all_pages(self):
+        self.assertEqual(self.collect_ids(self.url + 'deadline'), self.expected())
+        self.assertEqual(self.collect_ids(self.url + '-deadline'), self.expected(descending=True))
+
+    def test_walks_back_by_previous_links(self):
+        url = self.url + 'deadline'
+        while (next_url := self.client.get(url).json()['next']):
+            url = next_url
+        self.assertEqual(self.collect_ids(url, direction='previous'), self.expected())
+
+
+class EstimatedCountTests(BaseAPITestCase):
+    """Большие таблицы считаются по оценке/кэшу, маленькие — точно."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        Task.objects.bulk_create([Task(title=f"Task {i}", owner=self.user) for i in range(5)])
+
+    def test_small_table_is_counted_exactly(self):
+        self.assertEqual(count_queryset(Task.objects.all()), 5)
+        Task.objects.create(title='One more', owner=self.user)
+        self.assertEqual(count_queryset(Task.objects.all()), 6)
+
+    @override_settings(COUNT_EXACT_THRESHOLD=2)
+    def test_large_table_count_is_cached(self):
+        self.assertEqual(count_queryset(Task.objects.filter(status='new')), 5)
+        Task.objects.create(title='One more', owner=self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(count_queryset(Task.objects.all()), 5)
+            self.assertEqual(count_queryset(Task.objects.filter(status='new')), 5)
+
+    @override_settings(COUNT_EXACT_THRESHOLD=2)
+    def test_admin_changelist_skips_full_count(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.client.get('/admin/test_app/task/')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/test_app/task/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in context.captured_queries))
+
+
+class FullTextSearchTests(BaseAPITestCase):
+    """?search= через FTS5-индекс, обновляемый при записи моделей."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.report = Task.objects.create(title='Quarterly report', description='Prepare numbers', owner=self.user)
+        self.meeting = Task.objects.create(title='Meeting', description='Discuss the report report', owner=self.user)
+        Task.objects.create(title='Groceries', description='Milk', owner=self.user)
+
+    def search(self, term, url='/api/v1/tasks/'):
+        return [row['id'] for row in self.client.get(url, {'search': term}).json()['results']]
+
+    def test_prefix_search_ranks_best_match_first(self):
+        self.assertEqual(self.search('repo'), [self.meeting.id, self.report.id])
+        self.assertEqual(self.search('quarterly numb'), [self.report.id])
+
+    def test_index_follows_saves_updates_and_deletes(self):
+        self.report.title = 'Annual summary'
+        self.report.save()
+        Task.objects.filter(pk=self.meeting.pk).update(description='Weekly sync')
+        Task.objects.filter(title='Groceries').delete()
+
+        self.assertEqual(self.search('report'), [])
+        self.assertEqual(self.search('annual'), [self.report.id])
+        self.assertEqual(self.search('weekly'), [self.meeting.id])
+        self.assertEqual(self.search('milk'), [])
+
+    def test_search_results_paginate_by_rank(self):
+        Task.objects.bulk_create([
+            Task(title=f"Report {i}", description='report ' * i, owner=self.user) for i in range(1, 8)
+        ])
+        ids, url = [], '/api/v1/tasks/?search=report'
+        while url:
+            body = self.client.get(url).json()
+            ids += [row['id'] for row in body['results']]
+            url = body['next']
+
+        self.assertEqual(len(ids), 9)
+        self.assertEqual(len(set(ids)), 9)
+
+    @override_settings(SEARCH_RESULTS_LIMIT=3)
+    def test_view_filters_apply_before_results_limit(self):
+        other = User.objects.create_user(username='other')
+        Task.objects.bulk_create([Task(title=f"Report {i}", owner=other) for i in range(5)])
+        mine = Task.objects.create(title='report mine', owner=self.user)
+        subtask = SubTask.objects.create(title='report draft', task=self.report, owner=self.user)
+        SubTask.objects.bulk_create([SubTask(title=f"Report {i}", task=self.meeting) for i in range(5)])
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(set(self.search('report', '/api/v1/tasks/my_tasks/')),
+                         {self.report.id, self.meeting.id, mine.id})
+        body = self.client.get(f'/api/v1/tasks/{self.report.id}/subtasks/', {'search': 'report'}).json()
+        self.assertEqual([row['id'] for row in body['data']], [subtask.id])
+
+    @override_settings(SEARCH_BACKEND='memory', SEARCH_INDEX_SNAPSHOT='', SEARCH_RESULTS_LIMIT=3)
+    def test_memory_backend_falls_back_when_limit_hit(self):
+        inverted_indexes.reset()
+        other = User.objects.create_user(username='other')
+        Task.objects.bulk_create([Task(title=f"Report {i}", owner=other) for i in range(5)])
+        mine = Task.objects.create(title='report mine', owner=self.user)
+        inverted_indexes.load()
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(set(self.search('report', '/api/v1/tasks/my_tasks/')),
+                         {self.report.id, self.meeting.id, mine.id})
+
+    @override_settings(SEARCH_BACKEND='like')
+    def test_like_backend_uses_substring_search(self):
+        self.assertEqual(sorted(self.search('eport')), [self.report.id, self.meeting.id])
+
+
+@override_settings(SEARCH_BACKEND='memory', SEARCH_INDEX_SNAPSHOT='')
+class InvertedIndexSearchTests(BaseAPITestCase):
+    """?search= по инвертированному индексу в памяти процесса."""
+
+    def setUp(self):
+        super().setUp()
+        inverted_indexes.reset()
+        self.user = User.objects.create_user(username='owner')
+        self.report = Task.objects.create(title='Quarterly report', description='Prepare numbers', owner=self.user)
+        self.meeting = Task.objects.create(title='Meeting', description='Discuss the report', owner=self.user)
+        inverted_indexes.load()
+
+    def search(self, term):
+        return [row['id'] for row in self.client.get('/api/v1/tasks/', {'search': term}).json()['results']]
+
+    def test_term_lookup_does_not_query_database(self):
+        with self.assertNumQueries(0):
+            ids = inverted_indexes.search(Task, ['repo', 'quart'], limit=10)
+
+        self.assertEqual(ids, [self.report.id])
+
+    def test_add_many_matches_add(self):
+        docs = [(3, 'beta alpha'), (1, 'gamma beta'), (2, 'alpha delta'), (1, 'alpha')]
+        one_by_one, batch = InvertedIndex(), InvertedIndex()
+        for doc_id, text in docs:
+            one_by_one.add(doc_id, text)
+        batch.add_many(docs)
+
+        self.assertEqual(batch.terms, one_by_one.terms)
+        self.assertEqual(batch.terms, ['alpha', 'beta', 'delta'])
+        self.assertEqual(batch.postings, one_by_one.postings)
+        self.assertEqual(batch.doc_terms, one_by_one.doc_terms)
+
+    def test_search_before_load_does_not_build_index(self):
+        inverted_indexes.reset()
+
+        with patch.object(inverted_indexes, 'start_loading') as start_loading:
+            # Индекс не строится на запросе — поиск идёт без него (LIKE)
+            self.assertEqual(sorted(self.search('report')), [self.report.id, self.meeting.id])
+
+        start_loading.assert_called()
+        self.assertIsNone(inverted_indexes.get(Task))
+
+    def test_writes_committed_during_load_are_applied(self):
+        inverted_indexes.reset()
+        load = inverted_indexes._load
+
+        def load_with_concurrent_write():
+            indexes = load()
+            # Запись закоммичена после чтения строк, но до подмены индексов
+            with self.captureOnCommitCallbacks(execute=True):
+                self.meeting.title = 'Weekly sync'
+                self.meeting.save()
+            return indexes
+
+        with patch.object(inverted_indexes, '_load', load_with_concurrent_write):
+            inverted_indexes.load()
+
+        self.assertEqual(inverted_indexes.search(Task, ['weekly'], limit=10), [self.meeting.id])
+
+    def test_index_follows_committed_writes(self):
+        self.assertEqual(sorted(self.search('report')), [self.report.id, self.meeting.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.meeting.description = 'Weekly sync'
+            self.meeting.save()
+            self.report.delete()
+            task = Task.objects.create(title='Annual report', owner=self.user)
+
+        self.assertEqual(self.search('report'), [task.id])
+        self.assertEqual(self.search('weekly'), [self.meeting.id])
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search_index.snapshot')
+            call_command('build_search_index', path=path, stdout=StringIO())
+            Task.objects.create(title='Created after snapshot', owner=self.user)
+            self.meeting.title = 'Weekly sync'
+            self.meeting.save()
+            inverted_indexes.reset()
+
+            with override_settings(SEARCH_INDEX_SNAPSHOT=path):
+                inverted_indexes.load()
+                self.assertEqual(self.search('quarterly'), [self.report.id])
+                self.assertEqual(len(self.search('snapshot')), 1)
+                # Правка после снимка переиндексирована при загрузке
+                self.assertEqual(self.search('weekly'), [self.meeting.id])
+                self.assertEqual(self.search('meeting'), [])
+
+
+class TaskBulkCreateTests(BaseAPITestCase):
+    """POST /api/v1/tasks/bulk/: пачка задач за фиксированное число запросов."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        self.categories = [Category.objects.create(name=f"Category {i}") for i in range(3)]
+        Task.objects.create(title='Existing', owner=self.user)
+
+    def payload(self, count):
+        return [
+            {'title': f"Imported {i}", 'status': 'new', 'categories': [c.id for c in self.categories]}
+            for i in range(count)
+        ]
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        query_counts = []
+        for offset, count in ((0, 5), (100, 50)):
+            items = [{**item, 'title': f"Batch {offset + i}"} for i, item in enumerate(self.payload(count))]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/v1/tasks/bulk/', items, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.json()['created']), count)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Task.objects.get(title='Batch 101').categories.count(), 3)
+        self.assertEqual(get_status_counts()['new'], 56)
+
+    def test_partial_failure_reports_errors_by_index(self):
+        items = self.payload(3)
+        items[1]['title'] = 'Existing'
+        items[2]['title'] = items[0]['title']
+        items.append({'title': 'Bad category', 'categories': [999]})
+        items.append({'title': 'Good one'})
+
+        response = self.client.post('/api/v1/tasks/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([task['title'] for task in response.json()['created']], ['Imported 0', 'Good one'])
+        errors = {error['index']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn('title', errors[1])
+        self.assertIn('title', errors[2])
+        self.assertIn('categories', errors[3])
+
+    def test_rejects_non_list_body(self):
+        response = self.client.post('/api/v1/tasks/bulk/', {'title': 'One'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(title='One').exists())
+
+
+class SubTaskBulkTests(BaseAPITestCase):
+    """POST /api/v1/tasks/<id>/subtasks/bulk/: создание и обновление пачкой."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.other = User.objects.create_user(username='other')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Parent', owner=self.user)
+        self.mine = SubTask.objects.create(title='Mine', task=self.task, owner=self.user)
+        self.foreign = SubTask.objects.create(title='Foreign', task=self.task, owner=self.other)
+        self.url = f'/api/v1/tasks/{self.task.id}/subtasks/bulk/'
+
+    def test_creates_and_updates_in_one_request(self):
+        items = [{'title': f"New {i}"} for i in range(20)]
+        items.append({'id': self.mine.id, 'title': 'Mine renamed', 'status': 'done'})
+
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['created']), 20)
+        self.assertEqual(response.json()['updated'][0]['title'], 'Mine renamed')
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.status, 'done')
+        self.assertEqual(SubTask.objects.filter(task=self.task).count(), 22)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        query_counts = []
+        for prefix, count in (('Small', 3), ('Large', 30)):
+            items = [{'title': f"{prefix} {i}"} for i in range(count)]
+            items.append({'id': self.mine.id, 'description': prefix})
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, items, format='json')
+            self.assertEqual(response.status_code, 201)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_keeping_own_title_is_not_a_conflict(self):
+        response = self.client.post(self.url, [{'id': self.mine.id, 'title': 'Mine'}], format='json')
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_partial_failure(self):
+        items = [
+            {'title': 'Fresh'},
+            {'title': 'Foreign'},
+            {'id': self.foreign.id, 'title': 'Stolen'},
+            {'id': self.mine.id, 'title': 'Fresh'},
+        ]
+
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        errors = {error['index']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertIn('id', errors[2])
+        self.assertEqual(SubTask.objects.get(pk=self.foreign.pk).title, 'Foreign')
+
+    def test_single_create_loads_task_once(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(f'/api/v1/tasks/{self.task.id}/subtasks/', {'title': 'One'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        task_selects = [q for q in context.captured_queries
+                        if q['sql'].startswith('SELECT') and 'FROM "task_manager_task"' in q['sql']]
+        self.assertEqual(len(task_selects), 1)
+
+
+@override_settings(NOTIFICATIONS_DIGEST_WINDOW=0)
+class BulkStatusTests(BaseAPITestCase):
+    """POST /api/v1/tasks/bulk-status/: один UPDATE и побочные эффекты как у save()."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com')
+        self.other = User.objects.create_user(username='other', email='other@example.com')
+        self.client.force_authenticate(self.user)
+        self.tasks = Task.objects.bulk_create([Task(title=f"Task {i}", owner=self.user) for i in range(5)])
+        self.foreign = Task.objects.create(title='Foreign', owner=self.other)
+        self.subtask = SubTask.objects.create(title='Sub', task=self.tasks[0], owner=self.user)
+
+    def post(self, **data):
+        return self.client.post('/api/v1/tasks/bulk-status/', data, format='json')
+
+    def test_single_update_and_signal_side_effects(self):
+        ids = [task.id for task in self.tasks]
+        get_task_statistics()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.post(status='done', task_ids=ids + [self.foreign.id], subtask_ids=[self.subtask.id])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated_task_ids'], ids)
+        self.assertEqual(response.json()['not_found'], {'task_ids': [self.foreign.id]})
+        updates = [q for q in context.captured_queries if q['sql'].startswith('UPDATE "task_manager_task" SET "status"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(SubTask.objects.get(pk=self.subtask.pk).status, 'done')
+        self.assertEqual(get_status_counts()['done'], 5)
+        self.assertEqual(get_task_statistics()['total_tasks'], 6)
+        self.assertEqual(NotificationOutbox.objects.filter(recipient='owner@example.com').count(), 5)
+        self.assertEqual(Task.objects.get(pk=self.foreign.pk).status, 'new')
+
+        sent, failed = deliver_pending_notifications()
+        self.assertEqual((sent, failed), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_unchanged_rows_are_skipped(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(status='done')
+
+        response = self.post(status='done', task_ids=[self.tasks[0].id, self.tasks[1].id])
+
+        self.assertEqual(response.json()['updated_task_ids'], [self.tasks[1].id])
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+    def test_requires_ids(self):
+        self.assertEqual(self.post(status='done').status_code, 400)
+        self.assertEqual(self.post(status='finished', task_ids=[1]).status_code, 400)
+
+
+class ConditionalGetTests(BaseAPITestCase):
+    """ETag/Last-Modified: 304 без сериализации, пока данные не менялись."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Work')
+        self.task = Task.objects.create(title='Task', owner=self.user)
+        self.task.categories.set([self.category])
+        self.subtask = SubTask.objects.create(title='Sub', task=self.task, owner=self.user)
+        self.detail_url = f'/api/v1/tasks/{self.task.id}/'
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_not_modified_without_loading_rows(self):
+        response = self.client.get('/api/v1/tasks/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):  # версия коллекции — в кэше
+            self.assertNotModified('/api/v1/tasks/', etag)
+
+        # Другие параметры запроса — другой ответ и другой ETag
+        self.assertModified('/api/v1/tasks/?status=new', etag)
+
+    def test_list_version_changes_on_writes(self):
+        url = '/api/v1/tasks/my_tasks/'
+        etag = self.client.get(url)['ETag']
+        Task.objects.create(title='Other', owner=User.objects.create_user(username='other'))
+        self.assertModified(url, etag)
+
+        etag = self.client.get(url)['ETag']
+        Task.objects.get(title='Other').delete()
+        self.assertModified(url, etag)
+
+        etag = self.client.get(url)['ETag']
+        self.client.post('/api/v1/tasks/bulk-status/', {'status': 'done', 'task_ids': [self.task.id]}, format='json')
+        self.assertModified(url, etag)
+
+    def test_list_version_ignores_updated_at_order(self):
+        # Запись, получившая updated_at раньше текущего максимума (долгая
+        # транзакция, отстающие часы), всё равно меняет версию списка
+        other = Task.objects.create(title='Other', owner=self.user)
+        stamped_early = self.task.updated_at - timedelta(minutes=5)
+        etag = self.client.get('/api/v1/tasks/')['ETag']
+
+        Task.objects.filter(pk=other.pk).update(title='Renamed', updated_at=stamped_early)
+
+        self.assertModified('/api/v1/tasks/', etag)
+
+    def test_user_scoped_list_etag_is_per_user(self):
+        url = '/api/v1/tasks/my_tasks/'
+        response = self.client.get(url)
+        self.assertIn('Authorization', response['Vary'])
+        self.assertIn('Cookie', response['Vary'])
+
+        # ETag пользователя A не подходит пользователю B, хотя версия таблицы та же
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        self.assertModified(url, response['ETag'])
+
+    def test_detail_version_follows_subtasks_and_categories(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.assertNotModified(self.detail_url, etag)
+
+        self.subtask.title = 'Sub renamed'
+        self.subtask.save()
+        self.assertModified(self.detail_url, etag)
+
+        etag = self.client.get(self.detail_url)['ETag']
+        self.category.name = 'Home'
+        self.category.save()
+        self.assertModified(self.detail_url, etag)
+
+        etag = self.client.get(self.detail_url)['ETag']
+        self.task.categories.clear()
+        self.assertModified(self.detail_url, etag)
+
+        etag = self.client.get(self.detail_url)['ETag']
+        SubTask.objects.filter(pk=self.subtask.pk).update(status='done')
+        self.assertModified(self.detail_url, etag)
+
+    def test_subtask_patch_changes_versions(self):
+        detail_url = f'/api/v1/subtasks/{self.subtask.id}/'
+        list_url = f'/api/v1/tasks/{self.task.id}/subtasks/'
+        detail_etag = self.client.get(detail_url)['ETag']
+        list_etag = self.client.get(list_url)['ETag']
+
+        response = self.client.patch(detail_url, {'title': 'Sub renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertModified(detail_url, detail_etag)
+        self.assertModified(list_url, list_etag)
+
+    def test_if_modified_since(self):
+        response = self.client.get(f'/api/v1/subtasks/{self.subtask.id}/')
+
+        response = self.client.get(
+            f'/api/v1/subtasks/{self.subtask.id}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get('/api/v1/tasks/999999/').status_code, 404)
+
+
+class AnonymousTaskListCacheTests(BaseAPITestCase):
+    """Анонимный список задач: попадание в кэш без запросов к БД, сброс по поколению."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.category = Category.objects.create(name='Work')
+        self.task = Task.objects.create(title='Task', owner=self.user)
+        self.task.categories.set([self.category])
+
+    def titles(self, url='/api/v1/tasks/'):
+        return [task['title'] for task in self.client.get(url).data['results']]
+
+    def test_hit_does_not_query_database(self):
+        first = self.client.get('/api/v1/tasks/?status=new&ordering=-created_at')
+
+        with self.assertNumQueries(0):
+            # Порядок параметров не создаёт новый ключ
+            second = self.client.get('/api/v1/tasks/?ordering=-created_at&status=new')
+            not_modified = self.client.get(
+                '/api/v1/tasks/?ordering=-created_at&status=new', HTTP_IF_NONE_MATCH=second['ETag']
+            )
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.titles(), ['Task'])
+
+        Task.objects.create(title='New task', owner=self.user)
+        self.assertEqual(self.titles(), ['New task', 'Task'])
+
+        self.category.name = 'Home'
+        self.category.save()
+        response = self.client.get('/api/v1/tasks/')
+        self.assertEqual(response.data['results'][1]['categories'][0]['name'], 'Home')
+
+        Task.objects.filter(title='New task').update(title='Renamed')
+        self.assertEqual(self.titles(), ['Renamed', 'Task'])
+
+    def test_authenticated_and_unknown_params_bypass_cache(self):
+        self.client.get('/api/v1/tasks/')
+        self.client.get('/api/v1/tasks/?foo=bar')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/v1/tasks/?foo=bar')
+        self.assertGreater(len(context.captured_queries), 0)
+
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/v1/tasks/')
+        self.assertGreater(len(context.captured_queries), 0)
+
+
+class SharedCacheTests(BaseAPITestCase):
+    """Тесты идут через PyMemcacheCache и локальную замену memcached."""
+
+    def test_cache_is_shared_between_connections(self):
+        # Отдельное подключение — как кэш другого воркера
+        other_worker = caches.create_connection('default')
+        try:
+            cache.set(make_key('statistics', 'shared'), {'total_tasks': 3})
+            self.assertEqual(other_worker.get(make_key('statistics', 'shared')), {'total_tasks': 3})
+
+            generation = get_generation('shared')
+            other_worker.incr(make_key('generation', 'shared'))
+            self.assertEqual(get_generation('shared'), generation + 1)
+            self.assertEqual(bump_generation('shared'), generation + 2)
+
+            self.assertTrue(cache.add(make_key('jwt_refresh', 'lock', 'jti'), True, timeout=5))
+            self.assertFalse(other_worker.add(make_key('jwt_refresh', 'lock', 'jti'), True, timeout=5))
+        finally:
+            other_worker.close()
+
+    def test_lost_generation_does_not_repeat(self):
+        seen = {get_generation('evicted'), bump_generation('evicted')}
+
+        # Номер вытеснен: новые номера не совпадают с прежними
+        cache.delete(make_key('generation', 'evicted'))
+        after_eviction = get_generation('evicted')
+        cache.delete(make_key('generation', 'evicted'))
+        after_bump = bump_generation('evicted')
+
+        self.assertTrue(seen.isdisjoint({after_eviction, after_bump}))
+        self.assertGreater(after_bump, after_eviction)
+
+    def test_make_key(self):
+        self.assertEqual(make_key('count', 'table', 'default', 'task'), 'count:v1:table:default:task')
+
+        long_key = make_key('response', 'x' * 300)
+        spaced_key = make_key('statistics', 'two words')
+        self.assertTrue(long_key.startswith('response:v2:md5:'))
+        self.assertTrue(spaced_key.startswith('statistics:v1:md5:'))
+
+        # Ключи допустимы для memcached — значения сохраняются и читаются
+        cache.set(long_key, 1)
+        cache.set(spaced_key, 2)
+        self.assertEqual(cache.get_many([long_key, spaced_key]), {long_key: 1, spaced_key: 2})
+
+        with self.assertRaises(KeyError):
+            make_key('unknown', 'key')
+
+
+class TaskFragmentCacheTests(BaseAPITestCase):
+    """Строки задач сериализуются один раз на версию updated_at (ModelSerializer)."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Work')
+        self.tasks = [Task.objects.create(title=f"Task {i}", owner=self.user) for i in range(3)]
+        self.tasks[0].categories.set([self.category])
+
+    def rendered(self, serializer_class, url):
+        with patch.object(serializer_class, 'render_fragment', autospec=True,
+                          side_effect=serializer_class.render_fragment) as render:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, render.call_count
+
+    def test_list_is_assembled_from_cached_fragments(self):
+        first, rendered = self.rendered(TaskListSerializer, '/api/v1/tasks/my_tasks/')
+        self.assertEqual(rendered, 3)
+
+        second, rendered = self.rendered(TaskListSerializer, '/api/v1/tasks/my_tasks/')
+        self.assertEqual(rendered, 0)
+        self.assertEqual(first.data['results'], second.data['results'])
+
+        # Переименование категории сдвигает версию только её задачи
+        self.category.name = 'Home'
+        self.category.save()
+        third, rendered = self.rendered(TaskListSerializer, '/api/v1/tasks/my_tasks/')
+        self.assertEqual(rendered, 1)
+        task = next(row for row in third.data['results'] if row['id'] == self.tasks[0].id)
+        self.assertEqual(task['categories'][0]['name'], 'Home')
+
+    def test_detail_follows_subtasks_and_limit_variant(self):
+        url = f'/api/v1/tasks/{self.tasks[0].id}/'
+        SubTask.objects.create(title='Sub 1', task=self.tasks[0], owner=self.user)
+        self.rendered(TaskDetailSerializer, url)
+        self.assertEqual(self.rendered(TaskDetailSerializer, url)[1], 0)
+
+        SubTask.objects.create(title='Sub 2', task=self.tasks[0], owner=self.user)
+        response, rendered = self.rendered(TaskDetailSerializer, url)
+        self.assertEqual(rendered, 1)
+        self.assertEqual(len(response.data['subtasks']), 2)
+
+        limited, rendered = self.rendered(TaskDetailSerializer, url + '?subtasks_limit=1')
+        self.assertEqual(rendered, 1)
+        self.assertEqual(len(limited.data['subtasks']), 1)
+
+    def test_signals_drop_previous_version(self):
+        self.client.get('/api/v1/tasks/my_tasks/')
+        task = Task.objects.get(pk=self.tasks[1].pk)
+        key = fragment_key(TaskListSerializer, task.pk, task.updated_at)
+        self.assertIsNotNone(cache.get(key))
+
+        task.categories.add(self.category)
+
+        self.assertIsNone(cache.get(key))
+
+
+@override_settings(FAST_READ_SERIALIZERS=True)
+class FastReadSerializerTests(BaseAPITestCase):
+    """Быстрые сериализаторы дают тот же JSON, что и ModelSerializer."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='owner')
+        self.client.force_authenticate(self.user)
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(3)]
+        categories[1].soft_delete()
+
+        deadline = timezone.now() + timedelta(days=3)
+        self.tasks = []
+        for i in range(7):
+            task = Task.objects.create(
+                title=f"Task report {i}",
+                description=f"Description {i}",
+                status='done' if i % 2 else 'new',
+                deadline=deadline + timedelta(hours=i) if i % 3 else None,
+                owner=self.user if i != 4 else None,
+            )
+            task.categories.set(categories[i % 3:])
+            self.tasks.append(task)
+        for i in range(4):
+            SubTask.objects.create(title=f"Sub {i}", task=self.tasks[0], owner=self.user if i else None,
+                                   deadline=deadline if i % 2 else None)
+
+    def get_pages(self, url):
+        """JSON всех страниц (по ссылкам next) и число запросов к БД."""
+        pages = []
+        queries = 0
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            queries += len(context.captured_queries)
+            pages.append(response.content)
+            data = response.json()
+            url = data.get('next') or data.get('pagination', {}).get('next')
+        return pages, queries
+
+    def test_same_json_as_model_serializers(self):
+        urls = [
+            '/api/v1/tasks/',
+            '/api/v1/tasks/?page_size=3&with_count=1',
+            '/api/v1/tasks/?status=new&ordering=created_at',
+            '/api/v1/tasks/?search=report&page_size=4',
+            '/api/v1/tasks/my_tasks/?ordering=created_at&page_size=2',
+            '/api/v1/tasks/my_tasks/?ordering=deadline&page_size=2',
+            '/api/v1/tasks/my_tasks/?ordering=-deadline&page_size=2',
+            f'/api/v1/tasks/{self.tasks[0].id}/subtasks/?page_size=3',
+            f'/api/v1/tasks/{self.tasks[0].id}/subtasks/?ordering=created_at&with_count=1',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                with override_settings(FAST_READ_SERIALIZERS=False):
+                    expected, model_queries = self.get_pages(url)
+                cache.clear()
+                actual, fast_queries = self.get_pages(url)
+
+                self.assertEqual(actual, expected)
+                self.assertLessEqual(fast_queries, model_queries)
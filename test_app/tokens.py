@@ -0,0 +1,189 @@
+"""
+Быстрая проверка чёрного списка refresh-токенов.
+
+Логика:
+1. В памяти процесса держится Bloom-фильтр jti из BlacklistedToken
+2. Если фильтр говорит «точно нет» — запрос в БД не нужен
+3. Если «возможно есть» — проверяем в БД, как делает simplejwt
+4. Добавление в чёрный список увеличивает поколение в кэше; процессы,
+   заметив новое поколение, догружают новые строки. Автоинкремент
+   фиксируется не по порядку id (MySQL), поэтому каждый раз перечитываются
+   и BLACKLIST_FILTER_RESCAN_WINDOW id ниже последнего загруженного
+5. Не реже раза в BLACKLIST_FILTER_MAX_AGE секунд фильтр догружается
+   и без смены поколения (на случай кэша, не общего для процессов),
+   раз в BLACKLIST_FILTER_REBUILD_AGE секунд — строится заново
+6. Новый фильтр строится без блокировки в локальной переменной и подменяет
+   старый только целиком: остальные запросы не ждут перестройки и до подмены
+   проверяют по старому фильтру (или по БД, если фильтра ещё нет)
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .caching import bump_generation, get_generation
+
+BLACKLIST_GENERATION = 'jwt_blacklist'
+BLACKLIST_REBUILD_GENERATION = 'jwt_blacklist:rebuild'
+
+
+class BloomFilter:
+    """Bloom-фильтр для строк: без ложноотрицательных ответов."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class BlacklistFilter:
+    """Bloom-фильтр jti чёрного списка, синхронизируемый с БД."""
+
+    min_capacity = 10_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        """Сбрасывает фильтр; он будет построен заново при следующей проверке."""
+        self._bloom = None
+        self._last_id = 0
+        self._window_ids = set()
+        self._generation = None
+        self._rebuild_generation = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+        self._rebuilding = False
+
+
+    def might_be_blacklisted(self, jti):
+        """False — токена точно нет в чёрном списке; True — нужна проверка в БД."""
+        self.sync()
+        bloom = self._bloom
+        # Фильтра ещё нет (строится в другом потоке) — проверяем в БД
+        return bloom is None or jti in bloom
+
+
+    def sync(self):
+        generation = get_generation(BLACKLIST_GENERATION)
+        rebuild_generation = get_generation(BLACKLIST_REBUILD_GENERATION)
+        max_age = getattr(settings, 'BLACKLIST_FILTER_MAX_AGE', 5)
+        rebuild_age = getattr(settings, 'BLACKLIST_FILTER_REBUILD_AGE', 3600)
+
+        with self._lock:
+            needs_rebuild = (
+                self._bloom is None
+                or rebuild_generation != self._rebuild_generation
+                or time.monotonic() - self._built_at > rebuild_age
+                or self._bloom.count > self._bloom.capacity
+            )
+            # Строит один поток; остальные не ждут и работают со старым фильтром
+            rebuild = needs_rebuild and not self._rebuilding
+            if rebuild:
+                self._rebuilding = True
+            elif self._bloom is not None and (generation != self._generation
+                                              or time.monotonic() - self._synced_at > max_age):
+                self._load_new_rows()
+                self._generation = generation
+
+        if rebuild:
+            self._rebuild(generation, rebuild_generation)
+
+
+    def _rebuild(self, generation, rebuild_generation):
+        """
+        Строит фильтр заново (после очистки таблиц, переполнения, по возрасту)
+        без блокировки и подменяет им текущий только полностью загруженным.
+        """
+        try:
+            capacity = max(BlacklistedToken.objects.count() * 2, self.min_capacity)
+            bloom = BloomFilter(capacity)
+            last_id, window_ids = self._load_rows(bloom, 0, set())
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+        with self._lock:
+            self._bloom, self._last_id, self._window_ids = bloom, last_id, window_ids
+            # Строки, добавленные во время построения, догрузит следующая синхронизация:
+            # поколение запомнено до построения
+            self._generation = generation
+            self._rebuild_generation = rebuild_generation
+            self._built_at = self._synced_at = time.monotonic()
+
+
+    def _load_new_rows(self):
+        """Догружает строки, добавленные после прошлой синхронизации (под блокировкой)."""
+        self._last_id, self._window_ids = self._load_rows(self._bloom, self._last_id, self._window_ids)
+        self._synced_at = time.monotonic()
+
+
+    @staticmethod
+    def _load_rows(bloom, last_id, window_ids):
+        """
+        Добавляет в bloom строки с id > last_id, включая зафиксированные позже
+        строк с большим id (окно ниже last_id). Возвращает новые (last_id, window_ids).
+        """
+        window = getattr(settings, 'BLACKLIST_FILTER_RESCAN_WINDOW', 1000)
+        rows = (BlacklistedToken.objects
+                .filter(id__gt=max(last_id - window, 0))
+                .order_by('id')
+                .values_list('id', 'token__jti')
+                .iterator(chunk_size=10_000))
+        loaded = []
+        for row_id, jti in rows:
+            if row_id not in window_ids:  # уже в фильтре — не завышаем count
+                bloom.add(jti)
+            loaded.append(row_id)
+            last_id = max(last_id, row_id)
+        return last_id, {row_id for row_id in loaded if row_id > last_id - window}
+
+
+blacklist_filter = BlacklistFilter()
+
+
+def blacklist_changed():
+    """Сообщает процессам, что в чёрный список добавлены токены."""
+    bump_generation(BLACKLIST_GENERATION)
+
+
+def blacklist_pruned():
+    """Сообщает процессам, что фильтр нужно перестроить (строки удалены)."""
+    bump_generation(BLACKLIST_REBUILD_GENERATION)
+
+
+class RefreshToken(BaseRefreshToken):
+    """RefreshToken, проверяющий чёрный список через Bloom-фильтр."""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not blacklist_filter.might_be_blacklisted(jti):
+            return
+        super().check_blacklist()
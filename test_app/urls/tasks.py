@@ -1,16 +1,22 @@
 from django.urls import path
 from test_app.views import (
     TaskListCreateView,
+    TaskBulkCreateView,
+    TaskBulkStatusView,
     TaskDetailUpdateDeleteView,
     get_tasks_statistics,
     SubTaskListCreateView,
+    SubTaskBulkView,
     MyTasksView,
 )
 
 urlpatterns = [
     path('', TaskListCreateView.as_view()),
+    path('bulk/', TaskBulkCreateView.as_view()),
+    path('bulk-status/', TaskBulkStatusView.as_view()),
     path('<int:id>/', TaskDetailUpdateDeleteView.as_view()),
     path('statistics/', get_tasks_statistics),
     path('<int:task_id>/subtasks/', SubTaskListCreateView.as_view()),
+    path('<int:task_id>/subtasks/bulk/', SubTaskBulkView.as_view()),
     path('my_tasks/', MyTasksView.as_view()),
 ]
\ No newline at end of file
@@ -1,10 +1,13 @@
 __all__ = [
     'TaskListCreateView',
+    'TaskBulkCreateView',
+    'TaskBulkStatusView',
     'TaskDetailUpdateDeleteView',
     'get_tasks_statistics',
     'home_page',
     'user_page',
     'SubTaskListCreateView',
+    'SubTaskBulkView',
     'SubTaskDetailUpdateDeleteView',
     'CategoryViewSet',
     'MyTasksView',
@@ -12,6 +15,8 @@ __all__ = [
 
 from .task_views import (
     TaskListCreateView,
+    TaskBulkCreateView,
+    TaskBulkStatusView,
     TaskDetailUpdateDeleteView,
     MyTasksView,
     get_tasks_statistics,
@@ -21,6 +26,7 @@ from .task_views import (
 
 from .subtasks_views import (
     SubTaskListCreateView,
+    SubTaskBulkView,
     SubTaskDetailUpdateDeleteView,
 )
 
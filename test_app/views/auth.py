@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from test_app.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from test_app.serializers.users import UserRegisterSerializer
 
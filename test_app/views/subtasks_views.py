@@ -1,45 +1,51 @@
-from rest_framework import filters, status
+from django.conf import settings
+from django.db import IntegrityError
+from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from paginators import KeysetCursorPagination
+from test_app.bulk import bulk_save_subtasks
+from test_app.conditional import ConditionalListMixin, ConditionalRetrieveMixin
 from test_app.models import SubTask, Task
 from test_app.serializers import SubTaskCreateSerializer, SubTaskSerializer
+from test_app.serializers.fast import FastListMixin, FastSubTaskSerializer
 from test_app.permissions import IsOwnerOrReadOnly
+from test_app.search import FullTextSearchFilter, SearchRankOrderingFilter
 
 
-class SubTaskPagination(PageNumberPagination):
-    page_size = 5
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+class SubTaskPagination(KeysetCursorPagination):
+    """Курсорная пагинация подзадач; общее число — только с ?with_count=1."""
 
     def get_paginated_response(self, data):
         return Response({
             'data': data,
             'pagination': {
-                'current_page': self.page.number,
-                'total_pages': self.page.paginator.num_pages,
-                'total_count': self.page.paginator.count,
-                'has_next': self.page.has_next(),
-                'has_previous': self.page.has_previous(),
-                'page_size': self.get_page_size(self.request)
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'total_count': self.count,
+                'has_next': self.has_next,
+                'has_previous': self.has_previous,
+                'page_size': self.page_size
             }
         })
 
 
-class SubTaskListCreateView(ListCreateAPIView):
+class SubTaskListCreateView(ConditionalListMixin, FastListMixin, ListCreateAPIView):
     serializer_class = SubTaskSerializer
+    fast_serializer_class = FastSubTaskSerializer
     pagination_class = SubTaskPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
 
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
 
     # Фильтр через query params: ?status=, ?deadline=
     filterset_fields = ['status', 'deadline']
 
-    # Поиск ?search= (ищет в title, description )
+    # Полнотекстовый поиск ?search= (ищет в title, description; без ?ordering= — по релевантности)
     search_fields = ['title', 'description']
 
     # Сортировка ?ordering=created_at или ?ordering=-created_at
@@ -48,7 +54,7 @@ class SubTaskListCreateView(ListCreateAPIView):
 
 
     def get_queryset(self):
-        queryset = SubTask.objects.all()
+        queryset = SubTask.objects.for_list()
         task_id = self.kwargs.get('task_id')
         if task_id:
             queryset = queryset.filter(task_id=task_id)
@@ -62,9 +68,8 @@ class SubTaskListCreateView(ListCreateAPIView):
 
 
     def perform_create(self, serializer):
-        task_id = self.kwargs.get('task_id')
-        task = Task.objects.get(id=task_id)
-        serializer.save(task=task, owner=self.request.user)
+        # Задача уже загружена в create() — повторный запрос не нужен
+        serializer.save(task=self.task, owner=self.request.user)
 
 
     def create(self, request, *args, **kwargs):
@@ -79,7 +84,7 @@ class SubTaskListCreateView(ListCreateAPIView):
             )
 
         try:
-            task = Task.objects.get(id=task_id)
+            self.task = Task.objects.get(id=task_id)
         except Task.DoesNotExist:
             return Response(
                 data={"error": f"Задача с id {task_id} не найдена"},
@@ -111,8 +116,83 @@ class SubTaskListCreateView(ListCreateAPIView):
         )
 
 
-class SubTaskDetailUpdateDeleteView(RetrieveUpdateDestroyAPIView):
-    queryset = SubTask.objects.all()
+class SubTaskBulkView(APIView):
+    """
+    Массовое создание/обновление подзадач задачи:
+    POST /api/v1/tasks/<task_id>/subtasks/bulk/ со списком подзадач.
+    Элемент с "id" частично обновляет свою подзадачу этой задачи, без "id" — создаёт новую.
+    201 — сохранены все элементы, 207 — часть, 400 — ни одного.
+    """
+    permission_classes = [IsAuthenticated]
+
+
+    def post(self, request, task_id):
+        try:
+            task = Task.objects.only('id').get(id=task_id)
+        except Task.DoesNotExist:
+            return Response(
+                data={"error": f"Задача с id {task_id} не найдена"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Изменять можно только свои подзадачи этой задачи — одним запросом
+        update_ids = [
+            item['id'] for item in request.data
+            if isinstance(item, dict) and isinstance(item.get('id'), int)
+        ] if isinstance(request.data, list) else []
+        instances = (
+            SubTask.objects.select_related('owner')
+            .filter(task=task, owner=request.user)
+            .in_bulk(update_ids)
+        ) if update_ids else {}
+
+        serializer = SubTaskCreateSerializer(
+            data=request.data,
+            many=True,
+            max_length=getattr(settings, 'TASKS_BULK_MAX_ITEMS', 1000),
+            context={'request': request, 'instances': instances},
+        )
+        serializer.is_valid()
+
+        if isinstance(serializer.errors, dict) and serializer.errors:
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        item_instances = serializer.item_instances
+        creates = [attrs for index, attrs in serializer.valid_items if index not in item_instances]
+        updates = [(item_instances[index], attrs) for index, attrs in serializer.valid_items
+                   if index in item_instances]
+        try:
+            created, updated = bulk_save_subtasks(task, request.user, creates, updates)
+        except IntegrityError as exc:
+            return Response(
+                data={"error": "Конфликт при сохранении подзадач, повторите запрос", "detail": str(exc)},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        errors = [
+            {'index': index, 'errors': item_errors}
+            for index, item_errors in enumerate(serializer.errors)
+            if item_errors
+        ]
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif serializer.valid_items:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            data={
+                'created': SubTaskSerializer(created, many=True).data,
+                'updated': SubTaskSerializer(updated, many=True).data,
+                'errors': errors,
+            },
+            status=response_status
+        )
+
+
+class SubTaskDetailUpdateDeleteView(ConditionalRetrieveMixin, RetrieveUpdateDestroyAPIView):
+    queryset = SubTask.objects.for_list()
     serializer_class = SubTaskSerializer
     lookup_field = 'id'
 
@@ -1,24 +1,32 @@
+from django.conf import settings
+from django.db import IntegrityError
 from django.http import HttpRequest, HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status
+from rest_framework import status
 from rest_framework.generics import (
     ListCreateAPIView,
     RetrieveUpdateDestroyAPIView,
     ListAPIView
 )
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from datetime import datetime
 
 from test_app.serializers import (
     TaskCreateSerializer,
     TaskListSerializer,
     TaskDetailSerializer,
+    TaskBulkStatusSerializer,
 )
-from test_app.models import Task
+from test_app.serializers.fast import FastListMixin, FastTaskListSerializer
+from test_app.bulk import bulk_change_status, bulk_create_tasks
+from test_app.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from test_app.models import SubTask, Task
 from test_app.permissions import IsAuthenticatedForModification, IsOwnerOrReadOnly
-from django.db.models import Count
+from test_app.response_cache import CachedAnonymousListMixin
+from test_app.search import FullTextSearchFilter, SearchRankOrderingFilter
+from test_app.statistics import get_task_statistics
 
 
 WEEK_DAY_MAP = {
@@ -32,17 +40,20 @@ WEEK_DAY_MAP = {
 }
 
 
-class TaskListCreateView(ListCreateAPIView):
-    queryset = Task.objects.all()
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+class TaskListCreateView(CachedAnonymousListMixin, ConditionalListMixin, FastListMixin, ListCreateAPIView):
+    queryset = Task.objects.for_list()
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     filterset_fields = ['status', 'deadline']     # (/?status=, /?deadline=) Фильтрация по статусу и дедлайну
-    search_fields = ['title', 'description']      # (/?search= ) Поиск по заголовку и описанию
+    search_fields = ['title', 'description']      # (/?search= ) Полнотекстовый поиск по заголовку и описанию
     ordering_fields = ['created_at']              # (/?ordering= ) Сортировка по дате создания
     ordering = ['-created_at']                    # Сортировка по умолчанию
 
     # ПЕРМИШЕНЫ: Чтение всем, создание только авторизованным
     permission_classes = [IsAuthenticatedForModification]
 
+    # Чтение списка — из values() без экземпляров моделей (serializers/fast.py)
+    fast_serializer_class = FastTaskListSerializer
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return TaskCreateSerializer
@@ -87,7 +98,96 @@ class TaskListCreateView(ListCreateAPIView):
         )
 
 
-class TaskDetailUpdateDeleteView(RetrieveUpdateDestroyAPIView):
+class TaskBulkCreateView(APIView):
+    """
+    Массовое создание задач: POST /api/v1/tasks/bulk/ со списком задач.
+    Корректные элементы создаются, ошибки возвращаются по индексам:
+    201 — созданы все, 207 — часть, 400 — ни одной.
+    """
+    permission_classes = [IsAuthenticated]
+
+
+    def post(self, request):
+        serializer = TaskCreateSerializer(
+            data=request.data,
+            many=True,
+            max_length=getattr(settings, 'TASKS_BULK_MAX_ITEMS', 1000),
+        )
+        serializer.is_valid()
+
+        if isinstance(serializer.errors, dict) and serializer.errors:
+            # Тело запроса — не список или список недопустимой длины
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        valid_items = serializer.valid_items
+        try:
+            tasks = bulk_create_tasks([attrs for _, attrs in valid_items], owner=request.user)
+        except IntegrityError as exc:
+            # Параллельный запрос успел создать задачу с тем же title
+            return Response(
+                data={"error": "Конфликт при сохранении задач, повторите запрос", "detail": str(exc)},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        created = Task.objects.for_list().filter(pk__in=[task.pk for task in tasks]).order_by('pk')
+        errors = [
+            {'index': index, 'errors': item_errors}
+            for index, item_errors in enumerate(serializer.errors)
+            if item_errors
+        ]
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif tasks:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            data={
+                'created': TaskListSerializer(created, many=True).data,
+                'errors': errors,
+            },
+            status=response_status
+        )
+
+
+class TaskBulkStatusView(APIView):
+    """
+    Массовая смена статуса своих задач и подзадач: POST /api/v1/tasks/bulk-status/
+    {"status": "done", "task_ids": [...], "subtask_ids": [...]}.
+    Один UPDATE на модель; уведомления по задачам — как при save().
+    """
+    permission_classes = [IsAuthenticated]
+
+
+    def post(self, request):
+        serializer = TaskBulkStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(data=serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        new_status = serializer.validated_data['status']
+        result = {'status': new_status}
+        not_found = {}
+
+        for key, model in (('task_ids', Task), ('subtask_ids', SubTask)):
+            requested = list(dict.fromkeys(serializer.validated_data[key]))
+            if not requested:
+                continue
+            queryset = model.objects.filter(pk__in=requested, owner=request.user)
+            found = set(queryset.values_list('pk', flat=True))
+
+            result[f"updated_{key}"] = bulk_change_status(queryset, new_status) if found else []
+            missing = [pk for pk in requested if pk not in found]
+            if missing:
+                not_found[key] = missing
+
+        # Чужие и несуществующие id не меняются и возвращаются отдельно
+        result['not_found'] = not_found
+        return Response(data=result, status=status.HTTP_200_OK)
+
+
+class TaskDetailUpdateDeleteView(ConditionalRetrieveMixin, RetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskDetailSerializer
     lookup_field = 'id'
@@ -102,6 +202,32 @@ class TaskDetailUpdateDeleteView(RetrieveUpdateDestroyAPIView):
         return TaskDetailSerializer
 
 
+    def get_subtasks_limit(self):
+        # (/?subtasks_limit= ) Ограничение количества подзадач в ответе
+        subtasks_limit = self.request.query_params.get('subtasks_limit', '').strip()
+        if subtasks_limit.isdigit() and int(subtasks_limit) > 0:
+            return int(subtasks_limit)
+        return None
+
+
+    def get_queryset(self):
+        # Категории, подзадачи и владелец нужны только ответу GET:
+        # PUT/PATCH/DELETE загружают одну строку задачи
+        if self.request.method not in ('GET', 'HEAD'):
+            return super().get_queryset()
+
+        return Task.objects.for_detail(subtasks_limit=self.get_subtasks_limit())
+
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Ответ с ограничением подзадач кэшируется отдельным фрагментом
+        subtasks_limit = self.get_subtasks_limit()
+        if subtasks_limit:
+            context['fragment_variant'] = f"subtasks_limit={subtasks_limit}"
+        return context
+
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         partial = kwargs.pop('partial', False)
@@ -144,21 +270,23 @@ class TaskDetailUpdateDeleteView(RetrieveUpdateDestroyAPIView):
         return Response(data={}, status=status.HTTP_204_NO_CONTENT)
 
 
-class MyTasksView(ListAPIView):
+class MyTasksView(ConditionalListMixin, FastListMixin, ListAPIView):
     """
     Получить задачи текущего пользователя.
     """
     serializer_class = TaskListSerializer
+    fast_serializer_class = FastTaskListSerializer
     permission_classes = [IsAuthenticated]
+    validators_per_user = True                    # ETag с pk пользователя: данные у каждого свои
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, SearchRankOrderingFilter]
     filterset_fields = ['status', 'deadline']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'deadline']
     ordering = ['-created_at']
 
     def get_queryset(self):
-        return Task.objects.filter(owner=self.request.user)
+        return Task.objects.for_list().filter(owner=self.request.user)
 
 
 
@@ -166,24 +294,18 @@ class MyTasksView(ListAPIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])  # Только авторизованные
 def get_tasks_statistics(request):
-    total_tasks = Task.objects.count()
-
-    tasks_by_status = (Task.objects
-                       .values('status')
-                       .annotate(count=Count('id')))
-
-    overdue_tasks = Task.objects.filter(
-        deadline__lt=datetime.now().date()
-    ).exclude(status='Done').count()
+    # (/?scope=mine ) Статистика только по задачам текущего пользователя
+    scope = request.query_params.get('scope', 'all').lower().strip()
+    if scope not in ('all', 'mine'):
+        return Response(
+            data={"error": "Параметр scope может быть 'all' или 'mine'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    statistics = {
-        'total_tasks': total_tasks,
-        'tasks_by_status': list(tasks_by_status),
-        'overdue_tasks': overdue_tasks
-    }
+    statistics = get_task_statistics(owner=request.user if scope == 'mine' else None)
 
     return Response(
-        data=statistics,
+        data={'scope': scope, **statistics},
         status=status.HTTP_200_OK
     )
 